@@ -0,0 +1,76 @@
+"""
+MultiSearch 批量查询基准测试
+
+使用模拟每次 HTTP 请求 10ms 延迟的客户端，对比仪表盘 30 个面板逐个执行查询与
+MultiSearchBatch 合并为 _msearch（单批次、每批 10 个并发发送）的总耗时。
+
+运行方式:
+    python benchmarks/bench_batch.py
+"""
+
+import time
+
+from elastic_transport import ApiResponseMeta, HttpHeaders, ObjectApiResponse
+from elasticsearch.dsl import Search
+
+from elasticsearch_toolkit import DslQueryBuilder, MultiSearchBatch
+
+PANELS = 30
+LATENCY = 0.01
+RESPONSE = {"hits": {"total": {"value": 0, "relation": "eq"}, "hits": []}}
+META = ApiResponseMeta(
+    status=200, http_version="1.1", headers=HttpHeaders(), duration=0.0, node=None
+)
+
+
+class LatencyClient:
+    """每次请求等待固定延迟的客户端."""
+
+    def search(self, index=None, body=None, **kwargs):
+        time.sleep(LATENCY)
+        return ObjectApiResponse(body=RESPONSE, meta=META)
+
+    def msearch(self, body=None, **kwargs):
+        time.sleep(LATENCY)
+        return {"responses": [RESPONSE] * (len(body) // 2)}
+
+
+def make_builders() -> list[DslQueryBuilder]:
+    builders = []
+    for i in range(PANELS):
+        builder = DslQueryBuilder(search_factory=lambda: Search(index="logs"))
+        builder.conditions([{"key": "panel", "method": "eq", "value": [i]}])
+        builders.append(builder)
+    return builders
+
+
+def sequential(client: LatencyClient) -> None:
+    for builder in make_builders():
+        builder.build().using(client).execute()
+
+
+def batched(client: LatencyClient, max_batch_size: int) -> None:
+    batch = MultiSearchBatch(max_batch_size=max_batch_size, using=client)
+    for builder in make_builders():
+        batch.add(builder)
+    assert all(result.ok for result in batch.execute())
+
+
+def main() -> None:
+    client = LatencyClient()
+    print(f"{PANELS} panels, {LATENCY * 1e3:.0f}ms per request")
+    for label, func in (
+        ("sequential search", lambda: sequential(client)),
+        ("msearch, 1 batch", lambda: batched(client, PANELS)),
+        ("msearch, batches of 10", lambda: batched(client, 10)),
+    ):
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        print(f"{label:<24} {best * 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+条件编译基准测试
+
+对比优化前（依次使用 & / | 组合每个条件的 Q 对象）与 ConditionCompiler 扁平编译
+在 30 个条件（典型仪表盘面板）和 200 个条件下的请求体大小与 build_body() 耗时。
+两种方式的查询语义一致。
+
+另外对比同一条件列表对 1000 组值逐次调用 ConditionCompiler.compile() 与
+prepare() 一次后 ConditionPlan.compile_many() 的耗时。
+
+运行方式:
+    python benchmarks/bench_condition_compiler.py
+"""
+
+import json
+import timeit
+
+from elasticsearch.dsl import Search
+
+from elasticsearch_toolkit import (
+    ConditionCompiler,
+    ConditionItem,
+    DefaultConditionParser,
+    DslQueryBuilder,
+)
+
+VALUE_SETS = 1000
+
+
+class LegacyDslQueryBuilder(DslQueryBuilder):
+    """优化前的条件组合方式，作为对照."""
+
+    def _combine_conditions(self):
+        combined_q = None
+        for cond in self._conditions:
+            q = self._condition_parser.parse(
+                ConditionItem(
+                    key=cond["key"],
+                    method=cond.get("method", "eq"),
+                    value=cond["value"],
+                    condition=cond.get("condition", "and"),
+                )
+            )
+            if q is None:
+                continue
+            if combined_q is None:
+                combined_q = q
+            elif cond.get("condition") == "or":
+                combined_q = combined_q | q
+            else:
+                combined_q = combined_q & q
+        return combined_q
+
+
+def make_conditions(n_conditions: int) -> list[dict]:
+    """
+    仪表盘面板的典型条件: 按 10 个一组，前 4 个为同一字段 eq 之间 or，
+    接着 3 个同一字段的 neq、2 个 exclude 和 1 个范围条件.
+    """
+    conditions = []
+    for i in range(n_conditions):
+        group, k = divmod(i, 10)
+        if k < 4:
+            cond = {"key": f"status_{group}", "method": "eq", "value": [f"s{k}"]}
+            cond["condition"] = "or" if k else "and"
+        elif k < 7:
+            cond = {"key": f"host_{group}", "method": "neq", "value": [f"h{k}"]}
+        elif k < 9:
+            cond = {"key": "message", "method": "exclude", "value": [f"m{i}"]}
+        else:
+            cond = {"key": "level", "method": "gte", "value": [group]}
+        conditions.append(cond)
+    return conditions
+
+
+def main() -> None:
+    print(
+        f"{'conditions':>10} {'legacy bytes':>13} {'flat bytes':>11} "
+        f"{'legacy':>11} {'flat':>11}"
+    )
+    for n_conditions in (30, 200):
+        conditions = make_conditions(n_conditions)
+        sizes = []
+        times = []
+        for cls in (LegacyDslQueryBuilder, DslQueryBuilder):
+            builder = cls(
+                search_factory=lambda: Search(index="alerts"),
+                condition_parser=DefaultConditionParser(),
+            )
+            builder.conditions(conditions)
+            sizes.append(len(json.dumps(builder.build_body())))
+            number = max(20, 6000 // n_conditions)
+            best = min(timeit.repeat(builder.build_body, number=number, repeat=5))
+            times.append(best * 1e6 / number)
+        print(
+            f"{n_conditions:>10} {sizes[0]:>13} {sizes[1]:>11} "
+            f"{times[0]:>8.1f} us {times[1]:>8.1f} us"
+        )
+
+    conditions = make_conditions(30)
+    value_sets = [
+        [[f"{cond['value'][0]}-{i}"] for cond in conditions] for i in range(VALUE_SETS)
+    ]
+    compiler = ConditionCompiler()
+
+    def compile_each():
+        for values in value_sets:
+            compiler.compile(
+                [
+                    {**cond, "value": value}
+                    for cond, value in zip(conditions, values, strict=True)
+                ]
+            )
+
+    def compile_plan():
+        compiler.prepare(conditions).compile_many(value_sets)
+
+    print(f"\n30 conditions x {VALUE_SETS} value sets")
+    for label, func in (
+        ("compile() each", compile_each),
+        ("prepare() + compile_many()", compile_plan),
+    ):
+        best = min(timeit.repeat(func, number=1, repeat=5))
+        print(f"{label:<28} {best * 1e3:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
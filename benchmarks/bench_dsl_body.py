@@ -0,0 +1,60 @@
+"""
+DslQueryBuilder 请求体生成基准测试
+
+对比 build().to_dict() 与 build_body() 在 1、20、200 个条件下的单次耗时。
+两种方式的输出完全一致。
+
+运行方式:
+    python benchmarks/bench_dsl_body.py
+"""
+
+import json
+import timeit
+
+from elasticsearch.dsl import Search
+
+from elasticsearch_toolkit import DslQueryBuilder
+
+METHODS = ("eq", "neq", "gte", "include", "exists")
+
+
+def make_builder(n_conditions: int) -> DslQueryBuilder:
+    conditions = [
+        {
+            "key": f"field_{i}",
+            "method": METHODS[i % len(METHODS)],
+            "value": [f"value-{i}"],
+            "condition": "or" if i % 7 == 6 else "and",
+        }
+        for i in range(n_conditions)
+    ]
+    builder = DslQueryBuilder(search_factory=lambda: Search(index="alerts"))
+    builder.conditions(conditions)
+    builder.query_string("message: timeout")
+    builder.ordering(["-create_time", "id"])
+    builder.pagination(page=2, page_size=20)
+    builder.add_aggregation("by_status", "terms", field="status", size=10)
+    return builder
+
+
+def main() -> None:
+    print(
+        f"{'conditions':>10} {'build().to_dict()':>20} {'build_body()':>14} {'speedup':>8}"
+    )
+    for n_conditions in (1, 20, 200):
+        builder = make_builder(n_conditions)
+        assert json.dumps(builder.build_body()) == json.dumps(builder.build().to_dict())
+
+        number = max(50, 20_000 // (n_conditions * 10))
+        results = []
+        for func in (lambda: builder.build().to_dict(), builder.build_body):
+            best = min(timeit.repeat(func, number=number, repeat=5))
+            results.append(best * 1e6 / number)
+        print(
+            f"{n_conditions:>10} {results[0]:>17.1f} us {results[1]:>11.1f} us "
+            f"{results[0] / results[1]:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
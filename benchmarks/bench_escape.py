@@ -0,0 +1,64 @@
+"""
+escape_query_string 基准测试
+
+对比逐个转义与批量转义在"干净"（不含特殊字符）和"脏"（含特殊字符）输入上的单值耗时。
+
+运行方式:
+    python benchmarks/bench_escape.py
+"""
+
+import random
+import re
+import string
+import timeit
+
+from elasticsearch_toolkit.core.utils import escape_query_string, escape_query_strings
+
+N_VALUES = 50_000
+REPEAT = 5
+
+
+def legacy_escape(s: str) -> str:
+    """优化前的实现：每次调用重新编译正则并执行两趟替换，作为对照."""
+    regex = r'([+\-=&|><!(){}[\]^"~*?\\:\/ ])'
+    special_chars = re.compile(regex)
+    escaped_special_chars = re.compile(rf"\\({regex})")
+    s = escaped_special_chars.sub(r"\1", s)
+    return special_chars.sub(r"\\\1", s)
+
+
+def make_values(n: int, dirty: bool) -> list[str]:
+    """生成测试数据，dirty 为 True 时每个值都包含需要转义的字符."""
+    rng = random.Random(42)
+    alphabet = string.ascii_lowercase + string.digits
+    values = []
+    for i in range(n):
+        base = "".join(rng.choice(alphabet) for _ in range(12))
+        values.append(f"web-{base}:{i}/a b" if dirty else f"web{base}{i}")
+    return values
+
+
+def bench(label: str, func) -> None:
+    """运行基准并输出每个值的平均耗时（纳秒）."""
+    best = min(timeit.repeat(func, number=1, repeat=REPEAT))
+    print(f"{label:<40} {best * 1e9 / N_VALUES:>10.1f} ns/value")
+
+
+def main() -> None:
+    for dirty in (False, True):
+        values = make_values(N_VALUES, dirty)
+        kind = "dirty" if dirty else "clean"
+        bench(f"{kind}: legacy (loop)", lambda: [legacy_escape(v) for v in values])
+        bench(
+            f"{kind}: escape_query_string (loop)",
+            lambda: [escape_query_string(v) for v in values],
+        )
+        bench(
+            f"{kind}: escape_query_string(many=True)",
+            lambda: escape_query_string(values, many=True),
+        )
+        bench(f"{kind}: escape_query_strings", lambda: escape_query_strings(values))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Query String 快速转换基准测试
+
+关闭结果缓存，对比 luqum 解析与快速转换处理常见查询的吞吐量。
+
+运行方式:
+    python benchmarks/bench_fast_path.py
+"""
+
+import time
+
+from elasticsearch_toolkit import QueryStringTransformer
+
+N_CALLS = 2000
+QUERIES = {
+    "single field": "级别: 致命",
+    "and/or": "级别: 致命 AND 状态: ABNORMAL AND (message: timeout OR 预警)",
+    "range/not": 'duration: [100 TO 500} AND NOT host: "web-01" AND 状态: ABNORMAL',
+}
+FIELD_MAPPING = {"级别": "severity", "状态": "status"}
+VALUE_TRANSLATIONS = {"severity": [("1", "致命"), ("2", "预警"), ("3", "提醒")]}
+
+
+def run(transformer: QueryStringTransformer, query: str) -> tuple[float, str]:
+    start = time.perf_counter()
+    for _ in range(N_CALLS):
+        result = transformer.transform(query)
+    return N_CALLS / (time.perf_counter() - start), result
+
+
+def main() -> None:
+    luqum = QueryStringTransformer(
+        FIELD_MAPPING, VALUE_TRANSLATIONS, cache_size=0, fast_path=False
+    )
+    fast = QueryStringTransformer(FIELD_MAPPING, VALUE_TRANSLATIONS, cache_size=0)
+    print(f"{N_CALLS} uncached transforms per query")
+    print(f"{'query':<13} {'luqum':>12} {'fast path':>12} {'speedup':>8}")
+    for name, query in QUERIES.items():
+        luqum_rate, luqum_result = run(luqum, query)
+        fast_rate, fast_result = run(fast, query)
+        assert luqum_result == fast_result
+        print(
+            f"{name:<13} {luqum_rate:>8.0f} q/s {fast_rate:>8.0f} q/s "
+            f"{fast_rate / luqum_rate:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Q 对象内存占用基准测试
+
+使用 tracemalloc 统计常驻的 Q 对象、ConditionItem、QueryField 每个条件占用的字节数。
+
+运行方式:
+    python benchmarks/bench_memory.py
+"""
+
+import functools
+import gc
+import operator
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from elasticsearch_toolkit import ConditionItem, Q, QueryField
+
+N = 100_000
+
+# 预先创建值，避免把字符串本身的内存计入结果
+HOSTS = [f"web-{i:06d}" for i in range(N)]
+
+
+def measure(label: str, factory: Callable[[], Any], conditions: int) -> None:
+    """统计 factory 创建的对象常驻内存，输出每个条件的平均字节数."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = factory()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:<40} {(after - before) / conditions:>10.1f} bytes/condition")
+    del obj
+
+
+def rule_set() -> list[Q]:
+    """模拟常驻的规则集合：每条规则 = 单条件 Q 及其组合、取反."""
+    rules = []
+    for i in range(0, N, 4):
+        a, b, c, d = (Q(host=h) for h in HOSTS[i : i + 4])
+        rules.append((a | b) & ~(c | d))
+    return rules
+
+
+def combined_rule() -> Q:
+    """reduce 组合得到的单个大规则，构建一次以展开子节点."""
+    q = functools.reduce(operator.or_, [Q(host=h) for h in HOSTS])
+    q.build()
+    return q
+
+
+def main() -> None:
+    measure("Q leaf (Q(host=...))", lambda: [Q(host=h) for h in HOSTS], N)
+    measure("reduce(or_) over Q leaves", combined_rule, N)
+    measure("rule set ((a | b) & ~(c | d))", rule_set, N)
+    measure(
+        "ConditionItem",
+        lambda: [ConditionItem(key="host", method="eq", value=h) for h in HOSTS],
+        N,
+    )
+    measure(
+        "QueryField",
+        lambda: [QueryField(field=h, es_field=h) for h in HOSTS],
+        N,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+多线程解析吞吐量基准测试
+
+对比以全局锁保护 luqum 单例解析器与每个线程独立解析器（QueryStringParser）在不同线程数下的
+吞吐量。受 GIL 限制，纯 Python 解析的吞吐量不会随线程数线性增长，
+独立解析器省去了锁的争用，并使 gunicorn 线程工作进程可以安全地并发转换。
+
+运行方式:
+    python benchmarks/bench_parser_threads.py
+"""
+
+import threading
+import time
+
+from luqum.parser import lexer, parser
+
+from elasticsearch_toolkit.transformers import QueryStringParser
+
+N_PER_THREAD = 2000
+QUERY = 'severity: 1 AND (host: web~1 OR NOT message: "disk full") AND code: [1 TO *]'
+
+
+def run(parse, n_threads: int) -> float:
+    def work() -> None:
+        for _ in range(N_PER_THREAD):
+            parse(QUERY)
+
+    threads = [threading.Thread(target=work) for _ in range(n_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return n_threads * N_PER_THREAD / (time.perf_counter() - start)
+
+
+def main() -> None:
+    lock = threading.Lock()
+
+    def locked_parse(query: str):
+        with lock:
+            return parser.parse(query, lexer=lexer)
+
+    query_parser = QueryStringParser()
+    print(f"{N_PER_THREAD} parses per thread")
+    print(f"{'threads':>7} {'global lock':>14} {'per-thread':>14}")
+    for n_threads in (1, 2, 4, 8, 16):
+        locked = run(locked_parse, n_threads)
+        pooled = run(query_parser.parse, n_threads)
+        print(f"{n_threads:>7} {locked:>10.0f} q/s {pooled:>10.0f} q/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+预编译 Q 模板基准测试
+
+对比每次请求重新构造 Q 对象并 build() 与使用 PreparedQ.bind() 的单次耗时。
+
+运行方式:
+    python benchmarks/bench_prepared.py
+"""
+
+import timeit
+
+from elasticsearch_toolkit import Param, Q
+
+NUMBER = 20_000
+
+
+def build_each_time(service: str, level: int, message: str) -> str:
+    return (
+        Q(service=service) & Q(level__gte=level) & Q(message__contains=message)
+    ).build()
+
+
+def main() -> None:
+    template = (
+        Q(service=Param("service"))
+        & Q(level__gte=Param("level"))
+        & Q(message__contains=Param("message"))
+    ).prepare()
+    values = {"service": "api-gateway", "level": 3, "message": "upstream timeout"}
+    assert template.bind(**values) == build_each_time(**values)
+
+    for label, func in (
+        ("Q(...).build()", lambda: build_each_time(**values)),
+        ("PreparedQ.bind()", lambda: template.bind(**values)),
+    ):
+        best = min(timeit.repeat(func, number=NUMBER, repeat=5))
+        print(f"{label:<20} {best * 1e6 / NUMBER:>8.2f} us/query")
+
+
+if __name__ == "__main__":
+    main()
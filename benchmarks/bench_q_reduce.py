@@ -0,0 +1,39 @@
+"""
+Q 对象大规模组合基准测试
+
+使用 functools.reduce(operator.or_, ...) 组合 1k / 10k / 100k 个条件，
+分别统计组合耗时与 build() 耗时。
+
+运行方式:
+    python benchmarks/bench_q_reduce.py
+"""
+
+import functools
+import operator
+import time
+
+from elasticsearch_toolkit import Q
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def main() -> None:
+    print(f"{'terms':>8} {'combine (ms)':>14} {'build (ms)':>12} {'length':>12}")
+    for size in SIZES:
+        qs = [Q(host=f"web-{i:06d}") for i in range(size)]
+
+        start = time.perf_counter()
+        combined = functools.reduce(operator.or_, qs)
+        combine_ms = (time.perf_counter() - start) * 1e3
+
+        start = time.perf_counter()
+        query_string = combined.build()
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        print(
+            f"{size:>8} {combine_ms:>14.1f} {build_ms:>12.1f} {len(query_string):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
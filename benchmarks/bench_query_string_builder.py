@@ -0,0 +1,104 @@
+"""
+QueryStringBuilder 基准测试
+
+对比优化前（build() 时逐个条件查模板、判断操作符并 str.format）与预先解析渲染函数的
+build() 耗时，场景为 100 个条件 × 每个条件 100 个值；以及从公共基础构建器 fork()
+后再添加两个条件并构建（请求级构建器）的耗时。
+
+运行方式:
+    python benchmarks/bench_query_string_builder.py
+"""
+
+import timeit
+
+from elasticsearch_toolkit import QueryStringBuilder, QueryStringOperator
+from elasticsearch_toolkit.core.operators import GroupRelation, LogicOperator
+from elasticsearch_toolkit.core.utils import escape_query_strings
+
+N_FILTERS = 100
+N_VALUES = 100
+NUMBER = 20
+
+OPERATORS = (
+    QueryStringOperator.EQUAL,
+    QueryStringOperator.INCLUDE,
+    QueryStringOperator.GTE,
+    QueryStringOperator.NOT_EQUAL,
+    QueryStringOperator.REG,
+)
+
+
+def legacy_build(builder: QueryStringBuilder) -> str:
+    """优化前的实现：每次 build() 都重新查模板并按操作符分支处理每个值，作为对照."""
+    parts = []
+    for f in builder._filters:
+        operator, field, values = f["operator"], f["field"], f["values"]
+        template = builder.OPERATOR_TEMPLATES[operator]
+        if operator in (QueryStringOperator.INCLUDE, QueryStringOperator.NOT_INCLUDE):
+            stripped = [s for s in (str(v).strip("*") for v in values) if s != ""]
+            processed = [f"*{e}*" for e in escape_query_strings(stripped)]
+        elif operator in (QueryStringOperator.EQUAL, QueryStringOperator.NOT_EQUAL):
+            processed = ['"' + str(v).replace('"', '\\"') + '"' for v in values]
+        elif operator in (QueryStringOperator.REG, QueryStringOperator.NREG):
+            processed = [str(v) for v in values]
+        else:
+            processed = escape_query_strings([str(v) for v in values])
+        if operator in (
+            QueryStringOperator.GT,
+            QueryStringOperator.LT,
+            QueryStringOperator.GTE,
+            QueryStringOperator.LTE,
+        ):
+            parts.append(template.format(field=field, value=processed[0]))
+            continue
+        logic = (
+            LogicOperator.OR.value
+            if f["group_relation"] == GroupRelation.OR
+            else LogicOperator.AND.value
+        )
+        value_str = f" {logic} ".join(str(v) for v in processed)
+        if len(processed) > 1:
+            value_str = f"({value_str})"
+        parts.append(template.format(field=field, value=value_str))
+    return f" {builder._logic_operator.value} ".join(parts)
+
+
+def make_builder() -> QueryStringBuilder:
+    builder = QueryStringBuilder()
+    for i in range(N_FILTERS):
+        builder.add_filter(
+            f"field_{i}",
+            OPERATORS[i % len(OPERATORS)],
+            [f"value-{i}-{j}" for j in range(N_VALUES)],
+        )
+    return builder
+
+
+def per_request(base: QueryStringBuilder) -> str:
+    """请求级构建器：在基础条件上添加两个条件后构建."""
+    builder = base.fork()
+    builder.add_filter("host", QueryStringOperator.EQUAL, ["web-01"])
+    builder.add_filter("level", QueryStringOperator.GTE, [3])
+    return builder.build()
+
+
+def main() -> None:
+    builder = make_builder()
+    assert legacy_build(builder) == builder.build()
+
+    base = make_builder()
+    base.build()
+
+    print(f"{N_FILTERS} filters x {N_VALUES} values")
+    for label, func in (
+        ("legacy build()", lambda: legacy_build(builder)),
+        ("add_filter x100 + build()", lambda: make_builder().build()),
+        ("cached build()", builder.build),
+        ("fork() + 2 filters + build()", lambda: per_request(base)),
+    ):
+        best = min(timeit.repeat(func, number=NUMBER, repeat=5))
+        print(f"{label:<30} {best * 1e3 / NUMBER:>8.2f} ms/build")
+
+
+if __name__ == "__main__":
+    main()
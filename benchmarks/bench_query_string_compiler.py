@@ -0,0 +1,81 @@
+"""
+Query String DSL 编译基准测试
+
+ES 端的收益（分片不再解析 query_string、filter 缓存）需要真实集群才能测量，这里测量客户端的开销:
+对比以 query_string 发送与编译为原生 DSL 时 DslQueryBuilder.build_body() 的耗时，
+以及编译器不缓存、缓存命中时 compile_body() 的单次耗时，并统计完全编译为原生查询的比例。
+
+运行方式:
+    python benchmarks/bench_query_string_compiler.py
+"""
+
+import time
+
+from elasticsearch.dsl import Search
+
+from elasticsearch_toolkit import (
+    DslQueryBuilder,
+    QueryStringDslCompiler,
+    QueryStringTransformer,
+)
+
+N_CALLS = 2000
+QUERIES = [
+    f"级别: 致命 AND 状态: ABNORMAL AND host: web-{i:02d} AND (status: a OR status: b)"
+    for i in range(50)
+] + [
+    "级别: 致命 AND message: timeout",
+    "级别: [致命 TO 提醒] AND NOT host: db*",
+    "预警",
+]
+FIELD_MAPPING = {"级别": "severity", "状态": "status"}
+VALUE_TRANSLATIONS = {"severity": [("1", "致命"), ("2", "预警"), ("3", "提醒")]}
+
+
+def run_builder(builder: DslQueryBuilder) -> float:
+    start = time.perf_counter()
+    for i in range(N_CALLS):
+        builder.query_string(QUERIES[i % len(QUERIES)]).build_body()
+    return (time.perf_counter() - start) / N_CALLS
+
+
+def run_compiler(compiler: QueryStringDslCompiler, queries: list[str]) -> float:
+    start = time.perf_counter()
+    for i in range(N_CALLS):
+        compiler.compile_body(queries[i % len(queries)])
+    return (time.perf_counter() - start) / N_CALLS
+
+
+def main() -> None:
+    transformer = QueryStringTransformer(FIELD_MAPPING, VALUE_TRANSLATIONS)
+    transformed = [transformer.transform(query) for query in QUERIES]
+
+    def make_builder(compiler: QueryStringDslCompiler | None) -> DslQueryBuilder:
+        return DslQueryBuilder(
+            search_factory=lambda: Search(index="alerts"),
+            query_string_transformer=transformer.transform,
+            query_string_compiler=compiler,
+        ).ordering(["-create_time"])
+
+    compiler = QueryStringDslCompiler(text_fields={"message"})
+    native = sum(
+        "query_string" not in str(compiler.compile(query).to_dict())
+        for query in transformed
+    )
+    print(f"{native}/{len(transformed)} queries compiled without query_string")
+
+    print(f"{N_CALLS} calls over {len(QUERIES)} distinct queries")
+    cases = {
+        "build_body query_string": run_builder(make_builder(None)),
+        "build_body compiled": run_builder(make_builder(compiler)),
+        "compile uncached": run_compiler(
+            QueryStringDslCompiler(text_fields={"message"}, cache_size=0), transformed
+        ),
+        "compile cached": run_compiler(compiler, transformed),
+    }
+    for name, elapsed in cases.items():
+        print(f"{name:<24} {elapsed * 1e6:>8.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
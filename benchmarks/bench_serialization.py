@@ -0,0 +1,70 @@
+"""
+Q 对象序列化基准测试
+
+对比 pickle 与紧凑二进制格式（serialization.dumps_many/loads_many）、JSON 格式
+在 100k 条规则下的体积和编解码耗时。
+
+运行方式:
+    python benchmarks/bench_serialization.py
+"""
+
+import pickle
+import time
+
+from elasticsearch_toolkit import Q
+from elasticsearch_toolkit.core import serialization
+
+RULES = 100_000
+
+
+def make_rules() -> list[Q]:
+    """构造结构相近、值不同的规则集合."""
+    return [
+        (Q(service=f"svc-{i % 500}") | Q(app__contains=f"app-{i % 50}"))
+        & Q(level__gte=i % 5)
+        & ~Q(message__regex=f"ignore-{i}")
+        for i in range(RULES)
+    ]
+
+
+def best_of(func, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    rules = make_rules()
+
+    formats = (
+        (
+            "pickle",
+            lambda: pickle.dumps(rules, protocol=pickle.HIGHEST_PROTOCOL),
+            pickle.loads,
+        ),
+        ("Q binary", lambda: serialization.dumps_many(rules), serialization.loads_many),
+        (
+            "Q json",
+            lambda: [rule.to_json() for rule in rules],
+            lambda data: [Q.from_json(item) for item in data],
+        ),
+    )
+
+    print(f"{RULES} rules")
+    print(f"{'format':<10} {'size (KB)':>10} {'dumps (ms)':>11} {'loads (ms)':>11}")
+    for label, dump, load in formats:
+        data = dump()
+        size = len(data) if isinstance(data, bytes) else sum(len(d) for d in data)
+        restored = load(data)
+        assert restored[-1].build() == rules[-1].build()
+        print(
+            f"{label:<10} {size / 1024:>10.0f} "
+            f"{best_of(dump) * 1e3:>11.1f} {best_of(lambda: load(data)) * 1e3:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+请求合并基准测试
+
+模拟故障期间 200 个用户同时打开同一个仪表盘：200 个线程执行相同的查询，
+客户端每次请求等待 20ms 且最多同时处理 16 个请求，对比不合并与使用 SingleFlight
+时发送到 ES 的请求数与总耗时。
+
+运行方式:
+    python benchmarks/bench_single_flight.py
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from elastic_transport import ApiResponseMeta, HttpHeaders, ObjectApiResponse
+from elasticsearch.dsl import Search
+
+from elasticsearch_toolkit import DslQueryBuilder, SingleFlight
+
+N_USERS = 200
+LATENCY = 0.02
+CLUSTER_CONCURRENCY = 16
+
+
+class LatencyClient:
+    """每次请求等待固定延迟、并发数受限的客户端."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(CLUSTER_CONCURRENCY)
+        self.requests = 0
+
+    def search(self, index=None, body=None, **kwargs):
+        with self.lock:
+            self.requests += 1
+        with self.slots:
+            time.sleep(LATENCY)
+        meta = ApiResponseMeta(
+            status=200,
+            http_version="1.1",
+            headers=HttpHeaders(),
+            duration=LATENCY,
+            node=None,
+        )
+        body = {"hits": {"total": {"value": 1, "relation": "eq"}, "hits": []}}
+        return ObjectApiResponse(body=body, meta=meta)
+
+
+def make_builder() -> DslQueryBuilder:
+    builder = DslQueryBuilder(search_factory=lambda: Search(index="alerts"))
+    builder.conditions(
+        [
+            {"key": "status", "method": "eq", "value": ["ABNORMAL"]},
+            {"key": "severity", "method": "lte", "value": [2]},
+        ]
+    )
+    return builder.ordering(["-create_time"])
+
+
+def run(single_flight: SingleFlight | None) -> tuple[float, int]:
+    client = LatencyClient()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=N_USERS) as executor:
+        futures = [
+            executor.submit(
+                make_builder().execute, using=client, single_flight=single_flight
+            )
+            for _ in range(N_USERS)
+        ]
+        for future in futures:
+            future.result()
+    return time.perf_counter() - start, client.requests
+
+
+def main() -> None:
+    print(f"{N_USERS} identical searches, {LATENCY * 1e3:.0f}ms per request")
+    elapsed, requests = run(None)
+    print(f"{'no coalescing':<14} {elapsed * 1e3:>7.0f} ms {requests:>5} requests")
+
+    flight = SingleFlight()
+    elapsed, requests = run(flight)
+    print(
+        f"{'single-flight':<14} {elapsed * 1e3:>7.0f} ms {requests:>5} requests"
+        f"  fan-in {flight.stats.fan_in_ratio:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
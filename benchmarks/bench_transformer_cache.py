@@ -0,0 +1,51 @@
+"""
+QueryStringTransformer 缓存基准测试
+
+模拟用户反复提交已保存查询与最近查询：从 50 个不同的查询中按顺序循环取 5000 次，
+对比不缓存、转换结果缓存、只共享语法树缓存三种情况的耗时。
+
+运行方式:
+    python benchmarks/bench_transformer_cache.py
+"""
+
+import time
+
+from elasticsearch_toolkit import QueryStringTransformer
+from elasticsearch_toolkit.transformers import ParseCache
+
+N_CALLS = 5000
+QUERIES = [
+    f"级别: 致命 AND 状态: ABNORMAL AND host: web-{i:02d} AND (message: timeout OR 预警)"
+    for i in range(50)
+]
+FIELD_MAPPING = {"级别": "severity", "状态": "status"}
+VALUE_TRANSLATIONS = {"severity": [("1", "致命"), ("2", "预警"), ("3", "提醒")]}
+
+
+def run(transformer: QueryStringTransformer) -> float:
+    start = time.perf_counter()
+    for i in range(N_CALLS):
+        transformer.transform(QUERIES[i % len(QUERIES)])
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    cases = {
+        "uncached": QueryStringTransformer(
+            FIELD_MAPPING, VALUE_TRANSLATIONS, cache_size=0
+        ),
+        "result cache": QueryStringTransformer(FIELD_MAPPING, VALUE_TRANSLATIONS),
+        "parse cache": QueryStringTransformer(
+            FIELD_MAPPING, VALUE_TRANSLATIONS, cache_size=0, parse_cache=ParseCache()
+        ),
+    }
+    print(f"{N_CALLS} transforms over {len(QUERIES)} distinct queries")
+    for name, transformer in cases.items():
+        elapsed = run(transformer)
+        print(
+            f"{name:<13} {elapsed * 1e3:>8.1f} ms {elapsed / N_CALLS * 1e6:>8.1f} us/call"
+        )
+
+
+if __name__ == "__main__":
+    main()
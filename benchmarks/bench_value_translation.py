@@ -0,0 +1,89 @@
+"""
+值翻译查找基准测试
+
+翻译表有 10 个字段，每个字段的枚举值从 10 增长到 50000，转换包含 5 个指定字段的词和
+5 个未指定字段的词的查询（关闭结果缓存），对比按顺序扫描翻译表与哈希索引的耗时。
+
+运行方式:
+    python benchmarks/bench_value_translation.py
+"""
+
+import time
+from typing import Any
+
+from luqum.tree import FieldGroup, OrOperation, SearchField, Word
+
+from elasticsearch_toolkit import QueryStringTransformer
+from elasticsearch_toolkit.transformers.query_string import _LuqumTreeTransformer
+
+N_FIELDS = 10
+N_CALLS = 20
+QUERY = (
+    "f0: 值1 AND f1: 值2 AND f2: 未知 AND f3: 值3 AND f4: 值4 "
+    "AND 值5 AND 值6 AND 未知 AND timeout AND 值9"
+)
+
+
+class LinearTreeTransformer(_LuqumTreeTransformer):
+    """按顺序扫描翻译表的实现，作为对比."""
+
+    def visit_word(self, node: Word, context: dict) -> Any:
+        if context.get("ignore_word"):
+            yield from self.generic_visit(node, context)
+            return
+        search_field_name = context.get("search_field_name")
+        if search_field_name and search_field_name in self._value_translations:
+            for actual_value, display_value in self._value_translations[
+                search_field_name
+            ]:
+                if display_value == node.value:
+                    node = node.clone_item(value=str(actual_value))
+                    break
+        elif not search_field_name:
+            for field, translations in self._value_translations.items():
+                for actual_value, display_value in translations:
+                    if display_value == node.value:
+                        node = FieldGroup(
+                            OrOperation(
+                                node, SearchField(field, Word(str(actual_value)))
+                            )
+                        )
+                        context = {"ignore_search_field": True, "ignore_word": True}
+                        break
+                else:
+                    continue
+                break
+            else:
+                node = node.clone_item(value=f'"{node.value}"')
+        yield from self.generic_visit(node, context)
+
+
+def run(transformer: QueryStringTransformer) -> tuple[float, str]:
+    start = time.perf_counter()
+    for _ in range(N_CALLS):
+        result = transformer.transform(QUERY)
+    return (time.perf_counter() - start) / N_CALLS, result
+
+
+def main() -> None:
+    print(f"{N_FIELDS} fields, query with 10 words, mean of {N_CALLS} transforms")
+    print(f"{'enum size':>9} {'linear':>12} {'indexed':>12}")
+    for size in (10, 1000, 10000, 50000):
+        # 大部分显示值排在翻译表末尾，模拟最坏情况
+        translations = {
+            f"f{i}": [(str(v), f"值{v}") for v in range(size - 1, -1, -1)]
+            for i in range(N_FIELDS)
+        }
+        indexed = QueryStringTransformer(value_translations=translations, cache_size=0)
+        linear = QueryStringTransformer(value_translations=translations, cache_size=0)
+        linear._tree_transformer = LinearTreeTransformer({}, {})
+        linear._tree_transformer._value_translations = translations
+
+        linear_time, linear_result = run(linear)
+        indexed_time, indexed_result = run(indexed)
+        assert linear_result == indexed_result
+        print(f"{size:>9} {linear_time * 1e3:>9.2f} ms {indexed_time * 1e3:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
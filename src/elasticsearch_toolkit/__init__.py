@@ -18,20 +18,39 @@
 __version__ = "0.3.0"
 
 # 导出构建器
-from elasticsearch_toolkit.builders import DslQueryBuilder, QueryStringBuilder
+from elasticsearch_toolkit.builders import (
+    AsyncDslQueryBuilder,
+    AsyncSingleFlight,
+    CursorPage,
+    DslQueryBuilder,
+    LargeValueQueryPlanner,
+    LargeValueReport,
+    LargeValueStrategy,
+    MultiSearchBatch,
+    QueryStringBuilder,
+    SearchResultCache,
+    SingleFlight,
+    SlicedExporter,
+)
 
 # 导出核心组件
 from elasticsearch_toolkit.core import (
+    ConditionCompiler,
     ConditionItem,
     ConditionParser,
+    ConditionPlan,
     DefaultConditionParser,
     FieldMapper,
     GroupRelation,
     LogicOperator,
+    Param,
+    PreparedQ,
     Q,
+    QDslCompiler,
     QueryField,
     QueryStringOperator,
     escape_query_string,
+    escape_query_strings,
 )
 
 # 导出异常
@@ -43,7 +62,10 @@ from elasticsearch_toolkit.exceptions import (
 )
 
 # 导出转换器
-from elasticsearch_toolkit.transformers import QueryStringTransformer
+from elasticsearch_toolkit.transformers import (
+    QueryStringDslCompiler,
+    QueryStringTransformer,
+)
 
 __all__ = [
     # 版本
@@ -51,6 +73,16 @@ __all__ = [
     # 构建器
     "QueryStringBuilder",
     "DslQueryBuilder",
+    "AsyncDslQueryBuilder",
+    "CursorPage",
+    "MultiSearchBatch",
+    "SlicedExporter",
+    "SearchResultCache",
+    "SingleFlight",
+    "AsyncSingleFlight",
+    "LargeValueQueryPlanner",
+    "LargeValueReport",
+    "LargeValueStrategy",
     # 操作符和枚举
     "QueryStringOperator",
     "LogicOperator",
@@ -59,10 +91,16 @@ __all__ = [
     "QueryField",
     "FieldMapper",
     "ConditionItem",
+    "ConditionCompiler",
     "ConditionParser",
+    "ConditionPlan",
     "DefaultConditionParser",
     "Q",
+    "QDslCompiler",
+    "Param",
+    "PreparedQ",
     "escape_query_string",
+    "escape_query_strings",
     # 异常
     "EsQueryToolkitError",
     "QueryStringParseError",
@@ -70,4 +108,5 @@ __all__ = [
     "UnsupportedOperatorError",
     # 转换器
     "QueryStringTransformer",
+    "QueryStringDslCompiler",
 ]
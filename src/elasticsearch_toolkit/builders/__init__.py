@@ -1,9 +1,58 @@
 """构建器模块导出."""
 
+from elasticsearch_toolkit.builders.async_dsl import AsyncDslQueryBuilder
+from elasticsearch_toolkit.builders.batch import BatchItemResult, MultiSearchBatch
+from elasticsearch_toolkit.builders.cache import (
+    CacheBackend,
+    CacheStats,
+    InMemoryCacheBackend,
+    RedisCacheBackend,
+    RelativeTimePolicy,
+    SearchResultCache,
+)
+from elasticsearch_toolkit.builders.coalesce import (
+    AsyncSingleFlight,
+    SingleFlight,
+    SingleFlightStats,
+)
+from elasticsearch_toolkit.builders.cursor import CursorPage
 from elasticsearch_toolkit.builders.dsl import DslQueryBuilder
+from elasticsearch_toolkit.builders.export import (
+    ExportMode,
+    ExportStats,
+    SlicedExporter,
+)
+from elasticsearch_toolkit.builders.large_values import (
+    LargeValuePlan,
+    LargeValueQueryPlanner,
+    LargeValueReport,
+    LargeValueResult,
+    LargeValueStrategy,
+)
 from elasticsearch_toolkit.builders.query_string import QueryStringBuilder
 
 __all__ = [
     "QueryStringBuilder",
     "DslQueryBuilder",
+    "AsyncDslQueryBuilder",
+    "CursorPage",
+    "MultiSearchBatch",
+    "BatchItemResult",
+    "SlicedExporter",
+    "ExportMode",
+    "ExportStats",
+    "SearchResultCache",
+    "CacheBackend",
+    "InMemoryCacheBackend",
+    "RedisCacheBackend",
+    "CacheStats",
+    "RelativeTimePolicy",
+    "SingleFlight",
+    "AsyncSingleFlight",
+    "SingleFlightStats",
+    "LargeValueQueryPlanner",
+    "LargeValuePlan",
+    "LargeValueReport",
+    "LargeValueResult",
+    "LargeValueStrategy",
 ]
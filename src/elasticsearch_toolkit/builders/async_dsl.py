@@ -0,0 +1,258 @@
+"""异步 DSL 查询构建器模块."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import copy
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+from elasticsearch.dsl import AsyncSearch
+from elasticsearch.dsl.async_connections import get_connection
+from elasticsearch.dsl.response import Response
+
+from elasticsearch_toolkit.builders.cache import SearchResultCache
+from elasticsearch_toolkit.builders.coalesce import AsyncSingleFlight, flight_key
+from elasticsearch_toolkit.builders.cursor import DEFAULT_KEEP_ALIVE, CursorPage
+from elasticsearch_toolkit.builders.dsl import DslQueryBuilder
+from elasticsearch_toolkit.core.conditions import ConditionParser
+from elasticsearch_toolkit.core.fields import FieldMapper
+from elasticsearch_toolkit.transformers.dsl_compiler import QueryStringDslCompiler
+
+
+class AsyncDslQueryBuilder(DslQueryBuilder):
+    """
+    异步 ES DSL 查询构建器.
+
+    条件编译、Query String 转换、排序、分页、聚合与 DslQueryBuilder 完全相同，
+    build() 返回 AsyncSearch，并提供 execute/count/iterate/execute_page 协程。
+    所有请求都在信号量限制内执行，多个构建器共享同一个信号量即可限制服务整体的并发数。
+
+    使用示例:
+        limit = asyncio.Semaphore(20)
+
+        builder = AsyncDslQueryBuilder(
+            search_factory=lambda: AsyncSearch(index="alerts"),
+            semaphore=limit,
+        )
+        response = await builder.conditions(conditions).execute()
+        total = await builder.count()
+
+        async for hit in builder.iterate(batch_size=1000):
+            ...
+    """
+
+    def __init__(
+        self,
+        search_factory: Callable[[], AsyncSearch],
+        field_mapper: FieldMapper | None = None,
+        condition_parser: ConditionParser | None = None,
+        query_string_transformer: Callable[[str], str] | None = None,
+        query_string_compiler: QueryStringDslCompiler | None = None,
+        semaphore: asyncio.Semaphore | int | None = None,
+    ):
+        """
+        初始化构建器.
+
+        Args:
+            search_factory: AsyncSearch 对象工厂函数
+            field_mapper: 字段映射器
+            condition_parser: 条件解析器
+            query_string_transformer: Query String 转换函数
+            query_string_compiler: Query String DSL 编译器
+            semaphore: 并发限制，可以是共享的信号量或最大并发数，None 表示不限制
+
+        Raises:
+            ValueError: 当最大并发数小于 1 时
+        """
+        super().__init__(
+            search_factory,
+            field_mapper=field_mapper,
+            condition_parser=condition_parser,
+            query_string_transformer=query_string_transformer,
+            query_string_compiler=query_string_compiler,
+        )
+        if isinstance(semaphore, int):
+            if semaphore < 1:
+                raise ValueError(f"semaphore must be >= 1, got {semaphore}")
+            semaphore = asyncio.Semaphore(semaphore)
+        self._semaphore = semaphore
+
+    def _limit(self) -> Any:
+        """返回限制并发的异步上下文管理器."""
+        if self._semaphore is None:
+            return contextlib.nullcontext()
+        return self._semaphore
+
+    def _client(self, using: Any, base: AsyncSearch | None = None) -> Any:
+        """获取异步客户端."""
+        if using is None:
+            using = (base or self._search_factory())._using
+        return get_connection(using)
+
+    async def execute(
+        self,
+        using: Any = None,
+        cache: SearchResultCache | None = None,
+        single_flight: AsyncSingleFlight | None = None,
+    ) -> Any:
+        """
+        执行查询.
+
+        Args:
+            using: ES 连接别名或客户端，默认使用 AsyncSearch 对象自身的设置
+            cache: 查询结果缓存，命中时不发送请求也不占用信号量
+            single_flight: 请求合并，相同的请求正在执行时等待其响应，不占用信号量
+
+        Returns:
+            elasticsearch.dsl Response 对象
+        """
+        if cache is None and single_flight is None:
+            search = self.build()
+            if using is not None:
+                search = search.using(using)
+            async with self._limit():
+                return await search.execute()
+
+        base = self._search_factory()
+        if using is None:
+            using = base._using
+        body = self.build_body()
+        cached, raw = (None, None)
+        if cache is not None:
+            cached, raw = cache._lookup(base._index, body, base._params, using)
+
+        if raw is None:
+            client = self._client(using, base)
+
+            async def fetch() -> dict[str, Any]:
+                async with self._limit():
+                    response = await client.search(
+                        index=base._index, body=body, **base._params
+                    )
+                result = getattr(response, "body", response)
+                if cached is not None:
+                    cache.set(cached[0], result, cached[1])
+                return result
+
+            if single_flight is None:
+                raw = await fetch()
+            else:
+                key = flight_key(client, base._index, body, base._params)
+                # 合并的调用者共享同一个响应字典，每个调用者使用各自的副本
+                raw = copy.deepcopy(await single_flight.do(key, fetch))
+        return Response(self._result_search(base), raw)
+
+    async def count(self, using: Any = None) -> int:
+        """
+        统计匹配的文档数.
+
+        Args:
+            using: ES 连接别名或客户端
+
+        Returns:
+            文档数
+        """
+        search = self.build()
+        if using is not None:
+            search = search.using(using)
+        async with self._limit():
+            return await search.count()
+
+    async def execute_page(self, using: Any = None) -> CursorPage:
+        """
+        执行游标分页查询，与 DslQueryBuilder.execute_page() 相同.
+
+        Args:
+            using: ES 连接别名或客户端
+
+        Returns:
+            CursorPage 对象
+
+        Raises:
+            ValueError: 当未设置游标分页或游标与查询不匹配时
+        """
+        state = self._require_cursor()
+        base = self._search_factory()
+        client = self._client(using, base)
+        async with self._limit():
+            if state.pit_id is None:
+                opened = await client.open_point_in_time(
+                    index=base._index, keep_alive=state.keep_alive
+                )
+                self._start_cursor(opened["id"])
+
+            fingerprint = self._cursor_fingerprint()
+            response = await self.build().using(client).execute()
+            page, exhausted_pit_id = self._advance_cursor(response, fingerprint)
+            if exhausted_pit_id is not None:
+                await client.close_point_in_time(id=exhausted_pit_id)
+        return page
+
+    async def iterate(
+        self,
+        batch_size: int = 1000,
+        keep_alive: str = DEFAULT_KEEP_ALIVE,
+        using: Any = None,
+    ) -> AsyncIterator[Any]:
+        """
+        使用 PIT + search_after 遍历所有匹配的文档.
+
+        不修改当前构建器的分页设置；每一批请求都单独占用信号量，
+        提前结束遍历时关闭 PIT。
+
+        Args:
+            batch_size: 每次请求返回的命中数
+            keep_alive: PIT 保持时间
+            using: ES 连接别名或客户端
+
+        Yields:
+            命中
+        """
+        builder = copy.copy(self)
+        builder.cursor_pagination(page_size=batch_size, keep_alive=keep_alive)
+        client = self._client(using)
+        try:
+            while True:
+                page = await builder.execute_page(client)
+                for hit in page.hits:
+                    yield hit
+                if page.cursor is None:
+                    return
+        finally:
+            pit_id = builder._cursor.pit_id
+            if pit_id is not None:
+                await client.close_point_in_time(id=pit_id)
+
+    async def close_cursor(self, using: Any = None) -> AsyncDslQueryBuilder:
+        """
+        提前关闭当前游标对应的 PIT，与 DslQueryBuilder.close_cursor() 相同.
+
+        Args:
+            using: ES 连接别名或客户端
+
+        Returns:
+            self
+        """
+        state = self._cursor
+        if state is not None and state.pit_id is not None:
+            client = self._client(using)
+            async with self._limit():
+                await client.close_point_in_time(id=state.pit_id)
+            state.pit_id = state.search_after = state.fingerprint = None
+        return self
+
+    def export(self, *args: Any, **kwargs: Any) -> Any:
+        """
+        异步构建器不支持并行切片导出.
+
+        SlicedExporter 在线程池中使用同步客户端，请使用 iterate() 或同步的 DslQueryBuilder。
+
+        Raises:
+            TypeError: 总是抛出
+        """
+        raise TypeError(
+            "AsyncDslQueryBuilder does not support export(); "
+            "use iterate() or a synchronous DslQueryBuilder"
+        )
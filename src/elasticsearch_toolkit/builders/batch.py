@@ -0,0 +1,244 @@
+"""
+MultiSearch 批量查询模块
+
+仪表盘等页面通常同时发出几十个相互独立的查询，每个查询都要一次 HTTP 往返。
+MultiSearchBatch 收集多个 DslQueryBuilder（或请求体），按最大批次大小合并为一个或
+少数几个 _msearch 请求，多个批次并发发送，页面延迟从所有请求之和降为最慢的那一个。
+
+与 elasticsearch.dsl 的 MultiSearch 不同，单个查询失败不会影响其他查询，
+失败信息保存在对应的 BatchItemResult 中。
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from elasticsearch.dsl import Search
+from elasticsearch.dsl.connections import get_connection
+from elasticsearch.dsl.response import Response
+
+from elasticsearch_toolkit.builders.dsl import DslQueryBuilder
+
+# 默认每个 _msearch 请求包含的最大查询数
+DEFAULT_MAX_BATCH_SIZE = 50
+
+
+@dataclass(slots=True)
+class BatchItemResult:
+    """单个查询的结果."""
+
+    key: Any
+    response: Response | None = None
+    error: Any = None  # 响应中的 error 字典，或请求异常
+
+    @property
+    def ok(self) -> bool:
+        """查询是否成功."""
+        return self.error is None
+
+
+@dataclass(slots=True)
+class _BatchItem:
+    """待执行的查询."""
+
+    key: Any
+    header: dict[str, Any]
+    body: dict[str, Any]
+    builder: DslQueryBuilder | None
+    search: Search | None
+
+
+class MultiSearchBatch:
+    """
+    MultiSearch 批量查询.
+
+    使用示例:
+        batch = MultiSearchBatch(max_batch_size=20)
+        for panel in panels:
+            batch.add(panel.builder, key=panel.id)
+
+        for result in batch.execute():
+            if result.ok:
+                render(result.key, result.response)
+            else:
+                show_error(result.key, result.error)
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_concurrent_batches: int = 4,
+        using: Any = None,
+    ):
+        """
+        初始化批量查询.
+
+        Args:
+            max_batch_size: 每个 _msearch 请求包含的最大查询数
+            max_concurrent_batches: 同时发送的 _msearch 请求数
+            using: ES 连接别名或客户端，默认按各查询的 Search 对象的连接分组，
+                每个连接分别发送 _msearch 请求
+
+        Raises:
+            ValueError: 当参数小于 1 时
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+        if max_concurrent_batches < 1:
+            raise ValueError(
+                f"max_concurrent_batches must be >= 1, got {max_concurrent_batches}"
+            )
+        self._max_batch_size = max_batch_size
+        self._max_concurrent_batches = max_concurrent_batches
+        self._using = using
+        self._items: list[_BatchItem] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, builder: DslQueryBuilder, key: Any = None) -> MultiSearchBatch:
+        """
+        添加查询构建器.
+
+        Args:
+            builder: DSL 查询构建器
+            key: 结果中用于识别查询的键，默认为添加顺序
+
+        Returns:
+            self，支持链式调用
+        """
+        search = builder._search_factory()
+        body = builder.build_body()
+        self._items.append(
+            _BatchItem(
+                key=len(self._items) if key is None else key,
+                header=_header(search, body),
+                body=body,
+                builder=builder,
+                search=search,
+            )
+        )
+        return self
+
+    def add_body(
+        self,
+        body: dict[str, Any],
+        index: str | list[str] | None = None,
+        key: Any = None,
+    ) -> MultiSearchBatch:
+        """
+        添加请求体.
+
+        Args:
+            body: 请求体字典
+            index: 索引
+            key: 结果中用于识别查询的键，默认为添加顺序
+
+        Returns:
+            self，支持链式调用
+        """
+        search = Search(index=index)
+        self._items.append(
+            _BatchItem(
+                key=len(self._items) if key is None else key,
+                header=_header(search, body),
+                body=body,
+                builder=None,
+                search=search,
+            )
+        )
+        return self
+
+    def execute(self) -> list[BatchItemResult]:
+        """
+        执行所有查询.
+
+        Returns:
+            与添加顺序一致的结果列表
+        """
+        if not self._items:
+            return []
+
+        size = self._max_batch_size
+        batches = [
+            (client, items[start : start + size])
+            for client, items in self._client_groups()
+            for start in range(0, len(items), size)
+        ]
+
+        if len(batches) == 1:
+            return self._execute_batch(*batches[0])
+
+        workers = min(self._max_concurrent_batches, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            batch_results = list(
+                executor.map(lambda batch: self._execute_batch(*batch), batches)
+            )
+
+        # 按连接分组后批次中的查询顺序与添加顺序不同，按添加顺序重新排列
+        positions = {id(item): i for i, item in enumerate(self._items)}
+        results: list[BatchItemResult] = [None] * len(self._items)  # type: ignore[list-item]
+        for (_, items), item_results in zip(batches, batch_results, strict=True):
+            for item, result in zip(items, item_results, strict=True):
+                results[positions[id(item)]] = result
+        return results
+
+    def _client_groups(self) -> list[tuple[Any, list[_BatchItem]]]:
+        """按 ES 客户端分组，指定了 using 时所有查询使用同一个客户端."""
+        if self._using is not None:
+            return [(get_connection(self._using), self._items)]
+
+        groups: dict[int, tuple[Any, list[_BatchItem]]] = {}
+        for item in self._items:
+            client = get_connection(item.search._using)
+            groups.setdefault(id(client), (client, []))[1].append(item)
+        return list(groups.values())
+
+    def _execute_batch(
+        self, client: Any, items: list[_BatchItem]
+    ) -> list[BatchItemResult]:
+        """执行一个 _msearch 请求，请求失败时该批次的所有查询都记录该异常."""
+        body: list[dict[str, Any]] = []
+        for item in items:
+            body.append(item.header)
+            body.append(item.body)
+
+        try:
+            responses = client.msearch(body=body)["responses"]
+        except Exception as e:
+            return [BatchItemResult(key=item.key, error=e) for item in items]
+
+        results = []
+        for item, raw in zip(items, responses, strict=False):
+            if raw.get("error"):
+                results.append(BatchItemResult(key=item.key, error=raw["error"]))
+            else:
+                results.append(
+                    BatchItemResult(
+                        key=item.key, response=Response(_response_search(item), raw)
+                    )
+                )
+        # 响应数量少于请求数量时，剩余的查询记为失败
+        for item in items[len(results) :]:
+            results.append(
+                BatchItemResult(key=item.key, error={"reason": "missing response"})
+            )
+        return results
+
+
+def _header(search: Search, body: dict[str, Any]) -> dict[str, Any]:
+    """与 MultiSearch 一致地生成 _msearch 请求头，使用 PIT 的请求不能指定索引."""
+    header: dict[str, Any] = {}
+    if search._index and "pit" not in body:
+        header["index"] = search._index
+    header.update(search._params)
+    return header
+
+
+def _response_search(item: _BatchItem) -> Search:
+    """返回用于包装响应的 Search."""
+    if item.builder is not None:
+        return item.builder._result_search(item.search)
+    return item.search
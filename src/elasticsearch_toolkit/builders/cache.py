@@ -0,0 +1,481 @@
+"""
+查询结果缓存模块
+
+大量用户重复执行相同的查询时，可以缓存查询结果。缓存键为请求体的规范化哈希:
+字典键排序，bool 子句列表和 terms 值列表的顺序也被规范化，语义相同的查询共用同一个缓存项。
+
+时间范围使用相对时间（now）的查询，结果会随时间变化，默认不缓存；也可以按时间粒度
+量化，同一时间段内的请求共用缓存，缓存项在时间段结束时过期。
+
+后端可替换: 进程内的 LRU + TTL + 字节上限缓存，以及兼容 redis-py 接口的后端。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from elasticsearch.dsl.response import Response
+
+    from elasticsearch_toolkit.builders.dsl import DslQueryBuilder
+
+# 默认缓存时间（秒）
+DEFAULT_TTL = 60.0
+
+# bool 查询中与顺序无关的子句列表
+_BOOL_CLAUSE_KEYS = frozenset(("filter", "must", "must_not", "should"))
+
+# 包含查询的请求体顶层键，只有这些部分的子句顺序被规范化
+_QUERY_KEYS = ("query", "post_filter")
+
+# 可能包含相对时间的请求体顶层键
+_RELATIVE_TIME_KEYS = (*_QUERY_KEYS, "aggs", "aggregations", "runtime_mappings")
+
+# 边界可以是日期表达式的键: date_range 聚合的区间列表、date_histogram 的边界、脚本参数
+_BOUND_KEYS = frozenset(("ranges", "extended_bounds", "hard_bounds", "params"))
+
+# 相对时间表达式中的 now
+_NOW_PATTERN = re.compile(r"(?<![\w.])now(?!\w)")
+
+
+class RelativeTimePolicy(str, Enum):  # noqa: UP042
+    """包含相对时间（now）的查询的缓存方式."""
+
+    SKIP = "skip"  # 不缓存
+    QUANTIZE = "quantize"  # 按时间粒度量化缓存键
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """缓存统计."""
+
+    hits: int = 0
+    misses: int = 0
+    skipped: int = 0  # 因包含相对时间而未使用缓存的次数
+    stores: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """命中率."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def canonical_body(body: dict[str, Any]) -> dict[str, Any]:
+    """
+    规范化请求体.
+
+    query/post_filter 中 bool 的 filter/must/must_not/should 子句和 terms 的值列表按内容排序，
+    其他列表（sort、search_after、聚合参数等）保持原有顺序。键的顺序在序列化时统一排序。
+
+    Args:
+        body: 请求体字典
+
+    Returns:
+        规范化后的请求体
+    """
+    return {
+        key: _canonical_query(value) if key in _QUERY_KEYS else value
+        for key, value in body.items()
+    }
+
+
+def canonical_key(index: Any, body: dict[str, Any], params: Any = None) -> str:
+    """
+    计算请求的规范化哈希.
+
+    Args:
+        index: 索引
+        body: 请求体字典
+        params: 其他请求参数
+
+    Returns:
+        十六进制哈希字符串
+    """
+    data = json.dumps(
+        [index, canonical_body(body), params or {}],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _connection_id(using: Any) -> str:
+    """
+    连接标识: 连接别名原样使用，客户端对象使用类型和对象 id（只在当前进程内有效）.
+
+    Args:
+        using: ES 连接别名或客户端
+
+    Returns:
+        连接标识字符串
+    """
+    if using is None or isinstance(using, str):
+        return using or "default"
+    return f"{type(using).__qualname__}@{id(using):x}"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _canonical_query(query: Any) -> Any:
+    """规范化查询中与顺序无关的列表."""
+    if isinstance(query, list):
+        return [_canonical_query(item) for item in query]
+    if not isinstance(query, dict):
+        return query
+
+    result = {}
+    for key, value in query.items():
+        if key == "bool" and isinstance(value, dict):
+            result[key] = {
+                clause_key: (
+                    sorted((_canonical_query(c) for c in clauses), key=_dumps)
+                    if clause_key in _BOOL_CLAUSE_KEYS and isinstance(clauses, list)
+                    else _canonical_query(clauses)
+                )
+                for clause_key, clauses in value.items()
+            }
+        elif key == "terms" and isinstance(value, dict):
+            result[key] = {
+                field: sorted(values, key=_dumps)
+                if isinstance(values, list)
+                else values
+                for field, values in value.items()
+            }
+        else:
+            result[key] = _canonical_query(value)
+    return result
+
+
+def _has_now(values: Any) -> bool:
+    """判断字典或列表的字符串值中是否包含 now."""
+    if isinstance(values, dict):
+        values = values.values()
+    elif not isinstance(values, list):
+        return False
+    return any(isinstance(v, str) and _NOW_PATTERN.search(v) for v in values)
+
+
+def uses_relative_time(body: dict[str, Any]) -> bool:
+    """
+    判断查询是否使用相对时间.
+
+    检查查询、post_filter、聚合与运行时字段中 range 的边界、query_string 的查询语句、
+    date_range 聚合的区间、date_histogram 的边界以及脚本参数。
+
+    Args:
+        body: 请求体字典
+
+    Returns:
+        是否使用相对时间
+    """
+    stack = [body.get(key) for key in _RELATIVE_TIME_KEYS]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                if key == "range" and isinstance(value, dict):
+                    if any(_has_now(bounds) for bounds in value.values()):
+                        return True
+                elif key in ("query_string", "simple_query_string") and isinstance(
+                    value, dict
+                ):
+                    if _NOW_PATTERN.search(str(value.get("query", ""))):
+                        return True
+                elif key in _BOUND_KEYS:
+                    items = value if isinstance(value, list) else [value]
+                    if any(_has_now(item) for item in items):
+                        return True
+                stack.append(value)
+    return False
+
+
+class CacheBackend(ABC):
+    """缓存后端抽象基类，值为序列化后的字节串."""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """读取缓存项，不存在或已过期时返回 None."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """写入缓存项，ttl 为过期时间（秒）."""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """删除缓存项."""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """清空缓存."""
+        pass
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    进程内缓存后端.
+
+    LRU 淘汰，每个缓存项有独立的过期时间，总条数和总字节数都有上限；线程安全。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化缓存后端.
+
+        Args:
+            max_entries: 最大缓存条数
+            max_bytes: 最大总字节数，超过该值的单个缓存项不会被缓存
+            clock: 时钟函数
+
+        Raises:
+            ValueError: 当上限小于 1 时
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be >= 1, got {max_entries}")
+        if max_bytes < 1:
+            raise ValueError(f"max_bytes must be >= 1, got {max_bytes}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """当前缓存的总字节数."""
+        return self._size
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if len(value) > self.max_bytes or ttl <= 0:
+                return
+            self._entries[key] = (value, self._clock() + ttl)
+            self._size += len(value)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self._size -= len(value)
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis 缓存后端.
+
+    client 只需实现 redis-py 的 get/set(px=...)/delete/scan_iter 方法。
+    LRU 淘汰与内存上限由 Redis 的 maxmemory 与 maxmemory-policy 配置负责。
+    """
+
+    def __init__(self, client: Any, prefix: str = "es_toolkit:search:"):
+        """
+        初始化缓存后端.
+
+        Args:
+            client: redis-py 兼容的客户端
+            prefix: 缓存键前缀
+        """
+        self._client = client
+        self._prefix = prefix
+
+    def get(self, key: str) -> bytes | None:
+        return self._client.get(self._prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if ttl > 0:
+            self._client.set(self._prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._prefix + key)
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self._prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+class SearchResultCache:
+    """
+    查询结果缓存.
+
+    使用示例:
+        cache = SearchResultCache(ttl=30, relative_time="quantize", now_granularity=60)
+        response = builder.execute(cache=cache)
+        print(cache.stats.hits, cache.stats.misses)
+
+    多个 DslQueryBuilder 共享同一个 SearchResultCache 即可共享缓存。
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None = None,
+        ttl: float = DEFAULT_TTL,
+        relative_time: RelativeTimePolicy | str = RelativeTimePolicy.SKIP,
+        now_granularity: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        初始化缓存.
+
+        Args:
+            backend: 缓存后端，默认使用 InMemoryCacheBackend
+            ttl: 缓存时间（秒）
+            relative_time: 包含相对时间的查询的缓存方式
+            now_granularity: 量化相对时间的时间粒度（秒）
+            clock: 时钟函数，用于量化相对时间
+
+        Raises:
+            ValueError: 当 ttl 或时间粒度不大于 0 时
+        """
+        if ttl <= 0:
+            raise ValueError(f"ttl must be > 0, got {ttl}")
+        if now_granularity <= 0:
+            raise ValueError(f"now_granularity must be > 0, got {now_granularity}")
+        self.backend = backend or InMemoryCacheBackend()
+        self.ttl = ttl
+        self.relative_time = RelativeTimePolicy(relative_time)
+        self.now_granularity = now_granularity
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def cache_key(
+        self, index: Any, body: dict[str, Any], params: Any = None, using: Any = None
+    ) -> tuple[str, float] | None:
+        """
+        计算缓存键与缓存时间，不同连接（集群）的相同请求使用不同的缓存项.
+
+        Args:
+            index: 索引
+            body: 请求体字典
+            params: 其他请求参数
+            using: ES 连接别名或客户端
+
+        Returns:
+            (缓存键, 缓存时间)，不应缓存时返回 None
+        """
+        key = f"{_connection_id(using)}:{canonical_key(index, body, params)}"
+        if not uses_relative_time(body):
+            return key, self.ttl
+        if self.relative_time is RelativeTimePolicy.SKIP:
+            return None
+
+        # 同一时间段内共用缓存项，缓存项在时间段结束时过期
+        now = self._clock()
+        bucket = int(now // self.now_granularity)
+        remaining = (bucket + 1) * self.now_granularity - now
+        return f"{key}:{bucket}", min(self.ttl, remaining)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """
+        读取缓存的原始响应.
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            原始响应字典，未命中时返回 None
+        """
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return None if value is None else json.loads(value)
+
+    def set(self, key: str, raw: dict[str, Any], ttl: float) -> None:
+        """
+        缓存原始响应.
+
+        Args:
+            key: 缓存键
+            raw: 原始响应字典
+            ttl: 缓存时间（秒）
+        """
+        data = json.dumps(raw, separators=(",", ":"), ensure_ascii=False)
+        self.backend.set(key, data.encode("utf-8"), ttl)
+        with self._lock:
+            self.stats.stores += 1
+
+    def execute(self, builder: DslQueryBuilder, using: Any = None) -> Response:
+        """
+        执行查询，命中缓存时直接返回缓存的结果.
+
+        Args:
+            builder: DSL 查询构建器
+            using: ES 连接别名或客户端
+
+        Returns:
+            elasticsearch.dsl Response 对象
+        """
+        return builder.execute(using, cache=self)
+
+    def _lookup(
+        self, index: Any, body: dict[str, Any], params: Any = None, using: Any = None
+    ) -> tuple[tuple[str, float] | None, dict[str, Any] | None]:
+        """查找缓存，返回 (缓存键与缓存时间, 缓存的响应)，不应缓存时都为 None."""
+        cached = self.cache_key(index, body, params, using)
+        if cached is None:
+            with self._lock:
+                self.stats.skipped += 1
+            return None, None
+        return cached, self.get(cached[0])
+
+    def clear(self) -> None:
+        """清空缓存."""
+        self.backend.clear()
@@ -0,0 +1,187 @@
+"""
+请求合并（single-flight）模块
+
+故障期间大量用户同时打开同一个仪表盘，DslQueryBuilder 生成完全相同的请求体。
+SingleFlight 按规范化请求的哈希识别正在执行的相同请求，后来的调用者等待先到的调用者
+（leader）的响应，不再发送自己的请求。请求结束后立即移除，不缓存结果。
+
+SingleFlight 用于线程，AsyncSingleFlight 用于 asyncio。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from elasticsearch_toolkit.builders.cache import canonical_key
+
+T = TypeVar("T")
+
+
+def flight_key(
+    client: Any, index: Any, body: dict[str, Any], params: Any = None
+) -> str:
+    """
+    计算请求合并的键，不同客户端（集群）的相同请求不会合并.
+
+    Args:
+        client: ES 客户端
+        index: 索引
+        body: 请求体字典
+        params: 其他请求参数
+
+    Returns:
+        请求键
+    """
+    return f"{id(client)}:{canonical_key(index, body, params)}"
+
+
+@dataclass(slots=True)
+class SingleFlightStats:
+    """请求合并统计."""
+
+    requests: int = 0  # 调用次数
+    executions: int = 0  # 实际执行的请求数
+    coalesced: int = 0  # 等待其他调用者响应的调用次数
+    max_fan_in: int = 0  # 单个请求最多被多少个调用者共享
+
+    @property
+    def fan_in_ratio(self) -> float:
+        """平均每个实际请求服务的调用次数."""
+        return self.requests / self.executions if self.executions else 0.0
+
+
+class _Call:
+    """正在执行的请求."""
+
+    __slots__ = ("event", "result", "error", "callers")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.callers = 1
+
+
+class SingleFlight:
+    """
+    线程请求合并.
+
+    使用示例:
+        flight = SingleFlight()
+        response = builder.execute(single_flight=flight)
+        print(flight.stats.fan_in_ratio)
+
+    leader 的请求抛出异常时，等待中的调用者收到同一个异常。
+    所有调用者得到同一个结果对象，调用者不能修改它；DslQueryBuilder 会为每个调用者复制响应。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self.stats = SingleFlightStats()
+
+    def __len__(self) -> int:
+        """正在执行的请求数."""
+        return len(self._calls)
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        执行请求，相同 key 的请求正在执行时等待其结果.
+
+        Args:
+            key: 请求键
+            fn: 执行请求的函数
+
+        Returns:
+            请求结果
+        """
+        with self._lock:
+            self.stats.requests += 1
+            call = self._calls.get(key)
+            if call is not None:
+                call.callers += 1
+                self.stats.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.stats.executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                self.stats.max_fan_in = max(self.stats.max_fan_in, call.callers)
+            call.event.set()
+        return call.result
+
+
+class _AsyncCall:
+    """正在执行的异步请求."""
+
+    __slots__ = ("task", "callers")
+
+    def __init__(self, task: asyncio.Future) -> None:
+        self.task = task
+        self.callers = 1
+
+
+class AsyncSingleFlight:
+    """
+    asyncio 请求合并.
+
+    请求在独立的 Task 中执行，调用者被取消不会取消共享的请求。
+    只能在同一个事件循环中使用。与 SingleFlight 相同，所有调用者得到同一个结果对象。
+    """
+
+    def __init__(self):
+        self._calls: dict[str, _AsyncCall] = {}
+        self.stats = SingleFlightStats()
+
+    def __len__(self) -> int:
+        """正在执行的请求数."""
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行请求，相同 key 的请求正在执行时等待其结果.
+
+        Args:
+            key: 请求键
+            fn: 返回协程的函数
+
+        Returns:
+            请求结果
+        """
+        self.stats.requests += 1
+        call = self._calls.get(key)
+        if call is not None:
+            call.callers += 1
+            self.stats.coalesced += 1
+        else:
+            call = self._calls[key] = _AsyncCall(asyncio.ensure_future(fn()))
+            self.stats.executions += 1
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+        return await asyncio.shield(call.task)
+
+    def _finish(self, key: str, call: _AsyncCall) -> None:
+        """请求结束时移除，并取走异常避免所有调用者都已取消时产生未处理异常警告."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        self.stats.max_fan_in = max(self.stats.max_fan_in, call.callers)
+        if not call.task.cancelled():
+            call.task.exception()
@@ -0,0 +1,118 @@
+"""
+游标分页模块
+
+from/size 分页的耗时随页码线性增长，并且超过 index.max_result_window 后直接报错。
+游标分页使用 point in time（PIT）固定数据视图，以 search_after 从上一页最后一条命中的
+sort 值继续查询，任意深度的分页耗时都与第一页相当。
+
+排序字段末尾会追加唯一的 tiebreaker（默认 _shard_doc），保证 sort 值可以唯一定位一条命中。
+游标是不透明的字符串，包含 PIT id、上一页最后一条命中的 sort 值以及查询指纹，
+用于在下一次请求中继续分页。
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any
+
+# 游标格式版本
+CURSOR_VERSION = 1
+
+# PIT 默认保持时间
+DEFAULT_KEEP_ALIVE = "1m"
+
+# PIT 内置的唯一排序字段
+DEFAULT_TIEBREAKER = "_shard_doc"
+
+
+@dataclass(slots=True)
+class CursorPagination:
+    """游标分页设置."""
+
+    page_size: int = 10
+    keep_alive: str = DEFAULT_KEEP_ALIVE
+    tiebreaker: str = DEFAULT_TIEBREAKER
+    pit_id: str | None = None
+    search_after: list[Any] | None = None
+    fingerprint: str | None = None
+
+
+@dataclass(slots=True)
+class CursorPage:
+    """游标分页的一页结果."""
+
+    hits: list[Any] = field(default_factory=list)
+    cursor: str | None = None  # 下一页的游标，没有更多数据时为 None
+    total: int | None = None
+
+
+def encode_cursor(
+    pit_id: str, search_after: list[Any], keep_alive: str, fingerprint: str
+) -> str:
+    """
+    编码游标.
+
+    Args:
+        pit_id: PIT id
+        search_after: 上一页最后一条命中的 sort 值
+        keep_alive: PIT 保持时间
+        fingerprint: 查询指纹
+
+    Returns:
+        URL 安全的游标字符串
+    """
+    payload = {
+        "v": CURSOR_VERSION,
+        "pit": pit_id,
+        "after": search_after,
+        "ka": keep_alive,
+        "fp": fingerprint,
+    }
+    data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(data.encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """
+    解码游标.
+
+    Args:
+        cursor: encode_cursor() 生成的游标
+
+    Returns:
+        包含 pit、after、ka、fp 的字典
+
+    Raises:
+        ValueError: 当游标无效或版本不支持时
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+    if not isinstance(payload, dict) or payload.get("v") != CURSOR_VERSION:
+        raise ValueError(f"Unsupported cursor: {cursor!r}")
+    if not isinstance(payload.get("pit"), str) or not isinstance(
+        payload.get("after"), list
+    ):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return payload
+
+
+def query_fingerprint(body: dict[str, Any]) -> str:
+    """
+    计算查询指纹，游标只能用于生成它的查询.
+
+    Args:
+        body: 不包含 pit/search_after/size 的请求体
+
+    Returns:
+        指纹字符串
+    """
+    data = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
@@ -2,17 +2,36 @@
 
 from __future__ import annotations
 
+import copy
 from typing import Any
 from collections.abc import Callable
 
-from elasticsearch.dsl import Q, Search
-
+from elasticsearch.dsl import A, Q, Search
+from elasticsearch.dsl.connections import get_connection
+from elasticsearch.dsl.query import Bool
+from elasticsearch.dsl.response import Response
+
+from elasticsearch_toolkit.builders.cache import SearchResultCache
+from elasticsearch_toolkit.builders.coalesce import SingleFlight, flight_key
+from elasticsearch_toolkit.builders.cursor import (
+    DEFAULT_KEEP_ALIVE,
+    DEFAULT_TIEBREAKER,
+    CursorPage,
+    CursorPagination,
+    decode_cursor,
+    encode_cursor,
+    query_fingerprint,
+)
+from elasticsearch_toolkit.builders.export import SlicedExporter
+from elasticsearch_toolkit.core import query
 from elasticsearch_toolkit.core.conditions import (
-    ConditionItem,
+    ConditionCompiler,
     ConditionParser,
+    ConditionPlan,
     DefaultConditionParser,
 )
 from elasticsearch_toolkit.core.fields import FieldMapper
+from elasticsearch_toolkit.transformers.dsl_compiler import QueryStringDslCompiler
 
 
 class DslQueryBuilder:
@@ -42,6 +61,16 @@ class DslQueryBuilder:
         )
 
         result = search.execute()
+
+        # 高 QPS 场景直接生成请求体，不创建中间 Search 对象
+        body = builder.build_body()
+
+        # 深度分页使用游标（PIT + search_after）
+        page = builder.cursor_pagination(cursor=request_cursor).execute_page()
+        next_cursor = page.cursor
+
+    设置 query_string_compiler 后，转换后的 Query String 编译为原生 bool 查询，不按 _score 排序时
+    放入 filter（可利用 filter 缓存），无法忠实翻译的部分保留为 query_string。
     """
 
     def __init__(
@@ -50,6 +79,7 @@ class DslQueryBuilder:
         field_mapper: FieldMapper | None = None,
         condition_parser: ConditionParser | None = None,
         query_string_transformer: Callable[[str], str] | None = None,
+        query_string_compiler: QueryStringDslCompiler | None = None,
     ):
         """
         初始化构建器.
@@ -59,18 +89,23 @@ class DslQueryBuilder:
             field_mapper: 字段映射器
             condition_parser: 条件解析器
             query_string_transformer: Query String 转换函数
+            query_string_compiler: Query String DSL 编译器，为 None 时以 query_string 查询发送
         """
         self._search_factory = search_factory
         self._field_mapper = field_mapper or FieldMapper()
         self._condition_parser = condition_parser or DefaultConditionParser()
+        self._condition_compiler = ConditionCompiler(self._condition_parser)
         self._query_string_transformer = query_string_transformer
+        self._query_string_compiler = query_string_compiler
 
         # 查询参数
         self._conditions: list[dict] = []
+        self._condition_plan: ConditionPlan | None = None
         self._query_string: str = ""
         self._ordering: list[str] = []
         self._page: int = 1
         self._page_size: int = 10
+        self._cursor: CursorPagination | None = None
         self._aggregations: list[dict] = []
         self._extra_filters: list[Q] = []
 
@@ -85,6 +120,8 @@ class DslQueryBuilder:
             self，支持链式调用
         """
         self._conditions = self._field_mapper.transform_condition_fields(conditions)
+        # 条件只解析一次，多次 build()/build_body() 时直接按计划编译
+        self._condition_plan = self._condition_compiler.prepare(self._conditions)
         return self
 
     def query_string(self, query_string: str | None) -> DslQueryBuilder:
@@ -115,7 +152,7 @@ class DslQueryBuilder:
 
     def pagination(self, page: int = 1, page_size: int = 10) -> DslQueryBuilder:
         """
-        设置分页.
+        设置分页，会关闭游标分页.
 
         Args:
             page: 页码，最小为 1
@@ -126,18 +163,158 @@ class DslQueryBuilder:
         """
         self._page = max(1, page)
         self._page_size = max(1, page_size)
+        self._cursor = None
+        return self
+
+    def cursor_pagination(
+        self,
+        cursor: str | None = None,
+        page_size: int = 10,
+        keep_alive: str | None = None,
+        tiebreaker: str = DEFAULT_TIEBREAKER,
+    ) -> DslQueryBuilder:
+        """
+        设置游标分页（point in time + search_after）.
+
+        排序字段末尾追加 tiebreaker，使用 execute_page() 执行，返回的游标用于请求下一页。
+        游标只能用于生成它的查询（条件、Query String、额外过滤、排序均相同）。
+
+        Args:
+            cursor: 上一页返回的游标，为 None 时从第一页开始
+            page_size: 每页大小，最小为 1
+            keep_alive: PIT 保持时间，默认沿用游标中记录的保持时间，没有游标时为 1m
+            tiebreaker: 唯一排序字段，默认使用 PIT 内置的 _shard_doc
+
+        Returns:
+            self，支持链式调用
+
+        Raises:
+            ValueError: 当游标无效时
+        """
+        payload = decode_cursor(cursor) if cursor else None
+        if keep_alive is None:
+            keep_alive = payload.get("ka") if payload else None
+        state = CursorPagination(
+            page_size=max(1, page_size),
+            keep_alive=keep_alive or DEFAULT_KEEP_ALIVE,
+            tiebreaker=tiebreaker,
+        )
+        if payload:
+            state.pit_id = payload["pit"]
+            state.search_after = payload["after"]
+            state.fingerprint = payload["fp"]
+        self._cursor = state
+        return self
+
+    def execute_page(self, using: Any = None) -> CursorPage:
+        """
+        执行游标分页查询.
+
+        第一页时打开 PIT；返回的命中数不足一页时关闭 PIT，游标为 None。
+        执行后构建器指向下一页，再次调用会继续翻页。
+
+        Args:
+            using: ES 连接别名或客户端，默认使用 search_factory 返回的 Search 的设置
+
+        Returns:
+            CursorPage 对象
+
+        Raises:
+            ValueError: 当未设置游标分页或游标与查询不匹配时
+        """
+        state = self._require_cursor()
+        base = self._search_factory()
+        client = get_connection(using if using is not None else base._using)
+        if state.pit_id is None:
+            opened = client.open_point_in_time(
+                index=base._index, keep_alive=state.keep_alive
+            )
+            self._start_cursor(opened["id"])
+
+        fingerprint = self._cursor_fingerprint()
+        response = self.build().using(client).execute()
+        page, exhausted_pit_id = self._advance_cursor(response, fingerprint)
+        if exhausted_pit_id is not None:
+            client.close_point_in_time(id=exhausted_pit_id)
+        return page
+
+    def _require_cursor(self) -> CursorPagination:
+        """返回游标分页设置，未设置时抛出 ValueError."""
+        if self._cursor is None:
+            raise ValueError("Cursor pagination is not enabled")
+        return self._cursor
+
+    def _start_cursor(self, pit_id: str) -> None:
+        """使用新打开的 PIT 从第一页开始."""
+        self._cursor.pit_id = pit_id
+        self._cursor.search_after = None
+
+    def _advance_cursor(
+        self, response: Any, fingerprint: str
+    ) -> tuple[CursorPage, str | None]:
+        """
+        根据一页的响应将游标移到下一页.
+
+        Returns:
+            (当前页, 需要关闭的 PIT id)，还有下一页时 PIT id 为 None
+        """
+        state = self._cursor
+        hits = list(response.hits)
+        # ES 可能在响应中返回新的 PIT id
+        pit_id = getattr(response, "pit_id", None) or state.pit_id
+
+        exhausted_pit_id = None
+        if len(hits) < state.page_size:
+            exhausted_pit_id = pit_id
+            state.pit_id = state.search_after = state.fingerprint = None
+            cursor = None
+        else:
+            state.pit_id = pit_id
+            state.search_after = list(hits[-1].meta.sort)
+            state.fingerprint = fingerprint
+            cursor = encode_cursor(
+                pit_id, state.search_after, state.keep_alive, fingerprint
+            )
+
+        total = getattr(response.hits, "total", None)
+        if total is not None and not isinstance(total, int):
+            total = total.value
+        return CursorPage(hits=hits, cursor=cursor, total=total), exhausted_pit_id
+
+    def close_cursor(self, using: Any = None) -> DslQueryBuilder:
+        """
+        提前关闭当前游标对应的 PIT.
+
+        Args:
+            using: ES 连接别名或客户端
+
+        Returns:
+            self，支持链式调用
+        """
+        state = self._cursor
+        if state is not None and state.pit_id is not None:
+            client = get_connection(
+                using if using is not None else self._search_factory()._using
+            )
+            client.close_point_in_time(id=state.pit_id)
+            state.pit_id = state.search_after = state.fingerprint = None
         return self
 
-    def add_filter(self, q: Q | None) -> DslQueryBuilder:
+    def add_filter(self, q: Q | query.Q | None) -> DslQueryBuilder:
         """
         添加额外的过滤条件.
 
+        支持 elasticsearch.dsl 的 Q 对象，也支持 elasticsearch_toolkit 的 Q 对象，
+        后者会直接编译为原生 DSL 查询，不经过 Query String。
+
         Args:
             q: Q 对象
 
         Returns:
             self，支持链式调用
         """
+        if isinstance(q, query.Q):
+            q = q.to_dsl()
         if q is not None:
             self._extra_filters.append(q)
         return self
@@ -174,6 +351,88 @@ class DslQueryBuilder:
         )
         return self
 
+    def execute(
+        self,
+        using: Any = None,
+        cache: SearchResultCache | None = None,
+        single_flight: SingleFlight | None = None,
+    ) -> Response:
+        """
+        执行查询.
+
+        Args:
+            using: ES 连接别名或客户端，默认使用 Search 对象自身的设置
+            cache: 查询结果缓存，命中时不发送请求
+            single_flight: 请求合并，相同的请求正在执行时等待其响应
+
+        Returns:
+            elasticsearch.dsl Response 对象
+        """
+        if cache is None and single_flight is None:
+            search = self.build()
+            if using is not None:
+                search = search.using(using)
+            return search.execute()
+
+        base = self._search_factory()
+        if using is None:
+            using = base._using
+        body = self.build_body()
+        cached, raw = (None, None)
+        if cache is not None:
+            cached, raw = cache._lookup(base._index, body, base._params, using)
+
+        if raw is None:
+            client = get_connection(using)
+
+            def fetch() -> dict[str, Any]:
+                response = client.search(index=base._index, body=body, **base._params)
+                result = getattr(response, "body", response)
+                if cached is not None:
+                    cache.set(cached[0], result, cached[1])
+                return result
+
+            if single_flight is None:
+                raw = fetch()
+            else:
+                key = flight_key(client, base._index, body, base._params)
+                # 合并的调用者共享同一个响应字典，每个调用者使用各自的副本
+                raw = copy.deepcopy(single_flight.do(key, fetch))
+        return Response(self._result_search(base), raw)
+
+    def export(
+        self,
+        slices: int = 4,
+        batch_size: int = 1000,
+        mode: str = "scroll",
+        keep_alive: str = DEFAULT_KEEP_ALIVE,
+        max_queue_size: int | None = None,
+        using: Any = None,
+    ) -> SlicedExporter:
+        """
+        并行切片导出.
+
+        Args:
+            slices: 切片数，也是并发线程数
+            batch_size: 每次请求返回的命中数
+            mode: 切片方式，scroll 或 pit
+            keep_alive: scroll/PIT 保持时间
+            max_queue_size: 队列中最多缓存的批次数，默认为切片数的 2 倍
+            using: ES 连接别名或客户端
+
+        Returns:
+            SlicedExporter 对象，迭代得到命中字典
+        """
+        return SlicedExporter(
+            self,
+            slices=slices,
+            batch_size=batch_size,
+            mode=mode,
+            keep_alive=keep_alive,
+            max_queue_size=max_queue_size,
+            using=using,
+        )
+
     def build(self) -> Search:
         """
         构建 Search 对象.
@@ -181,75 +440,228 @@ class DslQueryBuilder:
         Returns:
             elasticsearch.dsl.Search 对象
         """
-        search = self._search_factory()
+        search = self._apply_query(self._search_factory())
+
+        if self._cursor is not None:
+            # 游标分页: 排序 + size + pit/search_after
+            self._check_cursor()
+            search = search.sort(*self._cursor_sort())
+            search = search.extra(**self._cursor_params())
+            if self._cursor.pit_id is not None:
+                # 使用 PIT 时请求中不能指定索引
+                search = search.index()
+        else:
+            # 添加排序
+            if self._ordering:
+                search = search.sort(*self._ordering)
+
+            # 添加分页
+            start = (self._page - 1) * self._page_size
+            search = search[start : start + self._page_size]
 
-        # 添加条件过滤
-        search = self._apply_conditions(search)
+        # 添加聚合
+        search = self._apply_aggregations(search)
 
-        # 添加 Query String
-        search = self._apply_query_string(search)
+        return search
 
-        # 添加额外过滤
-        for q in self._extra_filters:
-            search = search.filter(q)
+    def build_body(self) -> dict[str, Any]:
+        """
+        直接生成请求体字典.
 
-        # 添加排序
-        if self._ordering:
-            search = search.sort(*self._ordering)
+        结果与 build().to_dict() 完全一致（包括键的顺序），但不会为每个 filter/query/
+        sort/分页操作克隆 Search 对象，也不需要在最后遍历整个 Search 对象。
+        search_factory 返回的 Search 已经包含请求体参数（query、sort、extra 等）时，
+        回退到 build().to_dict()。
 
-        # 添加分页
-        start = (self._page - 1) * self._page_size
-        search = search[start : start + self._page_size]
+        Returns:
+            字典格式的请求体
+        """
+        # 与 Search.sort() 一致，"-_score" 会抛出异常，交给 build() 处理
+        if self._search_factory().to_dict() or "-_score" in self._ordering:
+            return self.build().to_dict()
 
-        # 添加聚合
-        search = self._apply_aggregations(search)
+        body: dict[str, Any] = {}
+
+        query = self._build_query_body()
+        if query is not None:
+            body["query"] = query
+
+        if self._aggregations:
+            body["aggs"] = {
+                agg["name"]: self._create_aggregation(agg).to_dict()
+                for agg in self._aggregations
+            }
 
+        if self._cursor is not None:
+            self._check_cursor()
+            body["sort"] = _sort_body(self._cursor_sort())
+            body.update(self._cursor_params())
+            return body
+
+        if self._ordering:
+            body["sort"] = _sort_body(self._ordering)
+
+        body["from"] = (self._page - 1) * self._page_size
+        body["size"] = self._page_size
+        return body
+
+    def _result_search(self, base: Search) -> Search:
+        """返回用于包装响应的 Search，有聚合时需要完整的 Search 才能解析聚合结果."""
+        if self._aggregations:
+            return self.build()
+        return base
+
+    def _cursor_sort(self) -> list[str]:
+        """游标分页的排序字段: 排序字段 + tiebreaker."""
+        tiebreaker = self._cursor.tiebreaker
+        if tiebreaker in self._ordering or f"-{tiebreaker}" in self._ordering:
+            return list(self._ordering)
+        return [*self._ordering, tiebreaker]
+
+    def _cursor_params(self) -> dict[str, Any]:
+        """游标分页的 size/pit/search_after 参数."""
+        state = self._cursor
+        params: dict[str, Any] = {"size": state.page_size}
+        if state.pit_id is not None:
+            params["pit"] = {"id": state.pit_id, "keep_alive": state.keep_alive}
+        if state.search_after is not None:
+            params["search_after"] = state.search_after
+        return params
+
+    def _cursor_fingerprint(self) -> str:
+        """计算当前查询的指纹."""
+        return query_fingerprint(
+            {
+                "query": self._query_body(),
+                "sort": _sort_body(self._cursor_sort()),
+            }
+        )
+
+    def _check_cursor(self) -> None:
+        """检查游标是否由当前查询生成."""
+        fingerprint = self._cursor.fingerprint
+        if fingerprint is not None and fingerprint != self._cursor_fingerprint():
+            raise ValueError("Cursor does not match the current query")
+
+    def _apply_query(self, search: Search) -> Search:
+        """依次应用条件过滤、Query String 与额外过滤."""
+        search = self._apply_conditions(search)
+        search = self._apply_query_string(search)
+        for q in self._extra_filters:
+            search = search.filter(q)
         return search
 
-    def _apply_conditions(self, search: Search) -> Search:
-        """应用条件过滤."""
-        if not self._conditions:
-            return search
+    def _query_body(self) -> dict[str, Any] | None:
+        """
+        生成请求体的 query 部分，与 build_body() 的结果一致.
 
-        combined_q = None
+        search_factory 返回的 Search 已经包含请求体参数（如预设的过滤条件）时，
+        与 build_body() 相同地回退到 Search 对象合并。
+        """
+        search = self._search_factory()
+        if not search.to_dict():
+            return self._build_query_body()
+        return self._apply_query(search).to_dict().get("query")
 
-        for cond in self._conditions:
-            condition_item = ConditionItem(
-                key=cond["key"],
-                method=cond.get("method", "eq"),
-                value=cond["value"],
-                condition=cond.get("condition", "and"),
-            )
+    def _build_query_body(self) -> dict[str, Any] | None:
+        """
+        生成 query 部分的字典.
 
-            q = self._condition_parser.parse(condition_item)
-            if q is None:
-                continue
+        与 build() 中依次调用 search.filter()/search.query() 后 bool 查询合并的结果一致:
+        条件过滤与额外过滤依次放入 bool.filter，Query String 放入 bool.must。
+        """
+        filters = []
+        combined_q = self._combine_conditions()
+        if combined_q is not None:
+            filters.append(combined_q.to_dict())
+        for q in self._extra_filters:
+            filters.append(Q(q).to_dict())
+
+        query_string = self._transform_query_string()
+        if query_string is not None and self._query_string_compiler is not None:
+            if self._query_string_scoring():
+                return self._build_scoring_query_body(combined_q, query_string)
+            # 编译结果作为 filter 放在条件过滤之后、额外过滤之前
+            compiled = self._query_string_compiler.compile_body(query_string)
+            filters.insert(0 if combined_q is None else 1, compiled)
+            return {"bool": {"filter": filters}}
+
+        if not filters:
+            if query_string is None:
+                return None
+            return {"query_string": {"query": query_string}}
+
+        bool_body: dict[str, Any] = {"filter": filters}
+        if query_string is not None:
+            bool_body["must"] = [{"query_string": {"query": query_string}}]
+        return {"bool": bool_body}
+
+    def _build_scoring_query_body(
+        self, combined_q: Q | None, query_string: str
+    ) -> dict[str, Any]:
+        """
+        生成编译后的 Query String 参与评分时 query 部分的字典.
 
-            # 组合条件
-            if combined_q is None:
-                combined_q = q
-            elif cond.get("condition") == "or":
-                combined_q = combined_q | q
-            else:
-                combined_q = combined_q & q
+        编译结果与过滤条件的合并方式取决于 bool 查询的合并规则，这里按 build() 中的顺序依次合并。
+        """
+        clauses = []
+        if combined_q is not None:
+            clauses.append(Bool(filter=[combined_q]))
+        clauses.append(self._compile_query_string(query_string))
+        clauses.extend(Bool(filter=[Q(q)]) for q in self._extra_filters)
+
+        query = clauses[0]
+        for clause in clauses[1:]:
+            query &= clause
+        return query.to_dict()
+
+    def _compile_query_string(self, query_string: str) -> Q:
+        """编译 Query String，不需要评分时放入 filter."""
+        scoring = self._query_string_scoring()
+        compiled = self._query_string_compiler.compile(query_string, scoring=scoring)
+        return compiled if scoring else Bool(filter=[compiled])
+
+    def _query_string_scoring(self) -> bool:
+        """Query String 是否需要参与评分: 按 _score 排序（包括未指定排序）时需要."""
+        ordering = self._cursor_sort() if self._cursor is not None else self._ordering
+        return not ordering or any(field.lstrip("-") == "_score" for field in ordering)
 
+    def _apply_conditions(self, search: Search) -> Search:
+        """应用条件过滤."""
+        combined_q = self._combine_conditions()
         if combined_q is not None:
             search = search.filter(combined_q)
-
         return search
 
+    def _combine_conditions(self) -> Q | None:
+        """
+        将条件列表编译为一个扁平的 bool 查询，没有有效条件时返回 None.
+
+        组合语义与依次使用 ``&``/``|`` 组合各条件相同，详见 ConditionCompiler。
+        """
+        if not self._conditions or self._condition_plan is None:
+            return None
+        return self._condition_plan.compile()
+
     def _apply_query_string(self, search: Search) -> Search:
         """应用 Query String."""
+        query_string = self._transform_query_string()
+        if query_string is None:
+            return search
+        if self._query_string_compiler is not None:
+            return search.query(self._compile_query_string(query_string))
+        return search.query("query_string", query=query_string)
+
+    def _transform_query_string(self) -> str | None:
+        """返回转换后的 Query String，没有设置 Query String 时返回 None."""
         query_string = self._query_string.strip()
         if not query_string:
-            return search
+            return None
 
         # 转换处理
         if self._query_string_transformer:
             query_string = self._query_string_transformer(query_string)
-
-        search = search.query("query_string", query=query_string)
-        return search
+        return query_string
 
     def _apply_aggregations(self, search: Search) -> Search:
         """应用聚合.
@@ -269,13 +681,21 @@ class DslQueryBuilder:
 
         return search
 
+    def _create_aggregation(self, agg: dict[str, Any]) -> Any:
+        """创建聚合对象，参数与 _apply_aggregations 中的 search.aggs.bucket() 一致."""
+        if agg["field"]:
+            return A(agg["type"], field=agg["field"], **agg["kwargs"])
+        return A(agg["type"], **agg["kwargs"])
+
     def clear(self) -> DslQueryBuilder:
         """清空所有查询参数."""
         self._conditions.clear()
+        self._condition_plan = None
         self._query_string = ""
         self._ordering.clear()
         self._page = 1
         self._page_size = 10
+        self._cursor = None
         self._aggregations.clear()
         self._extra_filters.clear()
         return self
@@ -288,3 +708,11 @@ class DslQueryBuilder:
             字典格式的 DSL
         """
         return self.build().to_dict()
+
+
+def _sort_body(ordering: list[str]) -> list[Any]:
+    """与 Search.sort() 一致地生成 sort 部分，"-" 前缀表示降序."""
+    return [
+        {item[1:]: {"order": "desc"}} if item.startswith("-") else item
+        for item in ordering
+    ]
@@ -0,0 +1,317 @@
+"""
+并行切片导出模块
+
+单线程 scan() 导出大量文档时，耗时等于所有批次请求耗时之和。本模块将查询拆分为
+N 个切片（sliced scroll 或 PIT 切片），由 N 个线程并发拉取，命中通过有界队列交给
+调用方的生成器，内存占用只取决于队列大小，与结果总量无关。
+
+生成器提前关闭（break、异常或显式 close()）时会通知所有线程停止，并清理
+scroll 上下文或关闭 PIT。
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+from elasticsearch.dsl.connections import get_connection
+
+from elasticsearch_toolkit.builders.cursor import DEFAULT_KEEP_ALIVE
+
+if TYPE_CHECKING:
+    from elasticsearch_toolkit.builders.dsl import DslQueryBuilder
+
+# 线程等待队列时检查停止信号的间隔（秒）
+_POLL_INTERVAL = 0.05
+
+# 切片线程结束标记
+_DONE = object()
+
+# 使用 PIT 时只能在打开 PIT 时指定的请求参数
+_PIT_OPEN_PARAMS = frozenset(("routing", "preference"))
+
+
+class ExportMode(str, Enum):  # noqa: UP042
+    """切片方式."""
+
+    SCROLL = "scroll"
+    PIT = "pit"
+
+
+@dataclass(slots=True)
+class ExportStats:
+    """导出统计."""
+
+    mode: ExportMode
+    slices: int
+    hits: int = 0  # 已交给调用方的命中数
+    requests: int = 0
+    elapsed: float = 0.0
+    slice_hits: list[int] = field(default_factory=list)  # 每个切片拉取的命中数
+    cancelled: bool = False
+
+    @property
+    def hits_per_second(self) -> float:
+        """每秒导出的命中数."""
+        return self.hits / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass(slots=True)
+class _SliceContext:
+    """单个切片线程的参数."""
+
+    client: Any
+    index: Any
+    query: dict[str, Any] | None
+    params: dict[str, Any]
+    pit_id: str | None
+    slice_id: int
+
+
+class _SliceFailure:
+    """切片线程中的异常，交给生成器重新抛出."""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class SlicedExporter:
+    """
+    并行切片导出器.
+
+    使用示例:
+        exporter = builder.export(slices=4, batch_size=1000)
+        for hit in exporter:
+            write(hit["_source"])
+        print(exporter.stats.hits_per_second)
+
+    命中为原始的响应字典（包含 _index、_id、_source 等），不保证顺序。
+    查询使用 DslQueryBuilder 的条件、Query String 和额外过滤，忽略排序、分页和聚合，
+    按 _doc（scroll）或 _shard_doc（PIT）排序以获得最快的遍历速度。
+    """
+
+    def __init__(
+        self,
+        builder: DslQueryBuilder,
+        slices: int = 4,
+        batch_size: int = 1000,
+        mode: ExportMode | str = ExportMode.SCROLL,
+        keep_alive: str = DEFAULT_KEEP_ALIVE,
+        max_queue_size: int | None = None,
+        using: Any = None,
+    ):
+        """
+        初始化导出器.
+
+        Args:
+            builder: DSL 查询构建器
+            slices: 切片数，也是并发线程数
+            batch_size: 每次请求返回的命中数
+            mode: 切片方式，scroll 或 pit
+            keep_alive: scroll/PIT 保持时间
+            max_queue_size: 队列中最多缓存的批次数，默认为切片数的 2 倍
+            using: ES 连接别名或客户端，默认使用 Search 对象自身的设置
+
+        Raises:
+            ValueError: 当参数无效时
+        """
+        if slices < 1:
+            raise ValueError(f"slices must be >= 1, got {slices}")
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        if max_queue_size is not None and max_queue_size < 1:
+            raise ValueError(f"max_queue_size must be >= 1, got {max_queue_size}")
+
+        self._builder = builder
+        self._slices = slices
+        self._batch_size = batch_size
+        self._mode = ExportMode(mode)
+        self._keep_alive = keep_alive
+        self._max_queue_size = max_queue_size or slices * 2
+        self._using = using
+        self.stats = ExportStats(mode=self._mode, slices=slices)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return self.export()
+
+    def export(self) -> Iterator[dict[str, Any]]:
+        """
+        并发导出所有命中.
+
+        Yields:
+            命中字典
+        """
+        base = self._builder._search_factory()
+        client = get_connection(self._using if self._using is not None else base._using)
+        index = base._index
+        query = self._builder._query_body()
+        params = dict(base._params)
+
+        stats = self.stats = ExportStats(
+            mode=self._mode, slices=self._slices, slice_hits=[0] * self._slices
+        )
+        started = time.perf_counter()
+        batches: queue.Queue[Any] = queue.Queue(maxsize=self._max_queue_size)
+        stop = threading.Event()
+        lock = threading.Lock()
+
+        pit_id: str | None = None
+        if self._mode is ExportMode.PIT:
+            opened = client.open_point_in_time(
+                index=index,
+                keep_alive=self._keep_alive,
+                **{k: v for k, v in params.items() if k in _PIT_OPEN_PARAMS},
+            )
+            pit_id = opened["id"]
+            params = {k: v for k, v in params.items() if k not in _PIT_OPEN_PARAMS}
+
+        executor = ThreadPoolExecutor(
+            max_workers=self._slices, thread_name_prefix="es-export"
+        )
+        contexts = [
+            _SliceContext(client, index, query, params, pit_id, slice_id)
+            for slice_id in range(self._slices)
+        ]
+        futures = []
+        try:
+            for ctx in contexts:
+                futures.append(
+                    executor.submit(self._run_slice, ctx, batches, stop, lock)
+                )
+
+            remaining = self._slices
+            while remaining:
+                item = batches.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, _SliceFailure):
+                    raise item.error
+                else:
+                    stats.hits += len(item)
+                    yield from item
+        except GeneratorExit:
+            stats.cancelled = True
+            raise
+        finally:
+            stop.set()
+            # 清空队列，直到所有线程收到停止信号退出
+            while not all(future.done() for future in futures):
+                try:
+                    batches.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    pass
+            executor.shutdown(wait=True)
+            if pit_id is not None:
+                # 所有切片共享同一个 PIT，关闭时使用响应中更新过的 PIT id
+                latest = next(
+                    (ctx.pit_id for ctx in contexts if ctx.pit_id != pit_id), pit_id
+                )
+                client.close_point_in_time(id=latest)
+            stats.elapsed = time.perf_counter() - started
+
+    def _run_slice(
+        self,
+        ctx: _SliceContext,
+        batches: queue.Queue[Any],
+        stop: threading.Event,
+        lock: threading.Lock,
+    ) -> None:
+        """在线程中拉取一个切片的所有批次."""
+        try:
+            if ctx.pit_id is None:
+                self._scroll_slice(ctx, batches, stop, lock)
+            else:
+                self._pit_slice(ctx, batches, stop, lock)
+        except BaseException as e:
+            self._put(batches, _SliceFailure(e), stop)
+        else:
+            self._put(batches, _DONE, stop)
+
+    def _slice_body(self, ctx: _SliceContext, sort: str) -> dict[str, Any]:
+        """生成切片请求体."""
+        body: dict[str, Any] = {}
+        if ctx.query is not None:
+            body["query"] = ctx.query
+        body["sort"] = [sort]
+        body["size"] = self._batch_size
+        if self._slices > 1:
+            body["slice"] = {"id": ctx.slice_id, "max": self._slices}
+        return body
+
+    def _scroll_slice(
+        self,
+        ctx: _SliceContext,
+        batches: queue.Queue[Any],
+        stop: threading.Event,
+        lock: threading.Lock,
+    ) -> None:
+        """sliced scroll 拉取一个切片，结束或停止时清理 scroll 上下文."""
+        client = ctx.client
+        response = client.search(
+            index=ctx.index,
+            body=self._slice_body(ctx, "_doc"),
+            scroll=self._keep_alive,
+            **ctx.params,
+        )
+        scroll_id = response.get("_scroll_id")
+        try:
+            while True:
+                hits = response["hits"]["hits"]
+                self._record(ctx.slice_id, len(hits), lock)
+                if not hits or not self._put(batches, hits, stop):
+                    return
+                response = client.scroll(scroll_id=scroll_id, scroll=self._keep_alive)
+                scroll_id = response.get("_scroll_id") or scroll_id
+        finally:
+            if scroll_id:
+                client.clear_scroll(scroll_id=scroll_id)
+
+    def _pit_slice(
+        self,
+        ctx: _SliceContext,
+        batches: queue.Queue[Any],
+        stop: threading.Event,
+        lock: threading.Lock,
+    ) -> None:
+        """PIT 切片 + search_after 拉取一个切片，每次请求使用上一次响应返回的 PIT id."""
+        body = self._slice_body(ctx, "_shard_doc")
+        body["pit"] = {"id": ctx.pit_id, "keep_alive": self._keep_alive}
+        while True:
+            response = ctx.client.search(body=body, **ctx.params)
+            ctx.pit_id = response.get("pit_id") or ctx.pit_id
+            hits = response["hits"]["hits"]
+            self._record(ctx.slice_id, len(hits), lock)
+            if not hits or not self._put(batches, hits, stop):
+                return
+            if len(hits) < self._batch_size:
+                return
+            body = {
+                **body,
+                "pit": {"id": ctx.pit_id, "keep_alive": self._keep_alive},
+                "search_after": hits[-1]["sort"],
+            }
+
+    def _record(self, slice_id: int, count: int, lock: threading.Lock) -> None:
+        """记录一次请求及该切片拉取的命中数."""
+        with lock:
+            self.stats.requests += 1
+            self.stats.slice_hits[slice_id] += count
+
+    @staticmethod
+    def _put(batches: queue.Queue[Any], item: Any, stop: threading.Event) -> bool:
+        """放入队列，队列满时等待；收到停止信号时返回 False."""
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -0,0 +1,405 @@
+"""
+大值列表查询策略模块
+
+QueryStringBuilder 中包含大量值的条件会被渲染为数万个 OR 子句，超出 ES 的
+indices.query.bool.max_clause_count 限制，并且大部分耗时花在解析 Query String 上。
+本模块在构建前估算子句数量，超出预算时:
+
+1. 将精确匹配（EQUAL/NOT_EQUAL）的大值列表转为 terms 过滤，整个 terms 只算一个子句
+2. 仍然超出预算时，按子句预算拆分最大的多值条件，生成多个子查询，通过一次 msearch 执行并合并结果。
+   子查询结果取并集，只有未取反的条件（EQUAL/INCLUDE/REG）可以拆分
+"""
+
+from __future__ import annotations
+
+import functools
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+
+from elasticsearch.dsl import MultiSearch
+from elasticsearch.dsl import Q as DslQ
+from elasticsearch.dsl.query import Query
+
+from elasticsearch_toolkit.builders.dsl import DslQueryBuilder
+from elasticsearch_toolkit.builders.query_string import QueryStringBuilder
+from elasticsearch_toolkit.core.operators import (
+    GroupRelation,
+    LogicOperator,
+    QueryStringOperator,
+)
+
+# ES 默认的 indices.query.bool.max_clause_count
+DEFAULT_MAX_CLAUSE_COUNT = 1024
+# ES 默认的 index.max_terms_count
+DEFAULT_MAX_TERMS_COUNT = 65536
+
+# 不论有多少值都只生成一个子句的操作符
+_SINGLE_CLAUSE_OPERATORS = frozenset(
+    (
+        QueryStringOperator.EXISTS,
+        QueryStringOperator.NOT_EXISTS,
+        QueryStringOperator.BETWEEN,
+        QueryStringOperator.GT,
+        QueryStringOperator.LT,
+        QueryStringOperator.GTE,
+        QueryStringOperator.LTE,
+    )
+)
+
+# 可以拆分为多个子查询并合并结果的操作符；取反的条件拆分后取并集会包含应排除的文档
+_CHUNKABLE_OPERATORS = frozenset(
+    (
+        QueryStringOperator.EQUAL,
+        QueryStringOperator.INCLUDE,
+        QueryStringOperator.REG,
+    )
+)
+
+# 可以转为 terms 过滤的操作符 -> 是否取反
+_TERMS_OPERATORS = {
+    QueryStringOperator.EQUAL: False,
+    QueryStringOperator.NOT_EQUAL: True,
+}
+
+
+class LargeValueStrategy(str, Enum):  # noqa: UP042
+    """大值列表的处理方式."""
+
+    QUERY_STRING = "query_string"  # 未超出预算，直接使用 Query String
+    TERMS = "terms"  # 精确匹配的大值列表转为 terms 过滤
+    MSEARCH = "msearch"  # 拆分为多个子查询，通过 msearch 执行并合并结果
+
+
+@dataclass(slots=True)
+class LargeValueReport:
+    """处理报告，说明选择了哪种方式以及原因."""
+
+    strategy: LargeValueStrategy
+    max_clause_count: int
+    clause_count: int  # 原始 Query String 的估算子句数
+    terms_fields: list[str] = field(default_factory=list)  # 转为 terms 过滤的字段
+    chunked_field: str | None = None  # 被拆分的字段
+    chunk_count: int = 1  # 子查询数量
+    within_budget: bool = True  # 每个子查询是否都在子句预算内
+
+
+@dataclass(slots=True)
+class LargeValuePlan:
+    """处理方案: 每个子查询的 Query String 与所有子查询共享的 terms 过滤."""
+
+    report: LargeValueReport
+    query_strings: list[str]
+    terms_filters: list[Query]
+    logic_operator: LogicOperator = LogicOperator.AND
+
+    def apply(self, builder: DslQueryBuilder, index: int = 0) -> DslQueryBuilder:
+        """
+        将第 index 个子查询的条件添加到 DslQueryBuilder.
+
+        Query String 以 query_string 过滤添加（不再经过 query_string_transformer）。
+        条件之间为 OR 关系时，Query String 与 terms 过滤合并为一个 bool.should 过滤。
+
+        Args:
+            builder: DSL 查询构建器
+            index: 子查询下标
+
+        Returns:
+            builder，支持链式调用
+        """
+        clauses: list[Query] = []
+        query_string = self.query_strings[index]
+        if query_string:
+            clauses.append(DslQ("query_string", query=query_string))
+        clauses.extend(self.terms_filters)
+
+        if self.logic_operator == LogicOperator.OR and len(clauses) > 1:
+            builder.add_filter(DslQ("bool", should=clauses, minimum_should_match=1))
+        else:
+            for clause in clauses:
+                builder.add_filter(clause)
+        return builder
+
+
+@dataclass(slots=True)
+class LargeValueResult:
+    """执行结果，msearch 时为多个子查询合并后的结果."""
+
+    hits: list[Any]
+    total: int  # msearch 时为各子查询总数之和（多值字段可能重复计数）
+    report: LargeValueReport
+
+
+class LargeValueQueryPlanner:
+    """
+    大值列表查询规划器.
+
+    使用示例:
+        planner = LargeValueQueryPlanner(max_clause_count=1024)
+
+        builder = QueryStringBuilder()
+        builder.add_filter("host", QueryStringOperator.EQUAL, hosts)  # 2 万个值
+        builder.add_filter("level", QueryStringOperator.GTE, [3])
+
+        plan = planner.plan(builder)
+        plan.report.strategy  # LargeValueStrategy.TERMS
+
+        # 直接执行（msearch 时自动合并结果）
+        result = planner.execute(
+            builder, lambda: DslQueryBuilder(search_factory=lambda: Search(index="logs"))
+        )
+    """
+
+    def __init__(
+        self,
+        max_clause_count: int = DEFAULT_MAX_CLAUSE_COUNT,
+        max_terms_count: int = DEFAULT_MAX_TERMS_COUNT,
+        use_terms: bool = True,
+    ):
+        """
+        初始化规划器.
+
+        Args:
+            max_clause_count: 每个子查询的子句预算，与 ES 的 max_clause_count 保持一致
+            max_terms_count: 单个 terms 查询的最大值数量，与 ES 的 max_terms_count 保持一致
+            use_terms: 是否允许将精确匹配转为 terms 过滤（要求字段为 keyword 类型）
+        """
+        if max_clause_count < 1:
+            raise ValueError("max_clause_count must be at least 1")
+        if max_terms_count < 1:
+            raise ValueError("max_terms_count must be at least 1")
+        self.max_clause_count = max_clause_count
+        self.max_terms_count = max_terms_count
+        self.use_terms = use_terms
+
+    def plan(self, builder: QueryStringBuilder) -> LargeValuePlan:
+        """
+        为 QueryStringBuilder 生成处理方案.
+
+        Args:
+            builder: Query String 构建器，不会被修改
+
+        Returns:
+            处理方案
+        """
+        budget = self.max_clause_count
+        logic_operator = builder._logic_operator
+        filters = list(builder._filters)
+        counts = [_clause_count(f) for f in filters]
+        fixed_count = len(builder._raw_queries)
+        total = fixed_count + sum(counts)
+
+        report = LargeValueReport(
+            strategy=LargeValueStrategy.QUERY_STRING,
+            max_clause_count=budget,
+            clause_count=total,
+        )
+        if total <= budget:
+            return LargeValuePlan(report, [builder.build()], [], logic_operator)
+
+        # 1. 从大到小将精确匹配条件转为 terms 过滤
+        terms_filters: list[Query] = []
+        if self.use_terms:
+            order = sorted(range(len(filters)), key=counts.__getitem__, reverse=True)
+            for i in order:
+                if total <= budget:
+                    break
+                f = filters[i]
+                if counts[i] > 1 and _is_terms_eligible(f):
+                    terms_filters.append(self._terms_filter(f))
+                    report.terms_fields.append(f["field"])
+                    # terms 过滤本身算一个子句
+                    total -= counts[i] - 1
+                    counts[i] = 0
+            if terms_filters:
+                report.strategy = LargeValueStrategy.TERMS
+                total = sum(counts) + fixed_count + len(terms_filters)
+
+        remaining = [f for f, count in zip(filters, counts, strict=True) if count]
+        remaining_counts = [count for count in counts if count]
+
+        if total <= budget:
+            query_string = _render(builder, remaining)
+            return LargeValuePlan(report, [query_string], terms_filters, logic_operator)
+
+        # 2. 拆分最大的未取反多值 OR 条件，其余条件在每个子查询中重复
+        chunkable = [
+            i
+            for i, f in enumerate(remaining)
+            if remaining_counts[i] > 1 and _is_chunkable(f)
+        ]
+        if chunkable:
+            target = max(chunkable, key=remaining_counts.__getitem__)
+            chunk_size = budget - (total - remaining_counts[target])
+            if chunk_size >= 1:
+                f = remaining[target]
+                values = f["values"]
+                base = _render_builder(
+                    builder, remaining[:target] + remaining[target + 1 :]
+                )
+                query_strings = [
+                    base.fork()
+                    .add_filter(
+                        f["field"],
+                        f["operator"],
+                        values[start : start + chunk_size],
+                        f["group_relation"],
+                    )
+                    .build()
+                    for start in range(0, len(values), chunk_size)
+                ]
+                report.strategy = LargeValueStrategy.MSEARCH
+                report.chunked_field = f["field"]
+                report.chunk_count = len(query_strings)
+                return LargeValuePlan(
+                    report, query_strings, terms_filters, logic_operator
+                )
+
+        # 无法拆分（例如多值之间为 AND 关系或条件取反），保持原样并在报告中标记
+        report.within_budget = False
+        query_string = _render(builder, remaining)
+        return LargeValuePlan(report, [query_string], terms_filters, logic_operator)
+
+    def execute(
+        self,
+        builder: QueryStringBuilder,
+        builder_factory: Callable[[], DslQueryBuilder],
+        using: Any = None,
+    ) -> LargeValueResult:
+        """
+        规划并执行查询.
+
+        只有一个子查询时直接执行；拆分为多个子查询时通过一次 msearch 执行，
+        按排序字段合并结果（没有排序时按子查询顺序），按 _id 去重后再分页。
+
+        Args:
+            builder: Query String 构建器
+            builder_factory: DslQueryBuilder 工厂函数，设置好索引、排序、分页等参数
+            using: ES 连接别名或客户端，默认使用 Search 对象自身的设置
+
+        Returns:
+            执行结果
+        """
+        plan = self.plan(builder)
+
+        if len(plan.query_strings) == 1:
+            search = plan.apply(builder_factory()).build()
+            if using is not None:
+                search = search.using(using)
+            response = search.execute()
+            return LargeValueResult(
+                hits=list(response.hits),
+                total=_total(response),
+                report=plan.report,
+            )
+
+        # 每个子查询都从第一条开始取到目标页的末尾，合并后再分页
+        dsl_builders = [
+            plan.apply(builder_factory(), i) for i in range(len(plan.query_strings))
+        ]
+        first = dsl_builders[0]
+        start = (first._page - 1) * first._page_size
+        end = start + first._page_size
+        searches = [dsl_builder.build()[0:end] for dsl_builder in dsl_builders]
+        multi_search = MultiSearch(
+            using=using if using is not None else searches[0]._using
+        )
+        for search in searches:
+            multi_search = multi_search.add(search)
+        responses = multi_search.execute()
+
+        hits: list[Any] = []
+        seen: set[Any] = set()
+        for response in responses:
+            for hit in response.hits:
+                hit_id = (hit.meta.index, hit.meta.id)
+                if hit_id not in seen:
+                    seen.add(hit_id)
+                    hits.append(hit)
+        if first._ordering:
+            hits.sort(key=_sort_key(first._ordering))
+
+        return LargeValueResult(
+            hits=hits[start:end],
+            total=sum(_total(response) for response in responses),
+            report=plan.report,
+        )
+
+    def _terms_filter(self, f: dict[str, Any]) -> Query:
+        """生成 terms 过滤，超出 max_terms_count 时拆分为多个 terms 的 bool.should."""
+        values = f["values"]
+        size = self.max_terms_count
+        queries = [
+            DslQ("terms", **{f["field"]: values[start : start + size]})
+            for start in range(0, len(values), size)
+        ]
+        query = (
+            queries[0]
+            if len(queries) == 1
+            else DslQ("bool", should=queries, minimum_should_match=1)
+        )
+        return ~query if _TERMS_OPERATORS[f["operator"]] else query
+
+
+def _clause_count(f: dict[str, Any]) -> int:
+    """估算单个过滤条件生成的子句数."""
+    if f["operator"] in _SINGLE_CLAUSE_OPERATORS:
+        return 1
+    return max(1, len(f["values"]))
+
+
+def _is_terms_eligible(f: dict[str, Any]) -> bool:
+    """判断过滤条件能否等价地转为 terms 过滤."""
+    return f["operator"] in _TERMS_OPERATORS and f["group_relation"] == GroupRelation.OR
+
+
+def _is_chunkable(f: dict[str, Any]) -> bool:
+    """判断过滤条件能否拆分为多个子查询后取并集."""
+    return (
+        f["operator"] in _CHUNKABLE_OPERATORS
+        and f["group_relation"] == GroupRelation.OR
+    )
+
+
+def _render_builder(
+    builder: QueryStringBuilder, filters: list[dict[str, Any]]
+) -> QueryStringBuilder:
+    """基于原构建器的设置和原生查询，生成只包含指定过滤条件的构建器."""
+    rendered = builder.fork().clear()
+    rendered._filters = list(filters)
+    rendered._raw_queries = list(builder._raw_queries)
+    return rendered
+
+
+def _render(builder: QueryStringBuilder, filters: list[dict[str, Any]]) -> str:
+    """渲染只包含指定过滤条件的 Query String."""
+    if len(filters) == len(builder._filters):
+        return builder.build()
+    return _render_builder(builder, filters).build()
+
+
+def _total(response: Any) -> int:
+    """读取响应中的命中总数."""
+    total = response.hits.total
+    return total if isinstance(total, int) else total.value
+
+
+def _sort_key(ordering: list[str]) -> Callable[[Any], Any]:
+    """按 DslQueryBuilder 的排序字段（"-" 前缀表示降序）比较命中的 sort 值."""
+    descending = [item.startswith("-") for item in ordering]
+
+    def compare(a: Any, b: Any) -> int:
+        for a_value, b_value, desc in zip(
+            a.meta.sort, b.meta.sort, descending, strict=False
+        ):
+            if a_value == b_value:
+                continue
+            # None（缺失值）总是排在最后
+            if a_value is None or b_value is None:
+                return 1 if a_value is None else -1
+            result = -1 if a_value < b_value else 1
+            return -result if desc else result
+        return 0
+
+    return functools.cmp_to_key(compare)
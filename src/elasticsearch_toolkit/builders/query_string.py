@@ -1,5 +1,7 @@
 """Query String 构建器模块."""
 
+import copy
+from collections.abc import Callable
 from typing import TYPE_CHECKING, Any
 
 from elasticsearch_toolkit.core.operators import (
@@ -7,12 +9,110 @@ from elasticsearch_toolkit.core.operators import (
     LogicOperator,
     QueryStringOperator,
 )
-from elasticsearch_toolkit.core.utils import escape_query_string
+from elasticsearch_toolkit.core.utils import escape_query_strings
 from elasticsearch_toolkit.exceptions import UnsupportedOperatorError
 
 if TYPE_CHECKING:
     from elasticsearch_toolkit.core.query import Q
 
+# 渲染函数: 接收值列表，返回单个过滤条件的 Query String 片段（空字符串表示忽略）
+FilterRenderer = Callable[[list[Any]], str]
+# 值处理函数: 接收值列表，返回处理（转义、加引号等）后的值列表
+ValueProcessor = Callable[[list[Any]], list[str]]
+
+
+def _quote_values(values: list[Any]) -> list[str]:
+    """精确匹配，添加双引号（只需转义双引号）."""
+    return ['"' + str(v).replace('"', '\\"') + '"' for v in values]
+
+
+def _wildcard_values(values: list[Any]) -> list[str]:
+    """模糊匹配，去除通配符后转义，再在两侧加上通配符."""
+    stripped = [s for s in (str(v).strip("*") for v in values) if s != ""]
+    return [f"*{escaped}*" for escaped in escape_query_strings(stripped)]
+
+
+def _raw_values(values: list[Any]) -> list[str]:
+    """正则表达式，不转义."""
+    return [str(v) for v in values]
+
+
+def _escape_values(values: list[Any]) -> list[str]:
+    """其他操作符（GT, GTE, LT, LTE 等），转义值."""
+    return escape_query_strings([str(v) for v in values])
+
+
+# 操作符 -> 值处理函数，未列出的操作符使用通用转义
+_VALUE_PROCESSORS: dict[QueryStringOperator, ValueProcessor] = {
+    QueryStringOperator.EQUAL: _quote_values,
+    QueryStringOperator.NOT_EQUAL: _quote_values,
+    QueryStringOperator.INCLUDE: _wildcard_values,
+    QueryStringOperator.NOT_INCLUDE: _wildcard_values,
+    QueryStringOperator.REG: _raw_values,
+    QueryStringOperator.NREG: _raw_values,
+}
+
+# 只使用第一个值的操作符
+_SINGLE_VALUE_OPERATORS = frozenset(
+    (
+        QueryStringOperator.GT,
+        QueryStringOperator.LT,
+        QueryStringOperator.GTE,
+        QueryStringOperator.LTE,
+    )
+)
+
+
+def _make_constant_renderer(text: str) -> FilterRenderer:
+    """创建不依赖值的渲染函数（EXISTS/NOT_EXISTS）."""
+
+    def render(values: list[Any]) -> str:
+        return text
+
+    return render
+
+
+def _make_between_renderer(prefix: str, middle: str, suffix: str) -> FilterRenderer:
+    """创建 BETWEEN 渲染函数."""
+
+    def render(values: list[Any]) -> str:
+        if len(values) < 2:
+            raise ValueError("BETWEEN operator requires 2 values")
+        return f"{prefix}{values[0]}{middle}{values[1]}{suffix}"
+
+    return render
+
+
+def _make_single_value_renderer(
+    prefix: str, suffix: str, process: ValueProcessor
+) -> FilterRenderer:
+    """创建只使用第一个值的渲染函数（范围操作符）."""
+
+    def render(values: list[Any]) -> str:
+        if not values:
+            return ""
+        return prefix + process(values[:1])[0] + suffix
+
+    return render
+
+
+def _make_multi_value_renderer(
+    prefix: str, suffix: str, process: ValueProcessor, separator: str
+) -> FilterRenderer:
+    """创建多值渲染函数，多个值用 separator 连接并加括号."""
+
+    def render(values: list[Any]) -> str:
+        if not values:
+            return ""
+        processed = process(values)
+        if not processed:
+            return ""
+        if len(processed) == 1:
+            return prefix + processed[0] + suffix
+        return prefix + "(" + separator.join(processed) + ")" + suffix
+
+    return render
+
 
 class QueryStringBuilder:
     """
@@ -46,6 +146,15 @@ class QueryStringBuilder:
             .build()
         )
         # 输出: message: *timeout* AND (@timestamp: [now-1h TO now]) AND (status: "error")
+
+        # 基于公共条件派生请求级构建器（共享已渲染的片段）
+        base = QueryStringBuilder()
+        base.add_filter("env", QueryStringOperator.EQUAL, ["prod"])
+
+        request_builder = base.fork()
+        request_builder.add_filter("host", QueryStringOperator.EQUAL, ["a"])
+        query_string = request_builder.build()
+        # 输出: env: "prod" AND host: "a"
     """
 
     # Query String 操作符模板
@@ -82,6 +191,14 @@ class QueryStringBuilder:
         self._operator_mapping = operator_mapping or {}
         self._logic_operator = logic_operator
 
+        # 已渲染的过滤条件片段，与 _filters 的前缀一一对应（空字符串表示被忽略）
+        self._filter_parts: list[str] = []
+        # 缓存的构建结果及其对应的 (过滤条件数, 原生查询数)
+        self._query_string: str = ""
+        self._built_size: tuple[int, int] | None = None
+        # 列表是否与 fork() 出的构建器共享，共享时在首次修改前复制
+        self._shared: bool = False
+
     def add_filter(
         self,
         field: str,
@@ -104,19 +221,22 @@ class QueryStringBuilder:
             self，支持链式调用
         """
 
-        if not isinstance(values, list):
-            values = [values]
+        # 复制值列表，调用方之后修改列表不会影响已缓存的片段
+        values = list(values) if isinstance(values, list) else [values]
 
         # 操作符映射
         if not isinstance(operator, QueryStringOperator):
             operator = self._operator_mapping.get(operator, QueryStringOperator.EQUAL)
 
+        self._detach()
         self._filters.append(
             {
                 "field": field,
                 "operator": operator,
                 "values": values,
                 "group_relation": group_relation,
+                # 操作符只在添加时解析一次，build() 直接调用渲染函数
+                "renderer": self._resolve_renderer(field, operator, group_relation),
             }
         )
         return self
@@ -141,6 +261,7 @@ class QueryStringBuilder:
         if raw_query is None or (isinstance(raw_query, str) and not raw_query.strip()):
             return self
 
+        self._detach()
         self._raw_queries.append(raw_query.strip())
         return self
 
@@ -164,128 +285,121 @@ class QueryStringBuilder:
 
         query_str = q.build()
         if query_str:
+            self._detach()
             self._raw_queries.append(query_str)
 
         return self
 
+    def fork(self) -> "QueryStringBuilder":
+        """
+        派生一个新的构建器.
+
+        新构建器与当前构建器共享已添加的条件和已渲染的片段（写时复制），
+        任何一方之后添加或清空条件都不会影响另一方。
+        适用于从公共的基础构建器派生请求级构建器。
+
+        Returns:
+            新的构建器
+        """
+        forked = copy.copy(self)
+        self._shared = forked._shared = True
+        return forked
+
     def build(self) -> str:
         """
         构建 Query String.
 
+        每个过滤条件只渲染一次，结果会被缓存；添加条件后再次构建时只渲染新增的条件。
+
         Returns:
             Query String 字符串
         """
-        query_parts = []
-
-        for f in self._filters:
-            query_part = self._build_single_filter(
-                field=f["field"],
-                operator=f["operator"],
-                values=f["values"],
-                group_relation=f["group_relation"],
-            )
-            if query_part:
-                query_parts.append(query_part)
+        filters = self._filters
+        raw_queries = self._raw_queries
+        size = (len(filters), len(raw_queries))
+        if self._built_size == size:
+            return self._query_string
+
+        # 只渲染新增的过滤条件，渲染到新列表中，不修改与 fork() 出的构建器共享的列表
+        filter_parts = self._filter_parts[:]
+        for f in filters[len(filter_parts) :]:
+            render = f.get("renderer") or self._get_renderer(f)
+            filter_parts.append(render(f["values"]))
+        self._filter_parts = filter_parts
+
+        query_parts = [part for part in filter_parts if part]
 
         # 添加原生 Query String，用括号包裹以确保优先级
-        for raw_query in self._raw_queries:
+        for raw_query in raw_queries:
             query_parts.append(f"({raw_query})")
 
-        return f" {self._logic_operator.value} ".join(query_parts)
+        self._query_string = f" {self._logic_operator.value} ".join(query_parts)
+        self._built_size = size
+        return self._query_string
+
+    def _get_renderer(self, f: dict[str, Any]) -> "FilterRenderer":
+        """获取过滤条件的渲染函数，不支持的操作符抛出异常."""
+        renderer = self._resolve_renderer(
+            f["field"], f["operator"], f["group_relation"]
+        )
+        if renderer is None:
+            raise UnsupportedOperatorError(f"Unsupported operator: {f['operator']}")
+        return renderer
 
-    def _build_single_filter(
+    def _resolve_renderer(
         self,
         field: str,
         operator: QueryStringOperator,
-        values: list[Any],
         group_relation: GroupRelation,
-    ) -> str:
-        """构建单个过滤条件."""
+    ) -> "FilterRenderer | None":
+        """
+        将操作符解析为预先绑定了字段前缀、后缀和值处理函数的渲染函数.
+
+        Returns:
+            渲染函数，操作符没有对应模板时返回 None
+        """
         template = self.OPERATOR_TEMPLATES.get(operator)
         if not template:
-            raise UnsupportedOperatorError(f"Unsupported operator: {operator}")
-
-        # 处理特殊操作符
-        if operator == QueryStringOperator.BETWEEN:
-            if len(values) < 2:
-                raise ValueError("BETWEEN operator requires 2 values")
-            return template.format(
-                field=field,
-                start_value=values[0],
-                end_value=values[1],
-            )
+            return None
 
         if operator in (QueryStringOperator.EXISTS, QueryStringOperator.NOT_EXISTS):
-            return template.format(field=field)
+            return _make_constant_renderer(template.format(field=field))
 
-        # 处理值
-        if not values:
-            return ""
+        if operator == QueryStringOperator.BETWEEN:
+            prefix, middle, suffix = template.format(
+                field=field, start_value="\0", end_value="\0"
+            ).split("\0")
+            return _make_between_renderer(prefix, middle, suffix)
 
-        processed_values = self._process_values(values, operator)
-        if not processed_values:
-            return ""
+        prefix, suffix = template.format(field=field, value="\0").split("\0")
+        process = _VALUE_PROCESSORS.get(operator, _escape_values)
+
+        # 对于范围操作符，只使用第一个值，不需要多值组合
+        if operator in _SINGLE_VALUE_OPERATORS:
+            return _make_single_value_renderer(prefix, suffix, process)
 
-        # 对于范围操作符和正则表达式，只使用第一个值，不需要多值组合
-        if operator in (
-            QueryStringOperator.GT,
-            QueryStringOperator.LT,
-            QueryStringOperator.GTE,
-            QueryStringOperator.LTE,
-        ):
-            return template.format(
-                field=field, value=processed_values[0] if processed_values else ""
-            )
-
-        # 组合多个值
         logic = (
             LogicOperator.OR.value
             if group_relation == GroupRelation.OR
             else LogicOperator.AND.value
         )
-        value_str = f" {logic} ".join(str(v) for v in processed_values)
-
-        if len(processed_values) > 1:
-            value_str = f"({value_str})"
+        return _make_multi_value_renderer(prefix, suffix, process, f" {logic} ")
 
-        return template.format(field=field, value=value_str)
-
-    def _process_values(
-        self,
-        values: list[Any],
-        operator: QueryStringOperator,
-    ) -> list[str]:
-        """处理值列表，所有值默认进行转义."""
-        result = []
-
-        for value in values:
-            if operator in (
-                QueryStringOperator.INCLUDE,
-                QueryStringOperator.NOT_INCLUDE,
-            ):
-                # 去除通配符
-                value = str(value).strip("*")
-                if value == "":
-                    continue
-                # 模糊匹配，转义后直接返回（模板中已包含通配符）
-                escaped = escape_query_string(value)
-                escaped = f"*{escaped}*"
-            elif operator in (QueryStringOperator.EQUAL, QueryStringOperator.NOT_EQUAL):
-                # 精确匹配，添加双引号（只需转义双引号）
-                escaped = str(value).replace('"', '\\"')
-                escaped = f'"{escaped}"'
-            elif operator in (QueryStringOperator.REG, QueryStringOperator.NREG):
-                # 正则表达式操作符，不转义
-                escaped = str(value)
-            else:
-                # 其他操作符（GT, GTE, LT, LTE 等），转义值
-                escaped = escape_query_string(str(value))
-
-            result.append(escaped)
-        return result
+    def _detach(self) -> None:
+        """写时复制：修改与 fork() 出的构建器共享的列表之前先复制."""
+        if self._shared:
+            self._filters = list(self._filters)
+            self._raw_queries = list(self._raw_queries)
+            self._filter_parts = list(self._filter_parts)
+            self._shared = False
 
     def clear(self) -> "QueryStringBuilder":
         """清空所有过滤条件."""
-        self._filters.clear()
-        self._raw_queries.clear()
+        # 替换而不是原地清空，避免影响 fork() 出的构建器
+        self._filters = []
+        self._raw_queries = []
+        self._filter_parts = []
+        self._query_string = ""
+        self._built_size = None
+        self._shared = False
         return self
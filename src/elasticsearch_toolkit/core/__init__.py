@@ -1,22 +1,26 @@
 """核心模块导出."""
 
 from elasticsearch_toolkit.core.conditions import (
+    ConditionCompiler,
     ConditionItem,
     ConditionParser,
+    ConditionPlan,
     DefaultConditionParser,
 )
 from elasticsearch_toolkit.core.constants import (
     QueryStringCharacters,
     QueryStringLogicOperators,
 )
+from elasticsearch_toolkit.core.dsl_compiler import QDslCompiler
 from elasticsearch_toolkit.core.fields import FieldMapper, QueryField
 from elasticsearch_toolkit.core.operators import (
     GroupRelation,
     LogicOperator,
     QueryStringOperator,
 )
+from elasticsearch_toolkit.core.prepared import Param, PreparedQ
 from elasticsearch_toolkit.core.query import Q
-from elasticsearch_toolkit.core.utils import escape_query_string
+from elasticsearch_toolkit.core.utils import escape_query_string, escape_query_strings
 
 __all__ = [
     "QueryStringCharacters",
@@ -25,10 +29,16 @@ __all__ = [
     "GroupRelation",
     "QueryStringOperator",
     "ConditionItem",
+    "ConditionCompiler",
     "ConditionParser",
+    "ConditionPlan",
     "DefaultConditionParser",
     "QueryField",
     "FieldMapper",
     "Q",
+    "QDslCompiler",
+    "Param",
+    "PreparedQ",
     "escape_query_string",
+    "escape_query_strings",
 ]
@@ -3,13 +3,25 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Sequence
 from dataclasses import dataclass
 from typing import Any
 
 from elasticsearch.dsl import Q
+from elasticsearch.dsl.query import (
+    Bool,
+    Exists,
+    Prefix,
+    Query,
+    Range,
+    Terms,
+    Wildcard,
+)
 
+from elasticsearch_toolkit.exceptions import ConditionParseError
 
-@dataclass
+
+@dataclass(slots=True)
 class ConditionItem:
     """条件项."""
 
@@ -36,8 +48,180 @@ class ConditionParser(ABC):
         pass
 
 
+# 条件处理函数: (字段名, 值列表) -> Q 对象，值列表一次性传入，便于批量生成查询
+# 内置处理函数直接实例化查询类，省去 Q() 按名称查找查询类的开销
+ConditionHandler = Callable[[str, list[Any]], Query | None]
+
+
+def _any_of(queries: list[Q]) -> Q:
+    """多个查询之间为 OR 关系."""
+    return queries[0] if len(queries) == 1 else Bool(should=queries)
+
+
+def _parse_terms(key: str, values: list[Any]) -> Q:
+    """精确匹配."""
+    return Terms(**{key: values})
+
+
+def _parse_neq(key: str, values: list[Any]) -> Q:
+    """不等于."""
+    return ~Terms(**{key: values})
+
+
+def _parse_include(key: str, values: list[Any]) -> Q:
+    """模糊匹配."""
+    return _any_of([Wildcard(**{key: f"*{v}*"}) for v in values])
+
+
+def _parse_exclude(key: str, values: list[Any]) -> Q:
+    """排除匹配."""
+    return ~_any_of([Wildcard(**{key: f"*{v}*"}) for v in values])
+
+
+def _range_handler(method: str) -> ConditionHandler:
+    """范围查询，只使用第一个值."""
+
+    def parse(key: str, values: list[Any]) -> Q:
+        return Range(**{key: {method: values[0] if values else values}})
+
+    return parse
+
+
+def _parse_exists(key: str, values: list[Any]) -> Q:
+    """字段存在."""
+    return Exists(field=key)
+
+
+def _parse_nexists(key: str, values: list[Any]) -> Q:
+    """字段不存在."""
+    return ~Exists(field=key)
+
+
+def _parse_prefix(key: str, values: list[Any]) -> Q:
+    """前缀匹配."""
+    return _any_of([Prefix(**{key: v}) for v in values])
+
+
+def _parse_between(key: str, values: list[Any]) -> Q:
+    """闭区间范围查询，值为 [下限, 上限]，None 表示不限."""
+    if len(values) != 2:
+        raise ConditionParseError(
+            f"between requires [lower, upper], got {values!r} for {key}"
+        )
+    return _range_query(key, values[0], values[1])
+
+
+def _parse_in_range_list(key: str, values: list[Any]) -> Q:
+    """落在任意一个闭区间内，值为 [[下限, 上限], ...]."""
+    queries = []
+    for bounds in values:
+        if not isinstance(bounds, (list, tuple)) or len(bounds) != 2:
+            raise ConditionParseError(
+                f"in_range_list requires [[lower, upper], ...], got {bounds!r} for {key}"
+            )
+        queries.append(_range_query(key, bounds[0], bounds[1]))
+    return _any_of(queries)
+
+
+def _parse_terms_lookup(key: str, values: list[Any]) -> Q:
+    """terms lookup，值为 {"index": ..., "id": ..., "path": ...}."""
+    lookup = values[0] if len(values) == 1 else None
+    if not isinstance(lookup, dict) or not {"index", "id", "path"} <= lookup.keys():
+        raise ConditionParseError(
+            f"terms_lookup requires {{index, id, path}}, got {values!r} for {key}"
+        )
+    return Terms(**{key: dict(lookup)})
+
+
+def _range_query(key: str, lower: Any, upper: Any) -> Q:
+    """构造闭区间范围查询."""
+    bounds = {}
+    if lower is not None:
+        bounds["gte"] = lower
+    if upper is not None:
+        bounds["lte"] = upper
+    if not bounds:
+        raise ConditionParseError(f"Range for {key} has neither lower nor upper bound")
+    return Range(**{key: bounds})
+
+
 class DefaultConditionParser(ConditionParser):
-    """默认条件解析器."""
+    """
+    默认条件解析器.
+
+    按 method 在处理函数注册表中查找处理函数，未注册的 method 按 eq（terms）处理。
+    值统一转为列表后一次性传给处理函数。
+
+    内置方法:
+    - eq/neq: terms / 取反的 terms
+    - include/exclude: wildcard（*value*）/ 取反的 wildcard
+    - gt/gte/lt/lte: range（只使用第一个值）
+    - exists/nexists: exists / 取反的 exists
+    - prefix: prefix，多个值之间为 OR
+    - between: [下限, 上限] 闭区间 range
+    - in_range_list: [[下限, 上限], ...] 多个闭区间之间为 OR
+    - terms_lookup: {"index": ..., "id": ..., "path": ...} terms lookup
+
+    使用示例:
+        parser = DefaultConditionParser()
+        parser.register("ip_in", lambda key, values: Q("terms", **{key: values}))
+    """
+
+    METHOD_HANDLERS: dict[str, ConditionHandler] = {
+        "eq": _parse_terms,
+        "neq": _parse_neq,
+        "include": _parse_include,
+        "exclude": _parse_exclude,
+        "gt": _range_handler("gt"),
+        "gte": _range_handler("gte"),
+        "lt": _range_handler("lt"),
+        "lte": _range_handler("lte"),
+        "exists": _parse_exists,
+        "nexists": _parse_nexists,
+        "prefix": _parse_prefix,
+        "between": _parse_between,
+        "in_range_list": _parse_in_range_list,
+        "terms_lookup": _parse_terms_lookup,
+    }
+
+    def __init__(self, handlers: dict[str, ConditionHandler] | None = None):
+        """
+        初始化解析器.
+
+        Args:
+            handlers: 额外注册（或覆盖内置）的处理函数，method -> 处理函数
+        """
+        self._handlers = {**self.METHOD_HANDLERS, **(handlers or {})}
+
+    def register(
+        self, method: str, handler: ConditionHandler
+    ) -> DefaultConditionParser:
+        """
+        注册处理函数.
+
+        Args:
+            method: 条件方法名
+            handler: 处理函数，参数为字段名和值列表，返回 Q 对象或 None
+
+        Returns:
+            self，支持链式调用
+        """
+        if not callable(handler):
+            raise ValueError(f"Handler for {method!r} must be callable")
+        self._handlers[method] = handler
+        return self
+
+    def get_handler(self, method: str) -> ConditionHandler:
+        """
+        获取处理函数.
+
+        Args:
+            method: 条件方法名
+
+        Returns:
+            处理函数，未注册的 method 返回 eq 的处理函数
+        """
+        return self._handlers.get(method) or self._handlers["eq"]
 
     def parse(self, condition: ConditionItem) -> Q | None:
         """
@@ -48,45 +232,328 @@ class DefaultConditionParser(ConditionParser):
 
         Returns:
             Q 对象
+
+        Raises:
+            ConditionParseError: 当值不符合方法的要求时
         """
-        key = condition.key
-        method = condition.method
         value = condition.value
+        return self.get_handler(condition.method)(
+            condition.key, value if isinstance(value, list) else [value]
+        )
+
+
+class ConditionCompiler:
+    """
+    条件列表编译器.
+
+    条件按顺序组合：每个条件的 condition（and/or）表示它与前面所有条件组合后的结果
+    之间的关系，即 ``((c1 and c2) or c3) and c4``。与依次使用 ``&``/``|`` 组合 Q 对象
+    的结果等价，但输出为扁平的 bool 查询:
+    - 连续的 and 条件放入同一个 bool.filter，取反条件（neq/exclude/nexists）直接放入
+      同一个 bool.must_not，而不是各自包一层 bool
+    - 连续的 or 条件放入同一个 bool.should + minimum_should_match=1；or 组之后的
+      and 条件与该组放在同一个 bool 中（should + filter/must_not）
+    - bool.should 中同字段的 terms（eq）合并为一个 terms，bool.must_not 中同字段的
+      terms（neq）同样合并，值去重
+    - 只有一个子句时不再包装 bool
+
+    只有连续相同连接符的条件会被展平。and 与 or 交替出现时（如 ``a and b or c and d
+    or e``），按从左到右的组合语义，前面的组合结果整体是下一组的一个子句，每次由 and
+    转为 or 都会增加一层 bool 嵌套；消除这层嵌套需要把后续的 and 条件复制到每个 should
+    分支中，输出反而更大。
+
+    使用示例:
+        compiler = ConditionCompiler()
+        q = compiler.compile([
+            {"key": "status", "method": "eq", "value": ["error"]},
+            {"key": "status", "method": "eq", "value": ["fatal"], "condition": "or"},
+        ])
+        # q.to_dict(): {"terms": {"status": ["error", "fatal"]}}
+    """
+
+    def __init__(self, condition_parser: ConditionParser | None = None):
+        """
+        初始化编译器.
+
+        Args:
+            condition_parser: 条件解析器，默认使用 DefaultConditionParser
+        """
+        self._condition_parser = condition_parser or DefaultConditionParser()
+
+    def compile(self, conditions: Iterable[dict]) -> Query | None:
+        """
+        编译条件列表.
+
+        Args:
+            conditions: 条件列表，每项包含 key、method、value、condition
+
+        Returns:
+            elasticsearch.dsl 查询对象，没有有效条件时返回 None
+        """
+        return self.prepare(conditions).compile()
+
+    def prepare(self, conditions: Iterable[dict]) -> ConditionPlan:
+        """
+        预编译条件列表.
+
+        字段名、处理函数和组合方式只解析一次，返回的 ConditionPlan 可以对多组值
+        重复编译。
+
+        Args:
+            conditions: 条件列表，每项包含 key、method、value、condition
+
+        Returns:
+            ConditionPlan 对象
+        """
+        parser = self._condition_parser
+        # 未覆盖 parse() 的默认解析器直接调用处理函数，不再为每个条件创建 ConditionItem
+        use_handlers = (
+            isinstance(parser, DefaultConditionParser)
+            and type(parser).parse is DefaultConditionParser.parse
+        )
+
+        steps: list[tuple[str, str, _ValueParser]] = []
+        values: list[Any] = []
+        for cond in conditions:
+            method = cond.get("method", "eq")
+            if use_handlers:
+                parse_value = _vectorize(parser.get_handler(method))
+            else:
+                parse_value = _parse_with(parser, method, cond.get("condition", "and"))
+            op = "or" if cond.get("condition") == "or" else "and"
+            steps.append((op, cond["key"], parse_value))
+            values.append(cond["value"])
+        return ConditionPlan(self, steps, values)
+
+    def _combine_chain(
+        self, clauses: Iterable[tuple[str, Query | None]]
+    ) -> Query | None:
+        """按顺序组合 (连接符, 子句)，忽略为 None 的子句."""
+        connector: str | None = None
+        combined: list[Query] = []
+
+        for op, q in clauses:
+            if q is None:
+                continue
+
+            # 第一个有效条件的 condition 不参与组合
+            if not combined:
+                combined.append(q)
+                continue
+
+            if connector is None or connector == op:
+                connector = op
+                combined.append(q)
+            else:
+                # 连接符变化时，前面的条件整体作为新一组的第一个子句
+                combined = [self._combine(connector, combined), q]
+                connector = op
+
+        if not combined:
+            return None
+        if connector is None:
+            return combined[0]
+        return self._combine(connector, combined)
+
+    def _combine(self, connector: str, clauses: list[Query]) -> Query:
+        """将同一连接符的子句组合为扁平的 bool 查询."""
+        if connector == "or":
+            should: list[Query] = []
+            for clause in clauses:
+                if _is_plain_should(clause):
+                    should.extend(clause.should)
+                else:
+                    should.append(clause)
+            should = _merge_terms(should)
+            if len(should) == 1:
+                return should[0]
+            return Q("bool", should=should, minimum_should_match=1)
+
+        filters: list[Query] = []
+        must_not: list[Query] = []
+        should: list[Query] | None = None
+        for clause in clauses:
+            if (
+                isinstance(clause, Bool)
+                and clause._params
+                and (clause._params.keys() <= {"filter", "must_not"})
+            ):
+                filters.extend(clause._params.get("filter", ()))
+                must_not.extend(clause._params.get("must_not", ()))
+            elif should is None and _is_plain_should(clause):
+                # (a or b) and c 可以表示为同一个 bool 的 should + filter
+                should = list(clause.should)
+            else:
+                filters.append(clause)
+        # NOT a in X AND NOT a in Y 等价于 NOT a in (X + Y)
+        must_not = _merge_terms(must_not)
+        if should is None and not must_not and len(filters) == 1:
+            return filters[0]
+
+        params: dict[str, Any] = {}
+        if filters:
+            params["filter"] = filters
+        if must_not:
+            params["must_not"] = must_not
+        if should is not None:
+            params["should"] = should
+            params["minimum_should_match"] = 1
+        return Q("bool", **params)
+
+
+# 单个条件的解析函数: (字段名, 原始值) -> Q 对象
+_ValueParser = Callable[[str, Any], Query | None]
+
+
+def _vectorize(handler: ConditionHandler) -> _ValueParser:
+    """将处理函数包装为接受原始值的解析函数."""
+
+    def parse_value(key: str, value: Any) -> Query | None:
+        return handler(key, value if isinstance(value, list) else [value])
+
+    return parse_value
+
+
+def _parse_with(parser: ConditionParser, method: str, condition: str) -> _ValueParser:
+    """使用自定义解析器的 parse() 解析条件."""
+
+    def parse_value(key: str, value: Any) -> Query | None:
+        return parser.parse(
+            ConditionItem(key=key, method=method, value=value, condition=condition)
+        )
+
+    return parse_value
+
+
+class ConditionPlan:
+    """
+    预编译的条件列表.
+
+    由 ConditionCompiler.prepare() 生成，保存每个条件的字段名、处理函数和组合方式，
+    编译时只需按新的值调用处理函数并组合。
+
+    使用示例:
+        plan = ConditionCompiler().prepare([
+            {"key": "status", "method": "eq", "value": ["error"]},
+            {"key": "level", "method": "between", "value": [1, 3]},
+        ])
+        q1 = plan.compile()                          # 使用准备时的值
+        q2 = plan.compile([["fatal"], [3, 5]])       # 使用新的值
+        queries = plan.compile_many(value_sets)
+    """
+
+    __slots__ = ("_compiler", "_steps", "_values")
+
+    def __init__(
+        self,
+        compiler: ConditionCompiler,
+        steps: list[tuple[str, str, _ValueParser]],
+        values: list[Any],
+    ):
+        self._compiler = compiler
+        self._steps = steps
+        self._values = values
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    @property
+    def fields(self) -> list[str]:
+        """按顺序返回各条件的字段名."""
+        return [key for _, key, _ in self._steps]
+
+    def compile(self, values: Sequence[Any] | None = None) -> Query | None:
+        """
+        按一组值编译.
+
+        Args:
+            values: 与条件一一对应的值，为 None 时使用准备时的值
+
+        Returns:
+            elasticsearch.dsl 查询对象，没有有效条件时返回 None
+
+        Raises:
+            ValueError: 当值的数量与条件数量不一致时
+        """
+        if values is None:
+            values = self._values
+        elif len(values) != len(self._steps):
+            raise ValueError(f"Expected {len(self._steps)} values, got {len(values)}")
+        return self._compiler._combine_chain(
+            (op, parse_value(key, value))
+            for (op, key, parse_value), value in zip(self._steps, values)
+        )
+
+    def compile_many(self, value_sets: Iterable[Sequence[Any]]) -> list[Query | None]:
+        """
+        按多组值编译.
+
+        Args:
+            value_sets: 多组值，每组与条件一一对应
+
+        Returns:
+            每组值对应的查询对象列表
+        """
+        return [self.compile(values) for values in value_sets]
+
+
+def _is_plain_should(clause: Query) -> bool:
+    """判断是否为至少匹配一个 should 子句的 bool 查询."""
+    if not isinstance(clause, Bool) or "should" not in clause._params:
+        return False
+    params = clause._params
+    return params.keys() <= {"should", "minimum_should_match"} and (
+        params.get("minimum_should_match", 1) == 1
+    )
+
+
+def _terms_field(clause: Query) -> str | None:
+    """返回只包含一个字段值列表的 terms 查询的字段名，其他查询返回 None."""
+    if not isinstance(clause, Terms) or len(clause._params) != 1:
+        return None
+    field, values = next(iter(clause._params.items()))
+    return field if isinstance(values, (list, tuple)) else None
+
+
+def _unique(values: list[Any]) -> list[Any]:
+    """按出现顺序去重，类型不同的值（1、True、1.0）不视为重复."""
+    try:
+        return [value for _, value in dict.fromkeys((type(v), v) for v in values)]
+    except TypeError:
+        unique: list[Any] = []
+        for value in values:
+            if not any(type(u) is type(value) and u == value for u in unique):
+                unique.append(value)
+        return unique
+
+
+def _merge_terms(clauses: list[Query]) -> list[Query]:
+    """合并同字段的 terms 查询（取并集），合并后的查询位于该字段第一次出现的位置."""
+    merged: list[Any] = []
+    positions: dict[str, int] = {}
+    for clause in clauses:
+        field = _terms_field(clause)
+        if field is None:
+            merged.append(clause)
+        elif field in positions:
+            merged[positions[field]][1].extend(clause._params[field])
+        else:
+            positions[field] = len(merged)
+            merged.append((field, list(clause._params[field]), clause))
 
-        if method == "include":
-            # 模糊匹配
-            if isinstance(value, list):
-                queries = [Q("wildcard", **{key: f"*{v}*"}) for v in value]
-                return queries[0] if len(queries) == 1 else Q("bool", should=queries)
-            return Q("wildcard", **{key: f"*{value}*"})
-
-        elif method == "exclude":
-            # 排除匹配
-            if isinstance(value, list):
-                queries = [Q("wildcard", **{key: f"*{v}*"}) for v in value]
-                return ~(queries[0] if len(queries) == 1 else Q("bool", should=queries))
-            return ~Q("wildcard", **{key: f"*{value}*"})
-
-        elif method in ("gte", "gt", "lte", "lt"):
-            # 范围查询
-            if isinstance(value, list) and value:
-                value = value[0]
-            return Q("range", **{key: {method: value}})
-
-        elif method == "neq":
-            # 不等于
-            if not isinstance(value, list):
-                value = [value]
-            return ~Q("terms", **{key: value})
-
-        elif method == "exists":
-            return Q("exists", field=key)
-
-        elif method == "nexists":
-            return ~Q("exists", field=key)
+    if not positions:
+        return clauses
 
+    result: list[Query] = []
+    for item in merged:
+        if not isinstance(item, tuple):
+            result.append(item)
+            continue
+        field, values, original = item
+        unique = _unique(values)
+        if unique == original._params[field]:
+            # 未合并且没有重复值时保留原查询对象
+            result.append(original)
         else:
-            # 默认 terms 查询
-            if not isinstance(value, list):
-                value = [value]
-            return Q("terms", **{key: value})
+            result.append(Q("terms", **{field: unique}))
+    return result
@@ -0,0 +1,209 @@
+"""
+Q 对象 DSL 编译模块
+
+将 Q 对象直接编译为 elasticsearch.dsl 的 bool/term/terms/range/wildcard/regexp/exists 查询，
+避免 Query String 在每个分片上被重复解析，并且可以利用 filter 缓存。
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from elasticsearch.dsl import Q as DslQ
+from elasticsearch.dsl.query import Bool, Query
+
+from elasticsearch_toolkit.core.operators import QueryStringOperator
+from elasticsearch_toolkit.core.query import (
+    OPERATOR_TEMPLATES,
+    Condition,
+    Q,
+    _ValueGroup,
+)
+from elasticsearch_toolkit.exceptions import UnsupportedOperatorError
+
+# 与 OPERATOR_TEMPLATES 的语义一一对应: 操作符 -> (查询类型, 是否取反)
+OPERATOR_DSL_TYPES = {
+    QueryStringOperator.EXISTS: ("exists", False),
+    QueryStringOperator.NOT_EXISTS: ("exists", True),
+    QueryStringOperator.EQUAL: ("term", False),
+    QueryStringOperator.NOT_EQUAL: ("term", True),
+    QueryStringOperator.INCLUDE: ("wildcard", False),
+    QueryStringOperator.NOT_INCLUDE: ("wildcard", True),
+    QueryStringOperator.GT: ("range", False),
+    QueryStringOperator.LT: ("range", False),
+    QueryStringOperator.GTE: ("range", False),
+    QueryStringOperator.LTE: ("range", False),
+    QueryStringOperator.REG: ("regexp", False),
+    QueryStringOperator.NREG: ("regexp", True),
+}
+
+# wildcard 查询中需要转义的字符
+_WILDCARD_ESCAPE_TABLE = str.maketrans({"\\": "\\\\", "*": "\\*", "?": "\\?"})
+
+
+class QDslCompiler:
+    """
+    Q 对象到 ES DSL 的编译器.
+
+    编译规则（与 Q.build() 生成的 Query String 语义保持一致）:
+    - AND 节点 -> bool.filter，取反的子条件合并到同一个 bool.must_not
+    - OR 节点 -> bool.should + minimum_should_match=1
+    - 取反节点 -> bool.must_not
+    - EQUAL -> term（optimize() 合并出的多值条件 -> terms）
+    - INCLUDE -> wildcard（*value*）
+    - GT/GTE/LT/LTE -> range
+    - REG -> regexp
+    - EXISTS -> exists
+
+    值为空的条件与 Query String 中一样会被忽略。
+
+    使用示例:
+        compiler = QDslCompiler()
+        dsl_q = compiler.compile(Q(status="error") & Q(level__gte=3))
+        # dsl_q.to_dict():
+        # {"bool": {"filter": [{"term": {"status": "error"}},
+        #                      {"range": {"level": {"gte": "3"}}}]}}
+    """
+
+    def compile(self, q: Q) -> Query | None:
+        """
+        编译 Q 对象.
+
+        Args:
+            q: Q 对象
+
+        Returns:
+            elasticsearch.dsl 查询对象，Q 对象为空（或所有条件都为空）时返回 None
+
+        Raises:
+            UnsupportedOperatorError: 当使用不支持的操作符时
+        """
+        result: Query | None = None
+        # 栈帧: (节点, 子节点迭代器, 已编译的子查询)
+        stack: list[tuple[Q, Any, list[Query]]] = [(q, iter(q._children), [])]
+
+        while stack:
+            node, children, compiled = stack[-1]
+            for child in children:
+                if not isinstance(child, Q):
+                    clause = self.compile_condition(child)
+                    if clause is not None:
+                        compiled.append(clause)
+                elif child._child_count():
+                    stack.append((child, iter(child._children), []))
+                    break
+            else:
+                stack.pop()
+                result = self._compile_node(node._connector, node._negated, compiled)
+                if stack and result is not None:
+                    stack[-1][2].append(result)
+
+        return result
+
+    def _compile_node(
+        self, connector: str, negated: bool, clauses: list[Query]
+    ) -> Query | None:
+        """编译逻辑节点."""
+        if not clauses:
+            return None
+
+        if len(clauses) == 1:
+            combined = clauses[0]
+        elif connector == Q.OR:
+            combined = DslQ("bool", should=clauses, minimum_should_match=1)
+        else:
+            positives: list[Query] = []
+            negatives: list[Query] = []
+            for clause in clauses:
+                if _is_pure_must_not(clause):
+                    negatives.extend(clause.must_not)
+                else:
+                    positives.append(clause)
+
+            params: dict[str, list[Query]] = {}
+            if positives:
+                params["filter"] = positives
+            if negatives:
+                params["must_not"] = negatives
+            combined = DslQ("bool", **params)
+
+        if negated:
+            return _negate(combined)
+        return combined
+
+    def compile_condition(self, condition: Condition) -> Query | None:
+        """
+        编译单个条件.
+
+        Args:
+            condition: 条件，包含 field, operator, value
+
+        Returns:
+            elasticsearch.dsl 查询对象，值为空时返回 None
+        """
+        field, operator, raw_value = condition
+
+        if operator not in OPERATOR_TEMPLATES or operator not in OPERATOR_DSL_TYPES:
+            raise UnsupportedOperatorError(f"Unsupported operator: {operator}")
+
+        query_type, negate = OPERATOR_DSL_TYPES[operator]
+
+        if query_type == "exists":
+            clause: Query = DslQ("exists", field=field)
+        else:
+            raw_values = (
+                raw_value if isinstance(raw_value, _ValueGroup) else (raw_value,)
+            )
+            values = [
+                value
+                for value in (_normalize_value(operator, v) for v in raw_values)
+                if value
+            ]
+            if not values:
+                return None
+
+            if query_type == "term":
+                if len(values) == 1:
+                    clause = DslQ("term", **{field: values[0]})
+                else:
+                    clause = DslQ("terms", **{field: values})
+            elif query_type == "wildcard":
+                wildcards = [
+                    DslQ("wildcard", **{field: {"value": f"*{value}*"}})
+                    for value in values
+                ]
+                clause = (
+                    wildcards[0]
+                    if len(wildcards) == 1
+                    else DslQ("bool", should=wildcards, minimum_should_match=1)
+                )
+            elif query_type == "range":
+                clause = DslQ("range", **{field: {operator.value: values[0]}})
+            else:
+                clause = DslQ("regexp", **{field: values[0]})
+
+        return _negate(clause) if negate else clause
+
+
+def _normalize_value(operator: QueryStringOperator, raw_value: Any) -> str:
+    """按 Query String 构建时相同的规则处理值，返回空字符串表示该值无效."""
+    if raw_value is None:
+        return ""
+
+    value = str(raw_value).strip()
+    if operator in (QueryStringOperator.INCLUDE, QueryStringOperator.NOT_INCLUDE):
+        # 与 Query String 一致：去除前后的通配符，中间的字符按字面匹配
+        return value.strip("*").translate(_WILDCARD_ESCAPE_TABLE)
+    return value
+
+
+def _is_pure_must_not(clause: Query) -> bool:
+    """判断是否为只包含 must_not 的 bool 查询."""
+    return isinstance(clause, Bool) and set(clause._params) == {"must_not"}
+
+
+def _negate(clause: Query) -> Query:
+    """对查询取反，双重否定直接还原."""
+    if _is_pure_must_not(clause) and len(clause.must_not) == 1:
+        return clause.must_not[0]
+    return DslQ("bool", must_not=[clause])
@@ -0,0 +1,203 @@
+"""
+预编译 Q 模板模块
+
+对于结构固定、只有值变化的查询，预先确定操作符、模板和括号，
+之后每次绑定值时只做转义和拼接。
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from elasticsearch_toolkit.core.operators import QueryStringOperator
+from elasticsearch_toolkit.core.query import (
+    _VALUE_ESCAPERS,
+    OPERATOR_TEMPLATES,
+    Condition,
+    Q,
+)
+from elasticsearch_toolkit.core.utils import escape_query_string
+from elasticsearch_toolkit.exceptions import UnsupportedOperatorError
+
+# 渲染函数: 接收参数值字典，返回 Query String 片段（空字符串表示该部分被忽略）
+Renderer = Callable[[Mapping[str, Any]], str]
+
+
+@dataclass(frozen=True)
+class Param:
+    """Q 模板中的值占位符."""
+
+    name: str
+
+
+class PreparedQ:
+    """
+    预编译的 Q 模板.
+
+    对 Q 对象只遍历一次，把固定部分渲染为常量字符串，把 Param 条件编译为
+    预先绑定了前缀、后缀和转义函数的渲染函数。bind() 的结果与把值代入 Q 对象后
+    调用 build() 完全一致（值为空的条件同样会被忽略）。
+
+    使用示例:
+        template = (
+            Q(service=Param("service"))
+            & Q(level__gte=Param("level"))
+            & Q(message__contains=Param("message"))
+        ).prepare()
+
+        template.bind(service="api", level=3, message="timeout")
+        # 输出: service: "api" AND level: >=3 AND message: *timeout*
+    """
+
+    def __init__(self, q: Q):
+        """
+        初始化模板.
+
+        Args:
+            q: 包含 Param 占位符的 Q 对象
+
+        Raises:
+            UnsupportedOperatorError: 当使用不支持的操作符时
+        """
+        self._params: set[str] = set()
+        self._renderer: str | Renderer = self._compile(q)
+
+    @property
+    def params(self) -> frozenset[str]:
+        """模板中的参数名."""
+        return frozenset(self._params)
+
+    def bind(self, **values: Any) -> str:
+        """
+        绑定参数值并生成 Query String.
+
+        Args:
+            **values: 参数名到值的映射
+
+        Returns:
+            Query String 字符串
+
+        Raises:
+            ValueError: 缺少参数值时
+        """
+        renderer = self._renderer
+        if renderer.__class__ is str:
+            return renderer  # type: ignore[return-value]
+
+        missing = self._params.difference(values)
+        if missing:
+            raise ValueError(f"Missing values for parameters: {sorted(missing)}")
+        return renderer(values)  # type: ignore[operator]
+
+    def _compile(self, q: Q) -> str | Renderer:
+        """迭代编译 Q 对象，返回常量字符串或渲染函数."""
+        result: str | Renderer = ""
+        # 栈帧: (节点, 子节点迭代器, 已编译的子部分)
+        stack: list[tuple[Q, Any, list[tuple[str | Renderer, bool]]]] = [
+            (q, iter(q._children), [])
+        ]
+
+        while stack:
+            node, children, parts = stack[-1]
+            for child in children:
+                if not isinstance(child, Q):
+                    parts.append((self._compile_condition(node, child), False))
+                elif child._child_count():
+                    stack.append((child, iter(child._children), []))
+                    break
+            else:
+                stack.pop()
+                result = _compile_node(node._connector, node._negated, parts)
+                if stack:
+                    parent = stack[-1][0]
+                    # 括号只取决于节点结构，在预编译时确定
+                    needs_paren = (
+                        node._child_count() > 1
+                        or node._negated
+                        or node._connector != parent._connector
+                    )
+                    stack[-1][2].append((result, needs_paren))
+
+        return result
+
+    def _compile_condition(self, node: Q, condition: Condition) -> str | Renderer:
+        """编译单个条件，不含 Param 的条件直接渲染为常量."""
+        field, operator, value = condition
+
+        if not isinstance(value, Param):
+            return node._build_single_condition(condition)
+
+        template = OPERATOR_TEMPLATES.get(operator)
+        if not template:
+            raise UnsupportedOperatorError(f"Unsupported operator: {operator}")
+
+        if operator in (QueryStringOperator.EXISTS, QueryStringOperator.NOT_EXISTS):
+            return template.format(field=field)
+
+        self._params.add(value.name)
+        prefix, suffix = template.format(field=field, value="\0").split("\0")
+        return _make_condition_renderer(
+            value.name,
+            prefix,
+            suffix,
+            _VALUE_ESCAPERS.get(operator, escape_query_string),
+        )
+
+
+def _make_condition_renderer(
+    name: str, prefix: str, suffix: str, escape: Callable[[str], str]
+) -> Renderer:
+    """创建单个 Param 条件的渲染函数."""
+
+    def render(values: Mapping[str, Any]) -> str:
+        raw_value = values[name]
+        if raw_value is None:
+            return ""
+        value = str(raw_value).strip()
+        if value == "":
+            return ""
+        escaped_value = escape(value)
+        if not escaped_value:
+            return ""
+        return prefix + escaped_value + suffix
+
+    return render
+
+
+def _compile_node(
+    connector: str, negated: bool, parts: list[tuple[str | Renderer, bool]]
+) -> str | Renderer:
+    """编译逻辑节点，所有子部分都是常量时直接渲染为常量."""
+    separator = f" {connector} "
+
+    if all(part.__class__ is str for part, _ in parts):
+        texts = [f"({part})" if paren else part for part, paren in parts if part]
+        result = separator.join(texts)  # type: ignore[arg-type]
+        return f"NOT ({result})" if negated and result else result
+
+    # 常量部分预先加上括号，空的常量部分直接丢弃
+    entries: list[tuple[str | Renderer, bool]] = []
+    for part, paren in parts:
+        if part.__class__ is str:
+            if part:
+                entries.append((f"({part})" if paren else part, False))
+        else:
+            entries.append((part, paren))
+
+    if len(entries) == 1 and not negated and not entries[0][1]:
+        return entries[0][0]
+
+    def render(values: Mapping[str, Any]) -> str:
+        texts = []
+        for part, paren in entries:
+            text = part if part.__class__ is str else part(values)  # type: ignore[operator]
+            if text:
+                texts.append(f"({text})" if paren else text)
+        result = separator.join(texts)
+        if negated and result:
+            return f"NOT ({result})"
+        return result
+
+    return render
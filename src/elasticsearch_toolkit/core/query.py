@@ -4,7 +4,8 @@ Q 对象模块
 提供类似 Django ORM Q 对象的灵活查询组合能力。
 """
 
-from typing import Any
+import weakref
+from typing import Any, NamedTuple
 
 from elasticsearch_toolkit.core.operators import QueryStringOperator
 from elasticsearch_toolkit.core.utils import escape_query_string
@@ -50,6 +51,169 @@ OPERATOR_TEMPLATES = {
 }
 
 
+class Condition(NamedTuple):
+    """Q 对象中的单个条件（叶子节点）."""
+
+    field: str
+    operator: QueryStringOperator
+    value: Any
+
+
+class _ValueGroup(tuple):
+    """optimize() 合并同字段条件后得到的多值（OR 关系）."""
+
+
+# 多值条件中单个值的格式，仅 EQUAL/INCLUDE 会被合并
+_VALUE_GROUP_FORMATS = {
+    QueryStringOperator.EQUAL: '"{value}"',
+    QueryStringOperator.INCLUDE: "*{value}*",
+}
+
+
+def _escape_include_value(value: str) -> str:
+    """模糊匹配：去除前后的通配符后转义（模板中已包含通配符）."""
+    value = value.strip("*")
+    if value == "":
+        return ""
+    return escape_query_string(value)
+
+
+def _escape_exact_value(value: str) -> str:
+    """精确匹配：只转义双引号."""
+    return value.replace('"', '\\"')
+
+
+def _keep_value(value: str) -> str:
+    """正则表达式：不转义."""
+    return value
+
+
+# 操作符 -> 值转义函数，未列出的操作符使用通用转义
+_VALUE_ESCAPERS = {
+    QueryStringOperator.INCLUDE: _escape_include_value,
+    QueryStringOperator.NOT_INCLUDE: _escape_include_value,
+    QueryStringOperator.EQUAL: _escape_exact_value,
+    QueryStringOperator.NOT_EQUAL: _escape_exact_value,
+    QueryStringOperator.REG: _keep_value,
+    QueryStringOperator.NREG: _keep_value,
+}
+
+
+def _escape_condition_value(operator: QueryStringOperator, raw_value: Any) -> str:
+    """
+    按操作符规则处理并转义条件值。
+
+    Returns:
+        转义后的值，值无效（None、空字符串、只有通配符）时返回空字符串
+    """
+    if raw_value is None:
+        return ""
+
+    value = str(raw_value).strip()
+    if value == "":
+        return ""
+
+    return _VALUE_ESCAPERS.get(operator, escape_query_string)(value)
+
+
+def _build_value_group(
+    field: str, operator: QueryStringOperator, values: "_ValueGroup"
+) -> str:
+    """构建多值条件，例如 status: ("a" OR "b")."""
+    value_format = _VALUE_GROUP_FORMATS[operator]
+    parts = []
+    for raw_value in values:
+        escaped_value = _escape_condition_value(operator, raw_value)
+        if escaped_value:
+            parts.append(value_format.format(value=escaped_value))
+
+    if not parts:
+        return ""
+    if len(parts) == 1:
+        return f"{field}: {parts[0]}"
+    return f"{field}: ({' OR '.join(parts)})"
+
+
+def _is_empty_condition(condition: Condition) -> bool:
+    """判断条件是否会被渲染为空字符串."""
+    operator = condition.operator
+    if operator not in OPERATOR_TEMPLATES:
+        # 保留不支持的操作符，由 build() 抛出异常
+        return False
+    if operator in (QueryStringOperator.EXISTS, QueryStringOperator.NOT_EXISTS):
+        return False
+
+    value = condition.value
+    if isinstance(value, _ValueGroup):
+        return not any(_escape_condition_value(operator, v) for v in value)
+    return not _escape_condition_value(operator, value)
+
+
+def _merge_value_groups(children: list) -> list:
+    """合并 OR 关系中同字段、同操作符（EQUAL/INCLUDE）的条件为多值条件."""
+    result: list = []
+    # (字段, 操作符) -> (result 中的位置, 已有值的转义结果集合)
+    groups: dict[tuple, tuple[int, set[str]]] = {}
+
+    for child in children:
+        if isinstance(child, Condition) and child.operator in _VALUE_GROUP_FORMATS:
+            operator = child.operator
+            key = (child.field, operator)
+            value = child.value
+            values = value if isinstance(value, _ValueGroup) else (value,)
+
+            if key not in groups:
+                escaped = {_escape_condition_value(operator, v) for v in values}
+                groups[key] = (len(result), escaped)
+                result.append(child)
+                continue
+
+            index, escaped = groups[key]
+            existing = result[index]
+            existing_value = existing.value
+            merged = (
+                list(existing_value)
+                if isinstance(existing_value, _ValueGroup)
+                else [existing_value]
+            )
+            for v in values:
+                escaped_value = _escape_condition_value(operator, v)
+                if escaped_value not in escaped:
+                    escaped.add(escaped_value)
+                    merged.append(v)
+            result[index] = existing._replace(value=_ValueGroup(merged))
+        else:
+            result.append(child)
+
+    return result
+
+
+def _hashable(value: Any) -> Any:
+    """
+    将条件值转换为可哈希的形式，用于结构化哈希和相等比较.
+
+    标量带上类型: 1、True、1.0 相等且哈希相同，但渲染结果不同，不能视为相同的条件。
+    """
+    if isinstance(value, list | tuple):
+        return (type(value).__name__, tuple(_hashable(v) for v in value))
+    if isinstance(value, set | frozenset):
+        return ("set", frozenset(_hashable(v) for v in value))
+    if isinstance(value, dict):
+        return (
+            "dict",
+            tuple(
+                sorted(
+                    ((type(k).__qualname__, k), _hashable(v)) for k, v in value.items()
+                )
+            ),
+        )
+    return (type(value), value)
+
+
+# 冻结 Q 对象的驻留表，结构相同的子树共享同一个实例（及其缓存的渲染结果）
+_FROZEN_INTERN: "weakref.WeakValueDictionary[tuple, Q]" = weakref.WeakValueDictionary()
+
+
 class Q:
     """
     灵活的查询条件对象，支持 Django 风格的查询组合。
@@ -69,11 +233,27 @@ class Q:
 
         # 嵌套组合
         complex_q = (Q(a=1) | Q(b=2)) & Q(c=3)
+
+        # 冻结：渲染结果只计算一次并缓存，结构相同的子树共享同一个实例
+        frozen_q = complex_q.freeze()
     """
 
     AND = "AND"
     OR = "OR"
 
+    __slots__ = (
+        "_connector",
+        "_negated",
+        "_child_list",
+        "_chain",
+        "_size",
+        "_frozen",
+        "_key",
+        "_hash",
+        "_query_string",
+        "__weakref__",
+    )
+
     def __init__(
         self,
         field: str | None = None,
@@ -94,23 +274,28 @@ class Q:
             value: 值（显式参数方式）
             **kwargs: Django 风格的字段查找参数
         """
+        self._frozen: bool = False
         self._connector: str = self.AND
         self._negated: bool = False
-        self._children: list[dict[str, Any] | Q] = []
+        # 延迟拼接的子节点链: (前缀 Q 对象, 追加的子节点)，见 _combine
+        self._chain: tuple[Q, tuple[Condition | Q, ...]] | None = None
+        self._size: int = 0
+        self._key: tuple | None = None
+        self._hash: int | None = None
+        self._query_string: str | None = None
 
         # 处理显式参数方式
         if field is not None:
             if operator is None:
                 operator = QueryStringOperator.EQUAL
-            self._children.append(self._create_condition(field, operator, value))
+            self._child_list = (self._create_condition(field, operator, value),)
             return
 
         # 处理 Django 风格的参数
-        for key, val in kwargs.items():
-            parsed_field, parsed_operator = self._parse_lookup(key)
-            self._children.append(
-                self._create_condition(parsed_field, parsed_operator, val)
-            )
+        self._child_list = tuple(
+            self._create_condition(*self._parse_lookup(key), val)
+            for key, val in kwargs.items()
+        )
 
     def _parse_lookup(self, key: str) -> tuple[str, QueryStringOperator]:
         """
@@ -146,13 +331,9 @@ class Q:
 
     def _create_condition(
         self, field: str, operator: QueryStringOperator, value: Any
-    ) -> dict[str, Any]:
-        """创建条件字典."""
-        return {
-            "field": field,
-            "operator": operator,
-            "value": value,
-        }
+    ) -> Condition:
+        """创建条件."""
+        return Condition(field, operator, value)
 
     def __and__(self, other: "Q") -> "Q":
         """
@@ -188,13 +369,59 @@ class Q:
         new_q = Q()
         new_q._connector = self._connector
         new_q._negated = not self._negated
-        new_q._children = self._children.copy()
+        # 子节点是不可变的元组，直接共享而不复制
+        new_q._children = self._children
         return new_q
 
+    @property
+    def _children(self) -> "tuple[Condition | Q, ...]":
+        """子节点（不可变元组），延迟拼接的节点在首次访问时展开."""
+        if self._child_list is None:
+            self._materialize()
+        return self._child_list  # type: ignore[return-value]
+
+    @_children.setter
+    def _children(self, children: "tuple[Condition | Q, ...] | list") -> None:
+        self._child_list = tuple(children)
+        self._chain = None
+        self._hash = None
+
+    def _materialize(self) -> None:
+        """沿前缀链迭代展开子节点列表，不依赖递归."""
+        tails: list[tuple] = []
+        node: Q = self
+        while node._child_list is None:
+            prefix, tail = node._chain  # type: ignore[misc]
+            tails.append(tail)
+            node = prefix
+
+        children = list(node._child_list)
+        for tail in reversed(tails):
+            children.extend(tail)
+        # 展开后释放对前缀链的引用
+        self._children = children
+
+    def _child_count(self) -> int:
+        """子节点数量，不会触发延迟节点的展开."""
+        if self._child_list is None:
+            return self._size
+        return len(self._child_list)
+
+    def _is_flattenable(self, connector: str) -> bool:
+        """当前对象作为 connector 组合的操作数时，是否可以将其子节点直接并入."""
+        return not self._negated and (
+            self._connector == connector or self._child_count() == 1
+        )
+
     def _combine(self, other: "Q", connector: str) -> "Q":
         """
         组合两个 Q 对象。
 
+        连接符相同且未取反的操作数会被展平到同一个 n 元节点中，
+        因此 functools.reduce(operator.or_, qs) 得到的是一层节点而不是深度为 n 的二叉树。
+        左操作数可展平时不复制其子节点列表，而是记录 (前缀, 追加部分) 延迟拼接，
+        使得连续组合的总开销保持线性。
+
         Args:
             other: 另一个 Q 对象
             connector: 连接符 (AND/OR)
@@ -207,85 +434,102 @@ class Q:
         new_q._negated = False
 
         # 如果当前对象为空，直接返回 other
-        if not self._children:
+        if not self._child_count():
             new_q._connector = other._connector
             new_q._negated = other._negated
-            new_q._children = other._children.copy()
+            new_q._children = other._children
             return new_q
 
         # 如果 other 为空，直接返回 self 的副本
-        if not other._children:
+        if not other._child_count():
             new_q._connector = self._connector
             new_q._negated = self._negated
-            new_q._children = self._children.copy()
+            new_q._children = self._children
             return new_q
 
         # 两个都不为空，组合它们
-        new_q._children = [self, other]
+        tail = other._children if other._is_flattenable(connector) else (other,)
+        if self._is_flattenable(connector):
+            new_q._child_list = None
+            new_q._chain = (self, tail)
+            new_q._size = self._child_count() + len(tail)
+        else:
+            new_q._children = (self, *tail)
         return new_q
 
     def build(self) -> str:
         """
         将 Q 对象构建为 Query String 字符串。
 
+        使用显式栈迭代构建，嵌套层级再深也不会触发递归深度限制。
+
         Returns:
             Query String 字符串
 
         Raises:
             UnsupportedOperatorError: 当使用不支持的操作符时
         """
-        if not self._children:
-            return ""
-
-        result = self._build_children()
-
-        if self._negated and result:
-            result = f"NOT ({result})"
-
-        return result
-
-    def _build_children(self) -> str:
-        """构建子条件."""
-        parts = []
-
-        for child in self._children:
-            if isinstance(child, Q):
-                # 递归构建嵌套的 Q 对象
-                child_result = child.build()
-                if child_result:
-                    # 如果子对象有多个条件或被取反，需要加括号
-                    if (
-                        len(child._children) > 1
-                        or child._negated
-                        or child._connector != self._connector
-                    ):
-                        parts.append(f"({child_result})")
-                    else:
-                        parts.append(child_result)
-            elif isinstance(child, dict):
-                # 构建单个条件
-                condition_str = self._build_single_condition(child)
-                if condition_str:
-                    parts.append(condition_str)
-
-        if not parts:
-            return ""
-
-        return f" {self._connector} ".join(parts)
+        if self._query_string is not None:
+            return self._query_string
+
+        # 栈帧: (节点, 子节点迭代器, 已构建的片段)
+        stack: list[tuple[Q, Any, list[str]]] = [(self, iter(self._children), [])]
+
+        while True:
+            node, children, parts = stack[-1]
+
+            for child in children:
+                if not isinstance(child, Q):
+                    # 构建单个条件
+                    condition_str = self._build_single_condition(child)
+                    if condition_str:
+                        parts.append(condition_str)
+                elif child._query_string is not None:
+                    node._append_child_part(parts, child, child._query_string)
+                elif child._child_count():
+                    # 先构建嵌套的 Q 对象
+                    stack.append((child, iter(child._children), []))
+                    break
+            else:
+                stack.pop()
+                result = f" {node._connector} ".join(parts)
+                if node._negated and result:
+                    result = f"NOT ({result})"
+                if node._frozen:
+                    object.__setattr__(node, "_query_string", result)
+
+                if not stack:
+                    return result
+                parent, _, parent_parts = stack[-1]
+                parent._append_child_part(parent_parts, node, result)
+
+    def _append_child_part(
+        self, parts: list[str], child: "Q", child_result: str
+    ) -> None:
+        """将子 Q 对象的构建结果追加到片段列表."""
+        if not child_result:
+            return
+        # 如果子对象有多个条件或被取反，需要加括号
+        if (
+            child._child_count() > 1
+            or child._negated
+            or child._connector != self._connector
+        ):
+            parts.append(f"({child_result})")
+        else:
+            parts.append(child_result)
 
-    def _build_single_condition(self, condition: dict[str, Any]) -> str:
+    def _build_single_condition(self, condition: Condition) -> str:
         """
         构建单个条件的 Query String。
 
         Args:
-            condition: 条件字典，包含 field, operator, value
+            condition: 条件，包含 field, operator, value
 
         Returns:
             Query String 字符串
         """
-        field = condition["field"]
-        operator = condition["operator"]
-        raw_value = condition["value"]
+        field, operator, raw_value = condition
 
         template = OPERATOR_TEMPLATES.get(operator)
         if not template:
@@ -295,31 +539,388 @@ class Q:
         if operator in (QueryStringOperator.EXISTS, QueryStringOperator.NOT_EXISTS):
             return template.format(field=field)
 
+        # optimize() 合并出的多值条件: field: ("a" OR "b")
+        if isinstance(raw_value, _ValueGroup):
+            return _build_value_group(field, operator, raw_value)
+
         # 其他操作符需要有效值
-        if raw_value is None:
+        escaped_value = _escape_condition_value(operator, raw_value)
+        if not escaped_value:
             return ""
 
-        value = str(raw_value).strip()
-        if value == "":
-            return ""
+        return template.format(field=field, value=escaped_value)
 
-        if operator in (QueryStringOperator.INCLUDE, QueryStringOperator.NOT_INCLUDE):
-            # 去除前后的通配符
-            value = value.strip("*")
-            if value == "":
-                return ""
-            escaped_value = escape_query_string(value)
-        elif operator in (QueryStringOperator.EQUAL, QueryStringOperator.NOT_EQUAL):
-            # 精确匹配，只转义双引号
-            escaped_value = value.replace('"', '\\"')
-        elif operator in (QueryStringOperator.REG, QueryStringOperator.NREG):
-            # 正则表达式，不转义
-            escaped_value = value
+    def to_dsl(self) -> Any:
+        """
+        将 Q 对象编译为 elasticsearch.dsl 查询对象（filter 上下文）。
+
+        与 build() 生成的 Query String 语义一致，但 ES 不需要再解析 Query String，
+        term/range 等子句也可以被缓存为 filter bitset。
+
+        Returns:
+            elasticsearch.dsl 查询对象，Q 对象为空时返回 None
+
+        Raises:
+            UnsupportedOperatorError: 当使用不支持的操作符时
+        """
+        from elasticsearch_toolkit.core.dsl_compiler import QDslCompiler
+
+        return QDslCompiler().compile(self)
+
+    def prepare(self) -> Any:
+        """
+        将包含 Param 占位符的 Q 对象预编译为查询模板。
+
+        结构（操作符、模板、括号）只在预编译时确定一次，之后每次 bind() 只需要转义并拼接值。
+
+        示例:
+            template = (
+                Q(service=Param("service")) & Q(level__gte=Param("level"))
+            ).prepare()
+            template.bind(service="api", level=3)
+            # 输出: service: "api" AND level: >=3
+
+        Returns:
+            PreparedQ 对象
+        """
+        from elasticsearch_toolkit.core.prepared import PreparedQ
+
+        return PreparedQ(self)
+
+    def dumps(self) -> bytes:
+        """
+        将 Q 对象编码为紧凑的二进制数据，用于跨进程传输。
+
+        字段名去重、操作符编码为整数、节点树展平为数组，比 pickle 更小、还原更快。
+        只用于同一部署内的进程间传输，保存查询请使用 to_json()。
+        批量编码请使用 serialization.dumps_many()，多个 Q 对象共享同一个字段名表。
+
+        Returns:
+            二进制数据
+
+        Raises:
+            ValueError: 包含无法编码的操作符或值时
+        """
+        from elasticsearch_toolkit.core.serialization import dumps
+
+        return dumps(self)
+
+    @classmethod
+    def loads(cls, data: bytes) -> "Q":
+        """
+        从 dumps() 生成的二进制数据还原 Q 对象。
+
+        Raises:
+            ValueError: 数据格式或版本不正确时
+        """
+        from elasticsearch_toolkit.core.serialization import loads
+
+        return loads(data)
+
+    def to_json(self) -> str:
+        """
+        将 Q 对象编码为 JSON 字符串，用于保存查询。
+
+        Raises:
+            ValueError: 包含无法编码的操作符或值时
+        """
+        from elasticsearch_toolkit.core.serialization import to_json
+
+        return to_json(self)
+
+    @classmethod
+    def from_json(cls, data: str | bytes) -> "Q":
+        """
+        从 to_json() 生成的 JSON 字符串还原 Q 对象。
+
+        Raises:
+            ValueError: 数据格式或版本不正确时
+        """
+        from elasticsearch_toolkit.core.serialization import from_json
+
+        return from_json(data)
+
+    def freeze(self) -> "Q":
+        """
+        返回当前 Q 对象的冻结（不可变）版本。
+
+        冻结后的 Q 对象:
+        - 首次 build() 的结果会缓存在节点上，后续调用（包括 repr/str、
+          父节点构建、QueryStringBuilder.add_q）直接复用
+        - 不允许再修改属性
+        - 结构相同的子树会被驻留为同一个实例，共享缓存的渲染结果
+
+        Returns:
+            冻结后的 Q 对象，当前对象本身不会被修改
+        """
+        if self._frozen:
+            return self
+
+        # 栈帧: (节点, 子节点迭代器, 已冻结的子节点)，自底向上冻结，不依赖递归
+        stack: list[tuple[Q, Any, list]] = [(self, iter(self._children), [])]
+        while True:
+            node, children, frozen_children = stack[-1]
+            for child in children:
+                if not isinstance(child, Q) or child._frozen:
+                    frozen_children.append(child)
+                else:
+                    stack.append((child, iter(child._children), []))
+                    break
+            else:
+                stack.pop()
+                frozen_q = node._intern(tuple(frozen_children))
+                if not stack:
+                    return frozen_q
+                stack[-1][2].append(frozen_q)
+
+    def _intern(self, children: tuple) -> "Q":
+        """以已冻结的子节点创建（或复用驻留的）当前节点的冻结版本."""
+        key = (
+            self._connector,
+            self._negated,
+            tuple(self._child_key(child) for child in children),
+        )
+
+        interned = _FROZEN_INTERN.get(key)
+        if interned is not None:
+            return interned
+
+        frozen_q = _FrozenQ()
+        frozen_q._connector = self._connector
+        frozen_q._negated = self._negated
+        frozen_q._children = children  # type: ignore[assignment]
+        frozen_q._key = key
+        frozen_q._frozen = True
+        return _FROZEN_INTERN.setdefault(key, frozen_q)
+
+    def is_frozen(self) -> bool:
+        """检查 Q 对象是否已冻结."""
+        return self._frozen
+
+    def optimize(self) -> "Q":
+        """
+        返回优化后的等价 Q 对象，用于缩短生成的 Query String。
+
+        优化内容:
+        - 移除空的子节点（空 Q 对象、值为空的条件）
+        - 展平同连接符的嵌套节点，折叠双重否定
+        - 移除重复的子节点
+        - 合并 OR 关系中同字段的 EQUAL/INCLUDE 条件:
+          status: "a" OR status: "b" -> status: ("a" OR "b")
+        - 提取公因子: (A AND B) OR (A AND C) -> A AND (B OR C)，
+          以及吸收律: A OR (A AND C) -> A
+
+        Returns:
+            优化后的新 Q 对象，当前对象本身不会被修改
+        """
+        result: Condition | Q | None = None
+        # 栈帧: (节点, 子节点迭代器, 已优化的子节点)
+        stack: list[tuple[Q, Any, list]] = [(self, iter(self._children), [])]
+
+        while stack:
+            node, children, optimized = stack[-1]
+            for child in children:
+                if not isinstance(child, Q):
+                    if not _is_empty_condition(child):
+                        optimized.append(child)
+                elif child._child_count():
+                    stack.append((child, iter(child._children), []))
+                    break
+            else:
+                stack.pop()
+                result = self._optimize_node(node._connector, node._negated, optimized)
+                if stack and result is not None:
+                    stack[-1][2].append(result)
+
+        if result is None:
+            return Q()
+        if isinstance(result, Q):
+            return result
+        return Q._new(self.AND, False, [result])
+
+    @classmethod
+    def _new(cls, connector: str, negated: bool, children: tuple | list) -> "Q":
+        """根据连接符、取反标记和子节点直接创建 Q 对象."""
+        q = Q()
+        q._connector = connector
+        q._negated = negated
+        q._children = children
+        return q
+
+    @classmethod
+    def _optimize_node(
+        cls, connector: str, negated: bool, children: list
+    ) -> "Condition | Q | None":
+        """
+        优化单个节点，children 为已经优化过的子节点。
+
+        Returns:
+            优化后的节点；未取反的单子节点直接返回该子节点，没有子节点时返回 None
+        """
+        # 展平同连接符（或只有一个子节点）且未取反的子节点
+        flat: list = []
+        for child in children:
+            if (
+                isinstance(child, Q)
+                and not child._negated
+                and (child._connector == connector or child._child_count() == 1)
+            ):
+                flat.extend(child._children)
+            else:
+                flat.append(child)
+
+        # 去重，保留首次出现的顺序
+        seen: set = set()
+        unique: list = []
+        for child in flat:
+            key = cls._child_key(child)
+            if key not in seen:
+                seen.add(key)
+                unique.append(child)
+
+        if connector == cls.OR:
+            unique = _merge_value_groups(unique)
+        unique = cls._factor_common(connector, unique)
+
+        if not unique:
+            return None
+
+        if len(unique) == 1:
+            only = unique[0]
+            if not negated:
+                return only
+            if isinstance(only, Q):
+                # NOT 单个子节点时直接对子节点取反，双重否定在此折叠
+                return cls._new(only._connector, not only._negated, only._children)
+
+        return cls._new(connector, negated, unique)
+
+    @classmethod
+    def _factor_common(cls, connector: str, children: list) -> list:
+        """
+        提取所有子节点共有的因子。
+
+        connector 为 OR 时: (A AND B) OR (A AND C) -> A AND (B OR C)；
+        connector 为 AND 时对偶处理: (A OR B) AND (A OR C) -> A OR (B AND C)。
+        """
+        if len(children) < 2:
+            return children
+
+        inner = cls.AND if connector == cls.OR else cls.OR
+        operands = [
+            child._children
+            if isinstance(child, Q) and not child._negated and child._connector == inner
+            else (child,)
+            for child in children
+        ]
+
+        common_keys = {cls._child_key(term) for term in operands[0]}
+        for terms in operands[1:]:
+            common_keys &= {cls._child_key(term) for term in terms}
+            if not common_keys:
+                return children
+
+        common = [term for term in operands[0] if cls._child_key(term) in common_keys]
+        rests = [
+            [term for term in terms if cls._child_key(term) not in common_keys]
+            for terms in operands
+        ]
+
+        # 吸收律: 某个子节点只包含公因子时，整体等价于公因子本身
+        if any(not rest for rest in rests):
+            factored = cls._optimize_node(inner, False, common)
         else:
-            # 其他操作符，使用通用转义
-            escaped_value = escape_query_string(value)
+            rest_node = cls._optimize_node(
+                connector,
+                False,
+                [
+                    rest[0] if len(rest) == 1 else cls._new(inner, False, rest)
+                    for rest in rests
+                ],
+            )
+            factored = cls._optimize_node(inner, False, [*common, rest_node])
 
-        return template.format(field=field, value=escaped_value)
+        return [factored]
+
+    @staticmethod
+    def _child_key(child: "Condition | Q") -> "tuple | Q":
+        """
+        计算子节点的结构化键。
+
+        Q 对象直接以自身作为键（结构化哈希与相等比较），
+        避免为深层嵌套的子树生成同样深的嵌套元组。
+        """
+        if isinstance(child, Q):
+            return child
+        return (child.field, child.operator, _hashable(child.value))
+
+    def _structural_key(self) -> tuple:
+        """计算 Q 对象的结构化键，冻结对象会缓存该结果."""
+        if self._key is not None:
+            return self._key
+        return (
+            self._connector,
+            self._negated,
+            tuple(self._child_key(child) for child in self._children),
+        )
+
+    def __eq__(self, other: object) -> bool:
+        """结构化相等比较，使用显式栈逐层比较，不依赖递归."""
+        if self is other:
+            return True
+        if not isinstance(other, Q):
+            return NotImplemented
+
+        stack: list[tuple[Q, Q]] = [(self, other)]
+        while stack:
+            left, right = stack.pop()
+            if left is right:
+                continue
+            if (
+                left._hash is not None
+                and right._hash is not None
+                and left._hash != right._hash
+            ):
+                return False
+            if left._connector != right._connector or left._negated != right._negated:
+                return False
+            left_children, right_children = left._children, right._children
+            if len(left_children) != len(right_children):
+                return False
+            for left_child, right_child in zip(left_children, right_children):
+                if isinstance(left_child, Q) and isinstance(right_child, Q):
+                    stack.append((left_child, right_child))
+                elif isinstance(left_child, Q) or isinstance(right_child, Q):
+                    return False
+                elif self._child_key(left_child) != self._child_key(right_child):
+                    return False
+        return True
+
+    def __hash__(self) -> int:
+        """结构化哈希，使用显式栈自底向上计算，并缓存在各节点上."""
+        if self._hash is not None:
+            return self._hash
+
+        # 栈帧: (节点, 子节点迭代器, 已计算的子节点哈希)
+        stack: list[tuple[Q, Any, list[int]]] = [(self, iter(self._children), [])]
+        while True:
+            node, children, hashes = stack[-1]
+            for child in children:
+                if not isinstance(child, Q):
+                    hashes.append(hash(self._child_key(child)))
+                elif child._hash is not None:
+                    hashes.append(child._hash)
+                else:
+                    stack.append((child, iter(child._children), []))
+                    break
+            else:
+                stack.pop()
+                value = hash((node._connector, node._negated, tuple(hashes)))
+                # 冻结对象禁止常规属性写入，哈希缓存绕过写保护
+                object.__setattr__(node, "_hash", value)
+                if not stack:
+                    return value
+                stack[-1][2].append(value)
 
     def is_empty(self) -> bool:
         """检查 Q 对象是否为空."""
@@ -343,3 +944,19 @@ class Q:
     def __bool__(self) -> bool:
         """Q 对象的布尔值，非空为 True."""
         return not self.is_empty()
+
+
+class _FrozenQ(Q):
+    """
+    冻结的 Q 对象，由 Q.freeze() 创建。
+
+    属性写保护只放在这个子类上，普通 Q 对象的创建和组合不需要承担 __setattr__ 钩子的开销。
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """冻结后禁止修改属性."""
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"Frozen Q object is immutable: cannot set {name!r}")
+        object.__setattr__(self, name, value)
@@ -0,0 +1,282 @@
+"""
+Q 对象序列化模块
+
+将 Q 对象树编码为紧凑的扁平结构，用于跨进程传输（二进制格式）和保存查询（JSON 格式）。
+
+编码结构（两种格式相同）:
+    [版本号, 字段名表, 节点数组, 根节点数量]
+
+- 字段名表: 每个字段名只出现一次，条件中通过下标引用
+- 节点数组: 按后序排列的扁平整数/值序列，不包含嵌套对象
+    条件: 条件码, 字段下标, 值
+    逻辑节点: 节点码, 子节点数量
+- 条件码 = 操作符码 + 值类型标记，操作符码见 _OPERATOR_CODES（只允许追加，不允许调整顺序）
+"""
+
+from __future__ import annotations
+
+import json
+import marshal
+import sys
+from collections.abc import Iterable
+from typing import Any
+
+from elasticsearch_toolkit.core.operators import QueryStringOperator
+from elasticsearch_toolkit.core.prepared import Param
+from elasticsearch_toolkit.core.query import Condition, Q, _ValueGroup
+
+FORMAT_VERSION = 1
+
+# 二进制格式的文件头: 魔数 + 版本号
+_BINARY_MAGIC = b"ESQ"
+_BINARY_HEADER = _BINARY_MAGIC + bytes([FORMAT_VERSION])
+
+# 操作符码，序列化结果中只保存下标
+_OPERATOR_CODES: tuple[QueryStringOperator, ...] = (
+    QueryStringOperator.EXISTS,
+    QueryStringOperator.NOT_EXISTS,
+    QueryStringOperator.EQUAL,
+    QueryStringOperator.NOT_EQUAL,
+    QueryStringOperator.INCLUDE,
+    QueryStringOperator.NOT_INCLUDE,
+    QueryStringOperator.GT,
+    QueryStringOperator.LT,
+    QueryStringOperator.GTE,
+    QueryStringOperator.LTE,
+    QueryStringOperator.BETWEEN,
+    QueryStringOperator.REG,
+    QueryStringOperator.NREG,
+)
+_OPERATOR_INDEX = {operator: code for code, operator in enumerate(_OPERATOR_CODES)}
+
+# 值类型标记（加在操作符码上）
+_VALUE_GROUP_FLAG = 0x20
+_PARAM_FLAG = 0x40
+_OPERATOR_MASK = 0x1F
+
+# 逻辑节点码: _NODE_BASE + (OR 为 1) + (取反为 2)
+_NODE_BASE = 0x80
+_NODE_OR = 1
+_NODE_NEGATED = 2
+
+# 可以直接编码的标量值类型
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+class _Encoder:
+    """将一个或多个 Q 对象编码到同一个字段名表和节点数组中."""
+
+    def __init__(self) -> None:
+        self.fields: list[str] = []
+        self.field_index: dict[str, int] = {}
+        self.nodes: list[Any] = []
+
+    def encode(self, q: Q) -> None:
+        """按后序把 Q 对象追加到节点数组，使用显式栈，不受递归深度限制."""
+        nodes = self.nodes
+        # 栈帧: (节点, 子节点迭代器)
+        stack: list[tuple[Q, Any]] = [(q, iter(q._children))]
+
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if isinstance(child, Q):
+                    stack.append((child, iter(child._children)))
+                    break
+                self._encode_condition(child)
+            else:
+                stack.pop()
+                code = _NODE_BASE
+                if node._connector == Q.OR:
+                    code |= _NODE_OR
+                if node._negated:
+                    code |= _NODE_NEGATED
+                nodes.append(code)
+                nodes.append(len(node._children))
+
+    def _encode_condition(self, condition: Condition) -> None:
+        """编码单个条件."""
+        field, operator, value = condition
+
+        code = _OPERATOR_INDEX.get(operator)
+        if code is None:
+            raise ValueError(f"Cannot serialize operator: {operator!r}")
+
+        if isinstance(value, _ValueGroup):
+            code |= _VALUE_GROUP_FLAG
+            for v in value:
+                _check_scalar(v)
+            value = list(value)
+        elif isinstance(value, Param):
+            code |= _PARAM_FLAG
+            value = value.name
+        else:
+            _check_scalar(value)
+
+        index = self.field_index.get(field)
+        if index is None:
+            index = self.field_index[field] = len(self.fields)
+            self.fields.append(field)
+
+        self.nodes += (code, index, value)
+
+    def payload(self, roots: int) -> list[Any]:
+        """生成编码结构."""
+        return [FORMAT_VERSION, self.fields, self.nodes, roots]
+
+
+def _check_scalar(value: Any) -> None:
+    """检查值是否可以被两种格式无损编码."""
+    if value.__class__ not in _SCALAR_TYPES:
+        raise ValueError(f"Cannot serialize value of type {type(value).__name__}")
+
+
+def _decode(payload: Any) -> list[Q]:
+    """从编码结构按后序节点数组逐个还原条件和逻辑节点."""
+    try:
+        version, fields, nodes, roots = payload
+    except (TypeError, ValueError):
+        raise ValueError("Invalid serialized Q payload") from None
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported serialized Q version: {version!r}")
+
+    # 同一份数据中相同的字段名共享同一个字符串对象
+    fields = [sys.intern(field) for field in fields]
+    operators = _OPERATOR_CODES
+    new_condition = tuple.__new__
+    new_q = object.__new__
+    and_, or_ = Q.AND, Q.OR
+
+    stack: list[Any] = []
+    push = stack.append
+    i = 0
+    size = len(nodes)
+    try:
+        while i < size:
+            code = nodes[i]
+            if code < _NODE_BASE:
+                value = nodes[i + 2]
+                if code & _VALUE_GROUP_FLAG:
+                    value = _ValueGroup(value)
+                elif code & _PARAM_FLAG:
+                    value = Param(value)
+                push(
+                    new_condition(
+                        Condition,
+                        (fields[nodes[i + 1]], operators[code & _OPERATOR_MASK], value),
+                    )
+                )
+                i += 3
+                continue
+
+            count = nodes[i + 1]
+            if count:
+                children = tuple(stack[-count:])
+                if len(children) != count:
+                    raise ValueError("Invalid serialized Q payload")
+                del stack[-count:]
+            else:
+                children = ()
+
+            # 直接填充 slots，跳过 __init__ 的参数解析
+            q = new_q(Q)
+            q._frozen = False
+            q._connector = or_ if code & _NODE_OR else and_
+            q._negated = bool(code & _NODE_NEGATED)
+            q._child_list = children
+            q._chain = None
+            q._size = 0
+            q._key = None
+            q._hash = None
+            q._query_string = None
+            push(q)
+            i += 2
+    except (IndexError, TypeError):
+        raise ValueError("Invalid serialized Q payload") from None
+
+    if len(stack) != roots or not all(isinstance(q, Q) for q in stack):
+        raise ValueError("Invalid serialized Q payload")
+    return stack
+
+
+def dumps_many(qs: Iterable[Q]) -> bytes:
+    """
+    将多个 Q 对象编码为一份二进制数据，所有 Q 对象共享同一个字段名表.
+
+    二进制格式基于 marshal，只用于同一部署内的进程间传输（例如进程池 worker 加载规则），
+    不要用于持久化或加载不可信来源的数据；保存查询请使用 to_json()。
+
+    Args:
+        qs: Q 对象序列
+
+    Returns:
+        二进制数据
+
+    Raises:
+        ValueError: 包含无法编码的操作符或值时
+    """
+    encoder = _Encoder()
+    roots = 0
+    for q in qs:
+        encoder.encode(q)
+        roots += 1
+    return _BINARY_HEADER + marshal.dumps(encoder.payload(roots))
+
+
+def loads_many(data: bytes) -> list[Q]:
+    """
+    从 dumps_many() 生成的二进制数据还原 Q 对象列表.
+
+    Raises:
+        ValueError: 数据格式或版本不正确时
+    """
+    header = data[: len(_BINARY_HEADER)]
+    if len(header) != len(_BINARY_HEADER) or header[:-1] != _BINARY_MAGIC:
+        raise ValueError("Invalid serialized Q payload")
+    if header != _BINARY_HEADER:
+        raise ValueError(f"Unsupported serialized Q version: {header[-1]!r}")
+    try:
+        payload = marshal.loads(data[len(_BINARY_HEADER) :])
+    except (EOFError, TypeError, ValueError):
+        raise ValueError("Invalid serialized Q payload") from None
+    return _decode(payload)
+
+
+def dumps(q: Q) -> bytes:
+    """将单个 Q 对象编码为二进制数据，见 dumps_many()."""
+    return dumps_many((q,))
+
+
+def loads(data: bytes) -> Q:
+    """从 dumps() 生成的二进制数据还原 Q 对象."""
+    qs = loads_many(data)
+    if len(qs) != 1:
+        raise ValueError("Serialized data does not contain exactly one Q object")
+    return qs[0]
+
+
+def to_json(q: Q) -> str:
+    """
+    将 Q 对象编码为 JSON 字符串，用于保存查询.
+
+    JSON 与二进制格式的结构相同，只包含字符串、数字、布尔值和 null。
+
+    Raises:
+        ValueError: 包含无法编码的操作符或值时
+    """
+    encoder = _Encoder()
+    encoder.encode(q)
+    return json.dumps(encoder.payload(1), ensure_ascii=False, separators=(",", ":"))
+
+
+def from_json(data: str | bytes) -> Q:
+    """
+    从 to_json() 生成的 JSON 字符串还原 Q 对象.
+
+    Raises:
+        ValueError: 数据格式或版本不正确时
+    """
+    qs = _decode(json.loads(data))
+    if len(qs) != 1:
+        raise ValueError("Serialized data does not contain exactly one Q object")
+    return qs[0]
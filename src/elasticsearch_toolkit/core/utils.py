@@ -5,7 +5,67 @@ elasticsearch_toolkit 工具函数模块
 """
 
 import re
-from typing import overload
+from collections.abc import Iterable
+from typing import Any, overload
+
+# 需要转义的特殊字符：+ - = & | > < ! ( ) { } [ ] ^ " ~ * ? : \ / 空格
+_SPECIAL_CHARS = frozenset('+-=&|><!(){}[]^"~*?\\:/ ')
+
+# 特殊字符到转义结果的映射表
+_ESCAPE_MAP = {c: "\\" + c for c in _SPECIAL_CHARS}
+
+# 单趟扫描：可选的前导反斜杠 + 特殊字符。
+# 已转义的 "\X" 与未转义的 "X" 都统一输出为 "\X"，从而避免双重转义
+_ESCAPE_RE = re.compile(r'\\?([+\-=&|><!(){}[\]^"~*?\\:\/ ])')
+
+# 快速路径：判断值中是否含有任何特殊字符
+_HAS_SPECIAL_RE = re.compile(r'[+\-=&|><!(){}[\]^"~*?\\:\/ ]')
+
+
+def _escape_match(match: re.Match) -> str:
+    return _ESCAPE_MAP[match.group(1)]
+
+
+def _escape_value(s: Any) -> Any:
+    """转义单个字符串中的特殊字符，非字符串值原样返回."""
+    if not isinstance(s, str):
+        return s
+
+    # 快速路径：不含任何特殊字符的值直接原样返回
+    if _HAS_SPECIAL_RE.search(s) is None:
+        return s
+
+    found = _SPECIAL_CHARS.intersection(s)
+
+    # 含反斜杠时可能存在已转义字符，需要单趟正则扫描
+    if "\\" in found:
+        return _ESCAPE_RE.sub(_escape_match, s)
+
+    # 不含反斜杠时逐个替换出现过的特殊字符即可
+    for c in found:
+        s = s.replace(c, _ESCAPE_MAP[c])
+    return s
+
+
+def escape_query_strings(values: Iterable[Any]) -> list[Any]:
+    r"""
+    批量转义 Elasticsearch Query String 中的特殊字符。
+
+    与逐个调用 escape_query_string 的结果一致，但只做一次函数分派，
+    适合一次性处理大量的值（如主机名、ID 列表）。
+
+    示例:
+        >>> escape_query_strings(["a+b", "c:d", "plain"])
+        ['a\\+b', 'c\\:d', 'plain']
+
+    Args:
+        values: 需要转义的值，可以是任意可迭代对象
+
+    Returns:
+        转义后的值列表，非字符串值原样保留
+    """
+    escape = _escape_value
+    return [escape(v) for v in values]
 
 
 @overload
@@ -44,26 +104,9 @@ def escape_query_string(
     Returns:
         转义后的查询字符串，类型与输入保持一致（单个字符串或列表）
     """
-    if many is True and not isinstance(query_string, list):
-        query_string = [query_string]
-
-    # 匹配需要转义的特殊字符：+ - = & | > < ! ( ) { } [ ] ^ " ~ * ? : \ / 空格
-    regex = r'([+\-=&|><!(){}[\]^"~*?\\:\/ ])'
-    special_chars = re.compile(regex)
-    # 匹配已经转义的字符，用于避免双重转义
-    escaped_special_chars = re.compile(rf"\\({regex})")
-
-    def escape_char(s: str | None) -> str | None:
-        """转义单个字符串中的特殊字符"""
-        if not isinstance(s, str):
-            return s
-
-        # 避免双重转义：先移除已有的转义
-        s = escaped_special_chars.sub(r"\1", s)
-
-        # 对所有特殊字符进行转义
-        return special_chars.sub(r"\\\1", str(s))
-
     if not many:
-        return escape_char(query_string)  # type: ignore
-    return [escape_char(value) for value in query_string]  # type: ignore
+        return _escape_value(query_string)
+
+    if not isinstance(query_string, list):
+        query_string = [query_string]
+    return escape_query_strings(query_string)
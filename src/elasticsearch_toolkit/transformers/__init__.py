@@ -1,7 +1,15 @@
 """转换器模块导出."""
 
+from elasticsearch_toolkit.transformers.cache import LRUCache, LRUCacheStats, ParseCache
+from elasticsearch_toolkit.transformers.dsl_compiler import QueryStringDslCompiler
+from elasticsearch_toolkit.transformers.parser import QueryStringParser
 from elasticsearch_toolkit.transformers.query_string import QueryStringTransformer
 
 __all__ = [
     "QueryStringTransformer",
+    "QueryStringDslCompiler",
+    "ParseCache",
+    "QueryStringParser",
+    "LRUCache",
+    "LRUCacheStats",
 ]
@@ -0,0 +1,170 @@
+"""
+Query String 转换缓存模块
+
+用户反复提交相同的已保存查询和最近查询，每次都要经过 luqum 解析、语法树转换和
+auto_head_tail。LRUCache 缓存转换结果，ParseCache 缓存解析得到的语法树，
+可以在字段映射、值翻译不同的多个转换器之间共享。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+from luqum.tree import Item
+
+from elasticsearch_toolkit.transformers.parser import QueryStringParser, default_parser
+
+# 默认最大缓存条数
+DEFAULT_CACHE_SIZE = 1024
+
+
+@dataclass(slots=True)
+class LRUCacheStats:
+    """缓存统计."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """命中率."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache:
+    """
+    线程安全的 LRU 缓存.
+
+    超过最大条数时淘汰最久未使用的缓存项；设置 ttl 后缓存项在写入 ttl 秒后过期。
+    """
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_CACHE_SIZE,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化缓存.
+
+        Args:
+            maxsize: 最大缓存条数
+            ttl: 过期时间（秒），None 表示不过期
+            clock: 时钟函数
+
+        Raises:
+            ValueError: 当最大条数小于 1 或 ttl 不大于 0 时
+        """
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be >= 1, got {maxsize}")
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"ttl must be > 0, got {ttl}")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[Any, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = LRUCacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        读取缓存项.
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的值，不存在或已过期时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        写入缓存项.
+
+        Args:
+            key: 缓存键
+            value: 值
+        """
+        expires_at = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """清空缓存."""
+        with self._lock:
+            self._entries.clear()
+
+
+class ParseCache(LRUCache):
+    """
+    Query String 语法树缓存.
+
+    多个 QueryStringTransformer 共享同一个 ParseCache 即可共享解析结果。
+    缓存的语法树被多个转换器共用，不能原地修改。
+
+    使用示例:
+        parse_cache = ParseCache(maxsize=4096)
+        zh = QueryStringTransformer(field_mapping=zh_mapping, parse_cache=parse_cache)
+        en = QueryStringTransformer(field_mapping=en_mapping, parse_cache=parse_cache)
+    """
+
+    def parse(self, query_string: str, parser: QueryStringParser | None = None) -> Item:
+        """
+        解析 Query String，命中缓存时直接返回缓存的语法树.
+
+        Args:
+            query_string: Query String
+            parser: 未命中时使用的解析器，默认为模块级的线程安全解析器
+
+        Returns:
+            luqum 语法树
+
+        Raises:
+            QueryStringParseError: 解析失败时抛出
+        """
+        tree = self.get(query_string)
+        if tree is None:
+            tree = (parser or default_parser).parse(query_string)
+            self.set(query_string, tree)
+        return tree
+
+
+def parse_query_string(query_string: str) -> Item:
+    """
+    使用 luqum 解析 Query String（线程安全）.
+
+    Args:
+        query_string: Query String
+
+    Returns:
+        luqum 语法树
+
+    Raises:
+        QueryStringParseError: 解析失败时抛出
+    """
+    return default_parser.parse(query_string)
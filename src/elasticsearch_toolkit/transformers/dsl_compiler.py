@@ -0,0 +1,400 @@
+"""
+Query String DSL 编译模块
+
+QueryStringTransformer 完成字段映射与值翻译后，结果仍以 query_string 查询发送，每个分片都要重新
+解析，也无法利用 filter 缓存。QueryStringDslCompiler 遍历转换后的 luqum 语法树，生成等价的
+elasticsearch.dsl bool/term/terms/range/wildcard/prefix/match_phrase 查询。
+
+ES 使用 Lucene classic 解析器解析 query_string，同一层括号内的子句按操作符标记为 MUST/SHOULD/MUST_NOT，
+没有优先级（luqum 的语法树则有优先级），例如 `a OR NOT b` 匹配的是“a 且非 b”。编译器按 Lucene 的语义生成
+bool 查询；无法忠实翻译的部分保留为 query_string 子查询:
+- 单个词法单元（未指定字段的词、模糊、邻近、分析字段上的词等）-> 该词的 query_string
+- 同一层括号内混用 AND/OR 或使用隐式操作符 -> 整层括号的 query_string
+"""
+
+from __future__ import annotations
+
+import copy
+import re
+from collections.abc import Iterable
+from typing import Any
+
+from elasticsearch.dsl import Q as DslQ
+from elasticsearch.dsl.query import Bool, Query, Term
+from luqum.tree import (
+    AndOperation,
+    BaseOperation,
+    Boost,
+    FieldGroup,
+    From,
+    Group,
+    Item,
+    Not,
+    OrOperation,
+    Phrase,
+    Plus,
+    Prohibit,
+    Range,
+    Regex,
+    SearchField,
+    To,
+    Word,
+)
+
+from elasticsearch_toolkit.exceptions import QueryStringParseError
+from elasticsearch_toolkit.transformers.cache import (
+    DEFAULT_CACHE_SIZE,
+    LRUCache,
+    LRUCacheStats,
+    ParseCache,
+)
+from elasticsearch_toolkit.transformers.parser import QueryStringParser
+
+# 只有末尾一个未转义的 *，可以使用 prefix 查询
+_PREFIX_RE = re.compile(r"((?:[^\\*?]|\\.)+)\*")
+# 未转义的通配符
+_WILDCARD_RE = re.compile(r"(?<!\\)(?:\\\\)*[*?]")
+# Lucene 比较运算符语法，如 >5、<=10
+_COMPARISON_PREFIXES = ("<", ">", "=")
+# query_string 中的特殊字段
+_EXISTS_FIELD = "_exists_"
+
+# 子句类型
+_MUST = "must"
+_SHOULD = "should"
+_MUST_NOT = "must_not"
+
+
+class _Untranslatable(Exception):
+    """无法忠实翻译，由最近的边界（词、括号、字段、根节点）回退为 query_string."""
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\(.)", r"\1", value, flags=re.DOTALL)
+
+
+def _is_pure(clause: Query, key: str) -> bool:
+    """判断是否为只包含 key 子句的 bool 查询."""
+    return isinstance(clause, Bool) and set(clause._params) == {key}
+
+
+class QueryStringDslCompiler:
+    """
+    Query String 到 ES DSL 的编译器.
+
+    编译规则:
+    - 同一层的 AND -> bool.filter（需要评分时为 bool.must），OR -> bool.should + minimum_should_match=1
+    - NOT/- -> bool.must_not，+ -> bool.filter/must
+    - 字段: 词 -> term，多个同字段的 OR 词 -> terms，`*` -> exists，末尾通配 -> prefix，
+      其他通配 -> wildcard，短语 -> match_phrase，范围与比较 -> range，正则 -> regexp
+    - `_exists_: 字段` -> exists
+
+    text_fields 中的分析字段上，词、通配、范围需要经过分词器，保留为 query_string；短语仍使用 match_phrase。
+    其他字段按 keyword 等不分词字段处理。
+
+    使用示例:
+        compiler = QueryStringDslCompiler(text_fields={"message"})
+        dsl_q = compiler.compile("severity: 1 AND (status: a OR status: b)")
+        # dsl_q.to_dict():
+        # {"bool": {"filter": [{"term": {"severity": "1"}},
+        #                      {"terms": {"status": ["a", "b"]}}]}}
+    """
+
+    def __init__(
+        self,
+        text_fields: Iterable[str] = (),
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        parse_cache: ParseCache | None = None,
+        parser: QueryStringParser | None = None,
+    ):
+        """
+        初始化编译器.
+
+        Args:
+            text_fields: 分析（text）字段，使用 ES 字段名
+            cache_size: 编译结果缓存的最大条数，0 表示不缓存
+            parse_cache: 语法树缓存，可与 QueryStringTransformer 共享
+            parser: luqum 解析器，默认为每个编译器创建一个
+
+        Raises:
+            ValueError: 当 cache_size 小于 0 时
+        """
+        if cache_size < 0:
+            raise ValueError(f"cache_size must be >= 0, got {cache_size}")
+        self.text_fields = frozenset(text_fields)
+        self._cache = LRUCache(cache_size) if cache_size else None
+        self._parse_cache = parse_cache
+        self._parser = parser or QueryStringParser()
+
+    @property
+    def cache_stats(self) -> LRUCacheStats | None:
+        """编译结果缓存的统计，未启用缓存时为 None."""
+        return self._cache.stats if self._cache is not None else None
+
+    def compile(self, query_string: str, scoring: bool = False) -> Query:
+        """
+        编译 Query String.
+
+        Args:
+            query_string: Query String（通常是 QueryStringTransformer 的转换结果）
+            scoring: 是否需要评分，为 True 时必须匹配的子句放入 must 而不是 filter
+
+        Returns:
+            elasticsearch.dsl 查询对象，无法解析时返回原样的 query_string 查询
+        """
+        return DslQ(self.compile_body(query_string, scoring))
+
+    def compile_body(self, query_string: str, scoring: bool = False) -> dict[str, Any]:
+        """
+        编译 Query String，直接返回查询字典.
+
+        Args:
+            query_string: Query String
+            scoring: 是否需要评分
+
+        Returns:
+            查询字典，每次返回新的副本
+        """
+        key = (query_string, scoring)
+        if self._cache is not None:
+            body = self._cache.get(key)
+            if body is not None:
+                # 调用方可能修改返回的字典
+                return copy.deepcopy(body)
+
+        try:
+            if self._parse_cache is not None:
+                tree = self._parse_cache.parse(query_string, self._parser)
+            else:
+                tree = self._parser.parse(query_string)
+        except QueryStringParseError:
+            # 交给 ES 解析，保持与 query_string 相同的行为（包括报错）
+            body = {"query_string": {"query": query_string}}
+        else:
+            body = self.compile_tree(tree, scoring).to_dict()
+
+        if self._cache is not None:
+            self._cache.set(key, copy.deepcopy(body))
+        return body
+
+    def compile_tree(self, tree: Item, scoring: bool = False) -> Query:
+        """
+        编译 luqum 语法树.
+
+        Args:
+            tree: luqum 语法树
+            scoring: 是否需要评分
+
+        Returns:
+            elasticsearch.dsl 查询对象
+        """
+        try:
+            return self._compile(tree, None, scoring)
+        except _Untranslatable:
+            return self._fallback(tree, None)
+
+    def _compile(self, node: Item, field: str | None, scoring: bool) -> Query:
+        """编译节点，field 为所在的字段."""
+        if isinstance(node, SearchField):
+            if field is not None:
+                # 嵌套的字段由外层字段整体回退
+                raise _Untranslatable
+            try:
+                return self._compile_search_field(node, scoring)
+            except _Untranslatable:
+                return self._fallback(node, None)
+
+        if isinstance(node, Group | FieldGroup):
+            try:
+                return self._compile(node.expr, field, scoring)
+            except _Untranslatable:
+                # 整层括号回退，字段内的括号由字段整体回退
+                if field is not None:
+                    raise
+                return self._fallback(node, None)
+
+        if isinstance(node, AndOperation | OrOperation | Not | Prohibit | Plus):
+            operands = (
+                node.children
+                if isinstance(node, AndOperation | OrOperation)
+                else [node]
+            )
+            return self._compile_level(node, operands, field, scoring)
+
+        if isinstance(node, BaseOperation):
+            # 隐式操作符由最近的括号或字段整体回退
+            raise _Untranslatable
+
+        if isinstance(node, Boost) and not scoring:
+            # 不评分时权重没有影响
+            return self._compile(node.expr, field, scoring)
+
+        try:
+            return self._compile_term(node, field)
+        except _Untranslatable:
+            return self._fallback(node, field)
+
+    def _compile_search_field(self, node: SearchField, scoring: bool) -> Query:
+        """编译指定字段的表达式."""
+        name = node.name
+        if name == _EXISTS_FIELD:
+            expr = node.expr
+            if isinstance(expr, Word) and not re.search(r"[*?\\]", expr.value):
+                return DslQ("exists", field=expr.value)
+            raise _Untranslatable
+        if re.search(r"[*?\\]", name):
+            # 字段名中的通配符由 ES 展开
+            raise _Untranslatable
+        return self._compile(node.expr, name, scoring)
+
+    def _compile_level(
+        self,
+        node: Item,
+        operands: Iterable[Item],
+        field: str | None,
+        scoring: bool,
+    ) -> Query:
+        """按 Lucene 的语义编译同一层括号内的子句."""
+        default = _SHOULD if isinstance(node, OrOperation) else _MUST
+        clauses: dict[str, list[Query]] = {_MUST: [], _SHOULD: [], _MUST_NOT: []}
+
+        for operand in operands:
+            occur = default
+            if isinstance(operand, Not | Prohibit):
+                occur, operand = _MUST_NOT, operand.a
+            elif isinstance(operand, Plus):
+                occur, operand = _MUST, operand.a
+            if isinstance(operand, AndOperation | OrOperation | Not | Prohibit | Plus):
+                # 不带括号混用 AND/OR、重复的修饰符，Lucene 的解析结果与语法树不同
+                raise _Untranslatable
+            clause = self._compile(operand, field, scoring)
+
+            if occur == _MUST and _is_pure(clause, _MUST_NOT):
+                clauses[_MUST_NOT].extend(clause.must_not)
+            elif occur == _MUST and not scoring and _is_pure(clause, "filter"):
+                clauses[_MUST].extend(clause.filter)
+            else:
+                clauses[occur].append(clause)
+
+        must, should, must_not = clauses[_MUST], clauses[_SHOULD], clauses[_MUST_NOT]
+        if not scoring:
+            should = _merge_terms(should)
+
+        if len(must) + len(should) == 1 and not must_not:
+            return (must or should)[0]
+
+        params: dict[str, Any] = {}
+        if must:
+            params["must" if scoring else "filter"] = must
+        if should:
+            params["should"] = should
+            if not must:
+                params["minimum_should_match"] = 1
+        if must_not:
+            params["must_not"] = must_not
+        return DslQ("bool", **params)
+
+    def _compile_term(self, node: Item, field: str | None) -> Query:
+        """编译单个词法单元."""
+        if field is None:
+            # 未指定字段时 ES 搜索 default_field（默认为所有字段）
+            raise _Untranslatable
+
+        if isinstance(node, Phrase):
+            value = _unescape(node.value[1:-1])
+            if not value:
+                raise _Untranslatable
+            return DslQ("match_phrase", **{field: value})
+
+        if isinstance(node, Regex):
+            return DslQ("regexp", **{field: node.value[1:-1]})
+
+        if isinstance(node, Word) and node.value == "*":
+            return DslQ("exists", field=field)
+
+        if field in self.text_fields:
+            raise _Untranslatable
+
+        if isinstance(node, Word):
+            value = node.value
+            if value.startswith(_COMPARISON_PREFIXES):
+                raise _Untranslatable
+            if _WILDCARD_RE.search(value) is None:
+                return DslQ("term", **{field: _unescape(value)})
+            match = _PREFIX_RE.fullmatch(value)
+            if match is not None and _WILDCARD_RE.search(match.group(1)) is None:
+                return DslQ("prefix", **{field: _unescape(match.group(1))})
+            return DslQ("wildcard", **{field: {"value": value}})
+
+        if isinstance(node, Range):
+            low = _bound(node.low)
+            high = _bound(node.high)
+            if low is None and high is None:
+                raise _Untranslatable
+            params = {}
+            if low is not None:
+                params["gte" if node.include_low else "gt"] = low
+            if high is not None:
+                params["lte" if node.include_high else "lt"] = high
+            return DslQ("range", **{field: params})
+
+        if isinstance(node, From | To):
+            value = _bound(node.a)
+            if value is None:
+                raise _Untranslatable
+            if isinstance(node, From):
+                op = "gte" if node.include else "gt"
+            else:
+                op = "lte" if node.include else "lt"
+            return DslQ("range", **{field: {op: value}})
+
+        # 模糊、邻近、评分时的权重等
+        raise _Untranslatable
+
+    @staticmethod
+    def _fallback(node: Item, field: str | None) -> Query:
+        """将节点保留为 query_string 子查询."""
+        text = str(node).strip()
+        if field is not None:
+            text = f"{field}:{text}"
+        return DslQ("query_string", query=text)
+
+
+def _bound(node: Item) -> str | None:
+    """范围边界的值，* 表示不限，返回 None."""
+    if isinstance(node, Phrase):
+        return _unescape(node.value[1:-1])
+    if isinstance(node, Word) and node.value != "*":
+        if _WILDCARD_RE.search(node.value) is not None:
+            raise _Untranslatable
+        return _unescape(node.value)
+    if isinstance(node, Word):
+        return None
+    raise _Untranslatable
+
+
+def _merge_terms(should: list[Query]) -> list[Query]:
+    """将同一字段的多个 term 合并为 terms，位置取第一个 term."""
+    values: dict[str, list[Any]] = {}
+    for clause in should:
+        if isinstance(clause, Term) and len(clause._params) == 1:
+            ((field, value),) = clause._params.items()
+            if not isinstance(value, dict):
+                values.setdefault(field, []).append(value)
+    if all(len(v) < 2 for v in values.values()):
+        return should
+
+    merged: list[Query] = []
+    seen: set[str] = set()
+    for clause in should:
+        if isinstance(clause, Term) and len(clause._params) == 1:
+            ((field, value),) = clause._params.items()
+            if len(values.get(field, ())) > 1:
+                if field not in seen:
+                    seen.add(field)
+                    merged.append(
+                        DslQ("terms", **{field: list(dict.fromkeys(values[field]))})
+                    )
+                continue
+        merged.append(clause)
+    return merged
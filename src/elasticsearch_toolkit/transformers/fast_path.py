@@ -0,0 +1,352 @@
+"""
+Query String 快速转换模块
+
+大部分 Query String 是 `字段: 值 AND 字段: 值` 这样的简单表达式，却都要经过 ply 的 LALR
+解析器、luqum 语法树转换和 auto_head_tail。FastQueryRewriter 用手写的词法分析与递归下降
+解析处理常见子集（指定字段的词、短语、AND/OR/NOT、括号、范围），按 luqum 的空白归属规则
+记录每个节点的 head/tail，在一次遍历中完成字段映射、值翻译、补全空白和输出，
+结果与 luqum 完全一致。
+
+遇到子集以外的语法（转义、正则、模糊、权重、+/-、比较符、隐式操作符等）或语法错误时
+返回 None，由调用方回退到 luqum。
+"""
+
+from __future__ import annotations
+
+import re
+
+# 与 luqum 的 TERM_RE 相同，但不支持转义字符与时间表达式
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+    |(?P<term>[^\s:^~(){}\[\]/"'+\-\\<>][^\s:^\\~(){}\[\]]*)
+    |(?P<phrase>"[^\\"]*")
+    |(?P<punct>[:()\[\]{}])
+    """,
+    re.VERBOSE,
+)
+
+# luqum 允许 T12:30 形式的时间表达式中包含冒号，此时回退
+_TIME_PREFIX_RE = re.compile(r"T\d\d$")
+
+_RESERVED = {"AND": "AND", "OR": "OR", "NOT": "NOT", "TO": "TO"}
+
+# 节点类型
+_WORD = 0
+_PHRASE = 1
+_FIELD = 2
+_GROUP = 3
+_NOT = 4
+_AND = 5
+_OR = 6
+_RANGE = 7
+
+_OPERATION_KINDS = {"AND": _AND, "OR": _OR}
+_LOW_CHAR = {True: "[", False: "{"}
+_HIGH_CHAR = {True: "]", False: "}"}
+
+
+class _Fallback(Exception):
+    """遇到不支持的语法，回退到 luqum."""
+
+
+class _Token:
+    """词法单元，head 为表达式开头的空白，tail 为之后的空白."""
+
+    __slots__ = ("kind", "value", "head", "tail")
+
+    def __init__(self, kind: str, value: str, head: str = ""):
+        self.kind = kind
+        self.value = value
+        self.head = head
+        self.tail = ""
+
+
+class _Node:
+    """
+    语法树节点.
+
+    a/b 依节点类型保存: 词/短语的值、字段名与子表达式、分组/NOT 的子表达式、
+    操作数列表、范围的上下界。
+    """
+
+    __slots__ = ("kind", "head", "tail", "a", "b", "include_low", "include_high")
+
+    def __init__(self, kind: int, a: object = None, b: object = None):
+        self.kind = kind
+        self.head = ""
+        self.tail = ""
+        self.a = a
+        self.b = b
+
+
+def tokenize(query_string: str) -> list[_Token]:
+    """
+    词法分析，空白按 luqum 的规则归属: 开头的空白作为第一个词法单元的 head，
+    其余空白追加到前一个词法单元的 tail.
+
+    Raises:
+        _Fallback: 遇到不支持的字符时
+    """
+    tokens: list[_Token] = []
+    head = ""
+    pos = 0
+    length = len(query_string)
+    match = _TOKEN_RE.match
+    while pos < length:
+        m = match(query_string, pos)
+        if m is None:
+            raise _Fallback
+        value = m.group()
+        group = m.lastgroup
+        pos = m.end()
+        if group == "ws":
+            if tokens:
+                tokens[-1].tail += value
+            else:
+                head = value
+            continue
+        if group == "term":
+            if (
+                pos < length
+                and query_string[pos] == ":"
+                and _TIME_PREFIX_RE.search(value)
+            ):
+                raise _Fallback
+            kind = _RESERVED.get(value, "TERM")
+        elif group == "phrase":
+            kind = "PHRASE"
+        else:
+            kind = value
+        tokens.append(_Token(kind, value, head))
+        head = ""
+    return tokens
+
+
+class _Parser:
+    """与 luqum 语法（子集）和 head/tail 规则一致的递归下降解析器."""
+
+    __slots__ = ("tokens", "pos")
+
+    def __init__(self, tokens: list[_Token]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def parse(self) -> _Node:
+        node = self.expression()
+        if self.pos != len(self.tokens):
+            # 隐式操作符或多余的词法单元
+            raise _Fallback
+        return node
+
+    def _peek(self) -> str | None:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos].kind
+        return None
+
+    def _take(self, kind: str) -> _Token:
+        if self._peek() != kind:
+            raise _Fallback
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def expression(self) -> _Node:
+        """expression: and_expression (OR and_expression)*"""
+        return self._operation("OR", self._and_expression)
+
+    def _and_expression(self) -> _Node:
+        """and_expression: unary (AND unary)*"""
+        return self._operation("AND", self.unary)
+
+    def _operation(self, op: str, operand) -> _Node:
+        node = operand()
+        if self._peek() != op:
+            return node
+        operands = [node]
+        while self._peek() == op:
+            op_token = self._take(op)
+            right = operand()
+            # 操作符之后的空白归属右操作数的 head
+            right.head += op_token.tail
+            operands.append(right)
+        return _Node(_OPERATION_KINDS[op], operands)
+
+    def unary(self) -> _Node:
+        kind = self._peek()
+        if kind == "TERM":
+            token = self._take("TERM")
+            if self._peek() != ":":
+                node = _Node(_WORD, token.value)
+                node.head = token.head
+                node.tail = token.tail
+                return node
+            # 字段名与冒号之间的空白被 luqum 丢弃
+            column = self._take(":")
+            expr = self.unary()
+            expr.head = column.tail + expr.head
+            node = _Node(_FIELD, token.value, expr)
+            node.head = token.head
+            return node
+        if kind == "PHRASE":
+            token = self._take("PHRASE")
+            node = _Node(_PHRASE, token.value)
+            node.head = token.head
+            node.tail = token.tail
+            return node
+        if kind == "NOT":
+            token = self._take("NOT")
+            expr = self.unary()
+            expr.head = token.tail + expr.head
+            node = _Node(_NOT, expr)
+            node.head = token.head
+            return node
+        if kind == "(":
+            lparen = self._take("(")
+            expr = self.expression()
+            rparen = self._take(")")
+            expr.head = lparen.tail + expr.head
+            node = _Node(_GROUP, expr)
+            node.head = lparen.head
+            node.tail = rparen.tail
+            return node
+        if kind in ("[", "{"):
+            lbracket = self.tokens[self.pos]
+            self.pos += 1
+            low = self._bound()
+            to = self._take("TO")
+            high = self._bound()
+            rbracket = self.tokens[self.pos] if self.pos < len(self.tokens) else None
+            if rbracket is None or rbracket.kind not in ("]", "}"):
+                raise _Fallback
+            self.pos += 1
+            low.head = lbracket.tail + low.head
+            high.head = to.tail + high.head
+            node = _Node(_RANGE, low, high)
+            node.include_low = lbracket.kind == "["
+            node.include_high = rbracket.kind == "]"
+            node.head = lbracket.head
+            node.tail = rbracket.tail
+            return node
+        raise _Fallback
+
+    def _bound(self) -> _Node:
+        kind = self._peek()
+        if kind not in ("TERM", "PHRASE"):
+            raise _Fallback
+        token = self.tokens[self.pos]
+        self.pos += 1
+        node = _Node(_WORD if kind == "TERM" else _PHRASE, token.value)
+        node.head = token.head
+        node.tail = token.tail
+        return node
+
+
+class FastQueryRewriter:
+    """
+    简单 Query String 的快速转换器.
+
+    字段映射与值翻译规则与 _LuqumTreeTransformer 相同，空白的补全规则与 auto_head_tail 相同。
+    """
+
+    def __init__(
+        self,
+        field_mapping: dict[str, str],
+        field_index: dict[str, dict[str, str]],
+        global_index: dict[str, list[tuple[str, str]]],
+    ):
+        """
+        初始化转换器.
+
+        Args:
+            field_mapping: 字段名映射 {显示名: ES字段名}
+            field_index: 字段 -> {显示值: 实际值}
+            global_index: 显示值 -> [(字段, 实际值), ...]
+        """
+        self._field_mapping = field_mapping
+        self._field_index = field_index
+        self._global_index = global_index
+
+    def rewrite(self, query_string: str) -> str | None:
+        """
+        转换 Query String.
+
+        Args:
+            query_string: 原始 Query String
+
+        Returns:
+            转换后的 Query String，不支持时返回 None
+        """
+        try:
+            tree = _Parser(tokenize(query_string)).parse()
+            # 根节点不输出自身的 head/tail
+            return self._render(tree, None, False, False, root=True)
+        except (_Fallback, RecursionError):
+            return None
+
+    def _render(
+        self,
+        node: _Node,
+        field: str | None,
+        add_head: bool,
+        add_tail: bool,
+        root: bool = False,
+    ) -> str:
+        """输出转换后的节点，add_head/add_tail 表示 auto_head_tail 是否为其补全空白."""
+        kind = node.kind
+        head = node.head
+        tail = node.tail
+
+        if kind == _WORD:
+            value = node.a
+            if field is not None:
+                index = self._field_index.get(field)
+                if index is not None:
+                    value = index.get(value, value)
+            else:
+                matches = self._global_index.get(value)
+                if matches:
+                    # 原值 OR (字段: 实际值)，原词的 head/tail 移入括号内
+                    translated_field, actual_value = matches[0]
+                    value = (
+                        f"({head}{value}{tail or ' '}OR "
+                        f"{translated_field}:{actual_value})"
+                    )
+                    head = tail = ""
+                else:
+                    value = f'"{value}"'
+            body = value
+        elif kind == _PHRASE:
+            body = node.a
+        elif kind == _FIELD:
+            # 字段映射后生成新的 SearchField，原有的 head/tail 不保留
+            mapped = self._field_mapping.get(node.a, node.a)
+            body = f"{mapped}:{self._render(node.b, mapped, False, False)}"
+            head = tail = ""
+        elif kind == _GROUP:
+            body = f"({self._render(node.a, field, False, False)})"
+        elif kind == _NOT:
+            body = f"NOT{self._render(node.a, field, True, False)}"
+        elif kind == _RANGE:
+            body = (
+                f"{_LOW_CHAR[node.include_low]}"
+                f"{self._render(node.a, field, False, True)}TO"
+                f"{self._render(node.b, field, True, False)}"
+                f"{_HIGH_CHAR[node.include_high]}"
+            )
+        else:
+            operands = node.a
+            last = len(operands) - 1
+            op = "AND" if kind == _AND else "OR"
+            body = op.join(
+                self._render(operand, field, i > 0, i < last)
+                for i, operand in enumerate(operands)
+            )
+
+        if root:
+            return body
+        if add_head and not head:
+            head = " "
+        if add_tail and not tail:
+            tail = " "
+        return f"{head}{body}{tail}"
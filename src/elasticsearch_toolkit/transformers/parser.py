@@ -0,0 +1,83 @@
+"""
+线程安全的 Query String 解析模块
+
+luqum 的 `parser`/`lexer` 是模块级单例，ply 的词法分析器（输入与位置）和 LR 解析器
+（状态栈、符号栈、当前词法单元）在解析过程中都会被修改，多线程并发解析会互相破坏状态。
+QueryStringParser 为每个线程复制一份词法分析器与解析器，解析表只读共享，
+并发解析无需全局锁。
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+
+from luqum.exceptions import ParseError
+from luqum.parser import lexer, parser
+from luqum.tree import Item
+from ply.lex import Lexer
+from ply.yacc import LRParser
+
+from elasticsearch_toolkit.exceptions import QueryStringParseError
+
+
+class QueryStringParser:
+    """
+    线程安全的 luqum 解析器.
+
+    每个线程第一次解析时复制 luqum 的词法分析器与 LR 解析器，之后在该线程内复用。
+    复制只涉及少量状态字段，LR 解析表在所有副本之间共享。
+
+    使用示例:
+        query_parser = QueryStringParser()
+        tree = query_parser.parse("severity: 1 AND status: ABNORMAL")
+    """
+
+    def __init__(self):
+        """初始化解析器."""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._instances = 0
+
+    @property
+    def instances(self) -> int:
+        """已创建的词法分析器/解析器副本数（每个线程一份）."""
+        return self._instances
+
+    def _get(self) -> tuple[Lexer, LRParser]:
+        """获取当前线程的词法分析器与解析器."""
+        local = self._local
+        try:
+            return local.lexer, local.parser
+        except AttributeError:
+            pass
+        local.lexer = lexer.clone()
+        local.parser = copy.copy(parser)
+        # luqum 用绑定全局 parser 的函数替换了实例的 parse 方法，副本需去掉该属性
+        vars(local.parser).pop("parse", None)
+        with self._lock:
+            self._instances += 1
+        return local.lexer, local.parser
+
+    def parse(self, query_string: str) -> Item:
+        """
+        解析 Query String.
+
+        Args:
+            query_string: Query String
+
+        Returns:
+            luqum 语法树
+
+        Raises:
+            QueryStringParseError: 解析失败时抛出
+        """
+        thread_lexer, thread_parser = self._get()
+        try:
+            return thread_parser.parse(query_string, lexer=thread_lexer)
+        except ParseError as e:
+            raise QueryStringParseError(f"Failed to parse query string: {e}")
+
+
+# 模块级默认解析器
+default_parser = QueryStringParser()
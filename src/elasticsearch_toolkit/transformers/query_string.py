@@ -1,12 +1,19 @@
 """Query String 转换器模块."""
 
+from collections.abc import Mapping
+from types import MappingProxyType
 from typing import Any
 
-from elasticsearch_toolkit.exceptions import QueryStringParseError
+from elasticsearch_toolkit.transformers.cache import (
+    DEFAULT_CACHE_SIZE,
+    LRUCache,
+    LRUCacheStats,
+    ParseCache,
+)
+from elasticsearch_toolkit.transformers.fast_path import FastQueryRewriter
+from elasticsearch_toolkit.transformers.parser import QueryStringParser
 
 from luqum.auto_head_tail import auto_head_tail
-from luqum.exceptions import ParseError
-from luqum.parser import lexer, parser
 from luqum.tree import FieldGroup, OrOperation, SearchField, Word
 from luqum.visitor import TreeTransformer
 
@@ -30,12 +37,26 @@ class QueryStringTransformer:
 
         result = transformer.transform("级别: 致命 AND 状态: ABNORMAL")
         # 输出: severity: 1 AND status: ABNORMAL
+
+    转换结果按输入字符串缓存（LRU，可设置过期时间）。字段映射和值翻译在初始化时复制，
+    之后需要通过 field_mapping/value_translations 属性整体替换，替换时自动清空结果缓存。
+
+    简单的 Query String 由 FastQueryRewriter 直接转换，不经过 luqum 解析器，结果与 luqum 一致；
+    遇到不支持的语法时回退到 luqum。
+
+    转换器持有自己的 QueryStringParser，每个线程使用独立的词法分析器与解析器，
+    多线程并发调用 transform 无需加锁。
     """
 
     def __init__(
         self,
         field_mapping: dict[str, str] | None = None,
         value_translations: dict[str, list[tuple[Any, str]]] | None = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_ttl: float | None = None,
+        parse_cache: ParseCache | None = None,
+        fast_path: bool = True,
+        parser: QueryStringParser | None = None,
     ):
         """
         初始化转换器.
@@ -43,17 +64,85 @@ class QueryStringTransformer:
         Args:
             field_mapping: 字段名映射 {显示名: ES字段名}
             value_translations: 值翻译 {字段名: [(实际值, 显示值), ...]}
+            cache_size: 转换结果缓存的最大条数，0 表示不缓存
+            cache_ttl: 转换结果的过期时间（秒），None 表示不过期
+            parse_cache: 语法树缓存，可在多个转换器之间共享
+            fast_path: 是否使用快速转换
+            parser: luqum 解析器，默认为每个转换器创建一个
 
         Raises:
             ImportError: 如果 luqum 库未安装
+            ValueError: 当 cache_size 小于 0 或 cache_ttl 不大于 0 时
         """
+        if cache_size < 0:
+            raise ValueError(f"cache_size must be >= 0, got {cache_size}")
+        self._cache = LRUCache(cache_size, ttl=cache_ttl) if cache_size else None
+        self._parse_cache = parse_cache
+        self._fast_path = fast_path
+        self._parser = parser or QueryStringParser()
+        self._field_mapping = dict(field_mapping or {})
+        self._value_translations = {
+            field: list(translations)
+            for field, translations in (value_translations or {}).items()
+        }
+        self._rebuild()
 
-        self._field_mapping = field_mapping or {}
-        self._value_translations = value_translations or {}
+    @property
+    def field_mapping(self) -> Mapping[str, str]:
+        """字段名映射的只读视图，需要整体替换，替换时清空结果缓存."""
+        return MappingProxyType(self._field_mapping)
+
+    @field_mapping.setter
+    def field_mapping(self, field_mapping: dict[str, str] | None) -> None:
+        self._field_mapping = dict(field_mapping or {})
+        self._rebuild()
+
+    @property
+    def value_translations(self) -> Mapping[str, tuple[tuple[Any, str], ...]]:
+        """值翻译的只读副本，需要整体替换，替换时清空结果缓存."""
+        return MappingProxyType(
+            {
+                field: tuple(translations)
+                for field, translations in self._value_translations.items()
+            }
+        )
+
+    @value_translations.setter
+    def value_translations(
+        self, value_translations: dict[str, list[tuple[Any, str]]] | None
+    ) -> None:
+        self._value_translations = {
+            field: list(translations)
+            for field, translations in (value_translations or {}).items()
+        }
+        self._rebuild()
+
+    @property
+    def cache_stats(self) -> LRUCacheStats | None:
+        """转换结果缓存的统计，未启用缓存时为 None."""
+        return self._cache.stats if self._cache is not None else None
+
+    def clear_cache(self) -> None:
+        """清空转换结果缓存."""
+        if self._cache is not None:
+            self._cache.clear()
+
+    def _rebuild(self) -> None:
+        """根据当前的字段映射和值翻译重建语法树转换器，并清空结果缓存."""
         self._tree_transformer = _LuqumTreeTransformer(
             field_mapping=self._field_mapping,
             value_translations=self._value_translations,
         )
+        self._fast_rewriter = (
+            FastQueryRewriter(
+                self._field_mapping,
+                self._tree_transformer._field_index,
+                self._tree_transformer._global_index,
+            )
+            if self._fast_path
+            else None
+        )
+        self.clear_cache()
 
     def transform(self, query_string: str) -> str:
         """
@@ -74,22 +163,41 @@ class QueryStringTransformer:
         if query_string.strip() == "*":
             return "*"
 
-        try:
-            tree = parser.parse(query_string, lexer=lexer)
-        except ParseError as e:
-            raise QueryStringParseError(f"Failed to parse query string: {e}")
+        if self._cache is not None:
+            result = self._cache.get(query_string)
+            if result is not None:
+                return result
+
+        result = None
+        if self._fast_rewriter is not None:
+            result = self._fast_rewriter.rewrite(query_string)
+
+        if result is None:
+            if self._parse_cache is not None:
+                tree = self._parse_cache.parse(query_string, self._parser)
+            else:
+                tree = self._parser.parse(query_string)
+
+            # 转换语法树
+            transformed_tree = self._tree_transformer.visit(tree)
 
-        # 转换语法树
-        transformed_tree = self._tree_transformer.visit(tree)
+            # 重整语法树
+            transformed_tree = auto_head_tail(transformed_tree)
 
-        # 重整语法树
-        transformed_tree = auto_head_tail(transformed_tree)
+            result = str(transformed_tree)
 
-        return str(transformed_tree)
+        if self._cache is not None:
+            self._cache.set(query_string, result)
+        return result
 
 
 class _LuqumTreeTransformer(TreeTransformer):
-    """内部使用的 Luqum 语法树转换器."""
+    """
+    内部使用的 Luqum 语法树转换器.
+
+    初始化时为值翻译建立哈希索引，每个词的翻译只需一次字典查找，
+    耗时不随翻译表的大小增长。同一个显示值对应多个实际值时，与按顺序查找一致，使用第一个。
+    """
 
     def __init__(
         self,
@@ -99,6 +207,19 @@ class _LuqumTreeTransformer(TreeTransformer):
         super().__init__()
         self._field_mapping = field_mapping
         self._value_translations = value_translations
+        # 字段 -> {显示值: 实际值}
+        self._field_index: dict[str, dict[str, str]] = {}
+        # 显示值 -> [(字段, 实际值), ...]，按字段和翻译的原有顺序
+        self._global_index: dict[str, list[tuple[str, str]]] = {}
+        for field, translations in value_translations.items():
+            field_index = self._field_index[field] = {}
+            for actual_value, display_value in translations:
+                if display_value in field_index:
+                    continue
+                field_index[display_value] = str(actual_value)
+                self._global_index.setdefault(display_value, []).append(
+                    (field, str(actual_value))
+                )
 
     def visit_search_field(self, node: SearchField, context: dict) -> Any:
         """访问搜索字段节点，进行字段名映射."""
@@ -119,39 +240,30 @@ class _LuqumTreeTransformer(TreeTransformer):
             )
 
     def visit_word(self, node: Word, context: dict) -> Any:
-        """访问词节点，进行值翻译."""
+        """访问词节点，进行值翻译（不修改原语法树，语法树可能被 ParseCache 共享）."""
         if context.get("ignore_word"):
             yield from self.generic_visit(node, context)
             return
 
         search_field_name = context.get("search_field_name")
 
-        if search_field_name and search_field_name in self._value_translations:
+        if search_field_name and search_field_name in self._field_index:
             # 有指定字段，尝试翻译
-            for actual_value, display_value in self._value_translations[
-                search_field_name
-            ]:
-                if display_value == node.value:
-                    node.value = str(actual_value)
-                    break
+            actual_value = self._field_index[search_field_name].get(node.value)
+            if actual_value is not None:
+                node = node.clone_item(value=actual_value)
         elif not search_field_name:
             # 无指定字段，尝试在所有翻译中查找
-            for field, translations in self._value_translations.items():
-                for actual_value, display_value in translations:
-                    if display_value == node.value:
-                        # 转换为: 原值 OR (字段: 实际值)
-                        node = FieldGroup(
-                            OrOperation(
-                                node, SearchField(field, Word(str(actual_value)))
-                            )
-                        )
-                        context = {"ignore_search_field": True, "ignore_word": True}
-                        break
-                else:
-                    continue
-                break
+            matches = self._global_index.get(node.value)
+            if matches:
+                # 转换为: 原值 OR (字段: 实际值)
+                field, actual_value = matches[0]
+                node = FieldGroup(
+                    OrOperation(node, SearchField(field, Word(actual_value)))
+                )
+                context = {"ignore_search_field": True, "ignore_word": True}
             else:
                 # 未找到翻译，添加双引号进行精确匹配
-                node.value = f'"{node.value}"'
+                node = node.clone_item(value=f'"{node.value}"')
 
         yield from self.generic_visit(node, context)
@@ -0,0 +1,76 @@
+"""测试共用的 ES 响应、构建器工厂与模拟客户端."""
+
+from typing import Any
+
+from elastic_transport import ApiResponseMeta, HttpHeaders, ObjectApiResponse
+from elasticsearch.dsl import AsyncSearch, Search
+
+from elasticsearch_toolkit import AsyncDslQueryBuilder, DslQueryBuilder
+
+# status = error 的条件
+ERROR_CONDITIONS = [{"key": "status", "method": "eq", "value": ["error"]}]
+
+
+def api_response(body: dict[str, Any]) -> ObjectApiResponse:
+    """构造 ES 客户端返回的响应对象."""
+    meta = ApiResponseMeta(
+        status=200,
+        http_version="1.1",
+        headers=HttpHeaders(),
+        duration=0.0,
+        node=None,
+    )
+    return ObjectApiResponse(body=body, meta=meta)
+
+
+def make_builder(
+    conditions: list[dict[str, Any]] | None = None,
+    index: str = "logs",
+    **kwargs: Any,
+) -> DslQueryBuilder:
+    """创建查询索引 index 的构建器，其余参数传给构建器."""
+    builder = DslQueryBuilder(search_factory=lambda: Search(index=index), **kwargs)
+    if conditions:
+        builder.conditions(conditions)
+    return builder
+
+
+def make_async_builder(
+    conditions: list[dict[str, Any]] | None = None,
+    index: str = "logs",
+    **kwargs: Any,
+) -> AsyncDslQueryBuilder:
+    """make_builder() 的异步版本."""
+    builder = AsyncDslQueryBuilder(
+        search_factory=lambda: AsyncSearch(index=index), **kwargs
+    )
+    if conditions:
+        builder.conditions(conditions)
+    return builder
+
+
+class PitClient:
+    """记录 PIT 打开与关闭的模拟客户端，PIT id 依次为 pit-1、pit-2..."""
+
+    def __init__(self):
+        self.opened: list[str] = []
+        self.closed: list[str] = []
+
+    def open_point_in_time(self, index=None, keep_alive=None, **kwargs):
+        pit_id = f"pit-{len(self.opened) + 1}"
+        self.opened.append(pit_id)
+        return api_response({"id": pit_id})
+
+    def close_point_in_time(self, id=None, **kwargs):
+        self.closed.append(id)
+        return api_response({"succeeded": True})
+
+
+class AsyncPitClient(PitClient):
+    """PitClient 的异步版本."""
+
+    async def open_point_in_time(self, index=None, keep_alive=None, **kwargs):
+        return PitClient.open_point_in_time(self, index, keep_alive, **kwargs)
+
+    async def close_point_in_time(self, id=None, **kwargs):
+        return PitClient.close_point_in_time(self, id, **kwargs)
@@ -0,0 +1,97 @@
+"""测试用的 ES DSL 内存求值器，供 DSL 编译器的一致性测试共用."""
+
+import re
+from collections.abc import Callable
+from typing import Any
+
+
+def doc_values(doc: dict[str, Any], field: str | None) -> list[Any]:
+    """获取文档字段值，未指定字段或字段不存在时返回空列表."""
+    if field is None or doc.get(field) is None:
+        return []
+    return [doc[field]]
+
+
+def unescape(value: str) -> str:
+    """去掉 Query String 的反斜杠转义."""
+    return re.sub(r"\\(.)", r"\1", value)
+
+
+def wildcard_regex(pattern: str) -> re.Pattern:
+    """将带反斜杠转义的通配符表达式转换为正则."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\" and i + 1 < len(pattern):
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        parts.append({"*": ".*", "?": "."}.get(char, re.escape(char)))
+        i += 1
+    return re.compile("".join(parts), re.DOTALL)
+
+
+def compare(doc_value: Any, op: str, value: Any) -> bool:
+    """范围比较，数值优先."""
+    try:
+        left, right = float(doc_value), float(value)
+    except (TypeError, ValueError):
+        left, right = str(doc_value), str(value)
+    return {
+        "gt": left > right,
+        "gte": left >= right,
+        "lt": left < right,
+        "lte": left <= right,
+    }[op]
+
+
+def eval_dsl(
+    query: dict[str, Any],
+    doc: dict[str, Any],
+    eval_query_string: Callable[[str, dict[str, Any]], bool] | None = None,
+) -> bool:
+    """
+    ES DSL 字典的内存求值器（仅覆盖 DSL 编译器的输出）.
+
+    eval_query_string 用于对嵌套的 query_string 查询求值，未提供时遇到 query_string 抛出异常。
+    """
+    ((query_type, body),) = query.items()
+
+    if query_type == "bool":
+        required = body.get("filter", []) + body.get("must", [])
+        if not all(eval_dsl(q, doc, eval_query_string) for q in required):
+            return False
+        if any(eval_dsl(q, doc, eval_query_string) for q in body.get("must_not", [])):
+            return False
+        should = body.get("should", [])
+        minimum = body.get("minimum_should_match", 0 if required else 1)
+        return (
+            not should
+            or sum(eval_dsl(q, doc, eval_query_string) for q in should) >= minimum
+        )
+    if query_type == "query_string" and eval_query_string is not None:
+        return eval_query_string(body["query"], doc)
+    if query_type == "exists":
+        return bool(doc_values(doc, body["field"]))
+
+    ((field, param),) = body.items()
+    values = [str(v) for v in doc_values(doc, field)]
+    if query_type == "term":
+        return str(param) in values
+    if query_type == "terms":
+        return any(v in {str(p) for p in param} for v in values)
+    if query_type == "match_phrase":
+        return param in values
+    if query_type == "prefix":
+        return any(v.startswith(param) for v in values)
+    if query_type == "wildcard":
+        return any(wildcard_regex(param["value"]).fullmatch(v) for v in values)
+    if query_type == "regexp":
+        return any(re.fullmatch(param, v) for v in values)
+    if query_type == "range":
+        return any(
+            all(compare(v, op, p) for op, p in param.items())
+            for v in doc_values(doc, field)
+        )
+    raise AssertionError(f"unexpected query: {query!r}")
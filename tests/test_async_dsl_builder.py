@@ -0,0 +1,198 @@
+"""AsyncDslQueryBuilder 单元测试."""
+
+import asyncio
+import json
+from typing import Any
+
+import pytest
+from elasticsearch.dsl import AsyncSearch
+
+from tests.conftest import (
+    AsyncPitClient,
+    api_response,
+    make_async_builder,
+    make_builder,
+)
+
+DOCS = [{"id": i, "level": i % 4} for i in range(25)]
+
+CONDITIONS = [
+    {"key": "level", "method": "gte", "value": [1]},
+    {"key": "host", "method": "neq", "value": ["a"]},
+    {"key": "host", "method": "neq", "value": ["b"]},
+]
+
+
+class AsyncStubClient(AsyncPitClient):
+    """模拟异步 ES 客户端，每个请求等待一小段时间并记录最大并发数."""
+
+    def __init__(self, delay: float = 0.01):
+        super().__init__()
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.bodies: list[dict[str, Any]] = []
+
+    async def _request(self) -> None:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+
+    async def search(self, index=None, body=None, **kwargs):
+        await self._request()
+        self.bodies.append(body)
+        docs = DOCS
+        if "search_after" in body:
+            docs = [doc for doc in DOCS if doc["id"] > body["search_after"][0]]
+        hits = [
+            {
+                "_index": "logs",
+                "_id": str(doc["id"]),
+                "_source": doc,
+                "sort": [doc["id"]],
+            }
+            for doc in docs[: body.get("size", 10)]
+        ]
+        result = {
+            "hits": {"total": {"value": len(DOCS), "relation": "eq"}, "hits": hits}
+        }
+        if "pit" in body:
+            result["pit_id"] = body["pit"]["id"]
+        return api_response(result)
+
+    async def count(self, index=None, query=None, **kwargs):
+        await self._request()
+        return {"count": len(DOCS)}
+
+
+class TestAsyncDslQueryBuilder:
+    """AsyncDslQueryBuilder 测试类."""
+
+    def test_build_matches_sync(self):
+        """测试与同步构建器生成相同的请求体."""
+        sync_builder = make_builder()
+        async_builder = make_async_builder()
+        for builder in (sync_builder, async_builder):
+            builder.conditions(CONDITIONS).query_string("a: b").ordering(["-level"])
+            builder.add_aggregation("by_level", "terms", field="level")
+
+        assert isinstance(async_builder.build(), AsyncSearch)
+        expected = json.dumps(sync_builder.build_body())
+        assert json.dumps(async_builder.build().to_dict()) == expected
+        assert json.dumps(async_builder.build_body()) == expected
+
+    def test_execute_and_count(self):
+        """测试 execute() 与 count()."""
+        client = AsyncStubClient()
+        builder = make_async_builder().conditions(CONDITIONS).pagination(1, 5)
+
+        async def run():
+            return await builder.execute(client), await builder.count(client)
+
+        response, total = asyncio.run(run())
+        assert [hit.id for hit in response] == [0, 1, 2, 3, 4]
+        assert total == len(DOCS)
+        assert client.bodies[0]["query"] == builder.build_body()["query"]
+
+    def test_semaphore_limit(self):
+        """测试共享信号量限制并发数."""
+        client = AsyncStubClient()
+
+        async def run():
+            limit = asyncio.Semaphore(3)
+            builders = [make_async_builder(semaphore=limit) for _ in range(10)]
+            await asyncio.gather(*(b.execute(client) for b in builders))
+
+        asyncio.run(run())
+        assert client.max_in_flight == 3
+
+        unlimited = AsyncStubClient()
+
+        async def run_unlimited():
+            await asyncio.gather(
+                *(make_async_builder().count(unlimited) for _ in range(10))
+            )
+
+        asyncio.run(run_unlimited())
+        assert unlimited.max_in_flight == 10
+
+    def test_int_semaphore(self):
+        """测试以整数设置最大并发数."""
+        client = AsyncStubClient()
+        builder = make_async_builder(semaphore=2)
+
+        async def run():
+            await asyncio.gather(*(builder.count(client) for _ in range(6)))
+
+        asyncio.run(run())
+        assert client.max_in_flight == 2
+        with pytest.raises(ValueError):
+            make_async_builder(semaphore=0)
+
+    def test_iterate(self):
+        """测试 iterate() 遍历所有文档，结束后关闭 PIT，不修改构建器."""
+        client = AsyncStubClient()
+        builder = make_async_builder().pagination(2, 5)
+
+        async def run():
+            return [
+                hit.id async for hit in builder.iterate(batch_size=10, using=client)
+            ]
+
+        assert asyncio.run(run()) == list(range(len(DOCS)))
+        assert len(client.bodies) == 3
+        assert client.closed == ["pit-1"]
+        assert builder.build_body()["from"] == 5
+
+    def test_iterate_break_closes_pit(self):
+        """测试提前结束遍历时关闭 PIT."""
+        client = AsyncStubClient()
+
+        async def run():
+            iterator = make_async_builder().iterate(batch_size=10, using=client)
+            async for _ in iterator:
+                break
+            await iterator.aclose()
+
+        asyncio.run(run())
+        assert client.closed == ["pit-1"]
+
+    def test_execute_page(self):
+        """测试异步游标分页."""
+        client = AsyncStubClient()
+        builder = make_async_builder().cursor_pagination(page_size=10)
+
+        async def run():
+            pages = []
+            while True:
+                page = await builder.execute_page(client)
+                pages.append(page)
+                if page.cursor is None:
+                    return pages
+
+        pages = asyncio.run(run())
+        assert [len(page.hits) for page in pages] == [10, 10, 5]
+        assert client.closed == ["pit-1"]
+
+    def test_close_cursor(self):
+        """测试异步提前关闭游标."""
+        client = AsyncStubClient()
+        builder = make_async_builder().cursor_pagination(page_size=10)
+
+        async def run():
+            page = await builder.execute_page(client)
+            assert page.cursor is not None
+            assert await builder.close_cursor(client) is builder
+            await builder.close_cursor(client)
+
+        asyncio.run(run())
+        assert client.closed == ["pit-1"]
+        assert builder._cursor.pit_id is None
+
+    def test_export_unsupported(self):
+        """测试异步构建器不支持切片导出."""
+        with pytest.raises(TypeError, match="iterate"):
+            make_async_builder().export(slices=2)
@@ -0,0 +1,155 @@
+"""MultiSearchBatch 单元测试."""
+
+import threading
+from typing import Any
+
+import pytest
+from elasticsearch.dsl import Search
+
+from elasticsearch_toolkit import DslQueryBuilder, MultiSearchBatch
+from tests.conftest import ERROR_CONDITIONS, api_response, make_builder
+
+
+class FakeMsearchClient:
+    """模拟 _msearch：索引为 broken 的查询返回错误，total 为查询的 size."""
+
+    def __init__(self, fail_batches: int = 0):
+        self.lock = threading.Lock()
+        self.calls: list[list[dict[str, Any]]] = []
+        self.fail_batches = fail_batches
+
+    def msearch(self, body=None, **kwargs):
+        with self.lock:
+            self.calls.append(body)
+            if self.fail_batches:
+                self.fail_batches -= 1
+                raise ConnectionError("connection reset")
+
+        responses = []
+        for header, search_body in zip(body[::2], body[1::2], strict=True):
+            if header.get("index") == ["broken"]:
+                responses.append(
+                    {"error": {"type": "index_not_found_exception"}, "status": 404}
+                )
+                continue
+            response = {
+                "hits": {
+                    "total": {"value": search_body["size"], "relation": "eq"},
+                    "hits": [{"_index": "logs", "_id": "1", "_source": {"a": 1}}],
+                }
+            }
+            if "aggs" in search_body:
+                response["aggregations"] = {
+                    "by_status": {"buckets": [{"key": "error", "doc_count": 3}]}
+                }
+            responses.append(response)
+        return api_response({"responses": responses})
+
+
+def make_panel(index: str = "logs", page_size: int = 10) -> DslQueryBuilder:
+    return make_builder(ERROR_CONDITIONS, index=index).pagination(1, page_size)
+
+
+class TestMultiSearchBatch:
+    """MultiSearchBatch 测试类."""
+
+    def test_single_request(self):
+        """测试所有查询合并为一次 _msearch，结果按添加顺序返回."""
+        client = FakeMsearchClient()
+        batch = MultiSearchBatch(using=client)
+        for i in range(5):
+            batch.add(make_panel(page_size=i + 1), key=f"panel-{i}")
+
+        results = batch.execute()
+        assert len(client.calls) == 1
+        assert client.calls[0][0] == {"index": ["logs"]}
+        assert client.calls[0][1] == make_panel(page_size=1).build_body()
+        assert [r.key for r in results] == [f"panel-{i}" for i in range(5)]
+        assert [r.response.hits.total.value for r in results] == [1, 2, 3, 4, 5]
+        assert all(r.ok for r in results)
+
+    def test_max_batch_size(self):
+        """测试按最大批次大小拆分，结果顺序不变."""
+        client = FakeMsearchClient()
+        batch = MultiSearchBatch(max_batch_size=4, using=client)
+        for i in range(10):
+            batch.add(make_panel(page_size=i + 1))
+
+        results = batch.execute()
+        assert sorted(len(call) // 2 for call in client.calls) == [2, 4, 4]
+        assert [r.key for r in results] == list(range(10))
+        assert [r.response.hits.total.value for r in results] == list(range(1, 11))
+
+    def test_groups_by_connection(self):
+        """测试未指定 using 时按各查询的连接分别发送 _msearch，结果顺序不变."""
+        clients = [FakeMsearchClient(), FakeMsearchClient()]
+        batch = MultiSearchBatch()
+        for i in range(4):
+            client = clients[i % 2]
+            builder = DslQueryBuilder(
+                search_factory=lambda client=client: Search(index="logs", using=client)
+            )
+            batch.add(builder.pagination(1, i + 1))
+
+        results = batch.execute()
+        assert [len(client.calls) for client in clients] == [1, 1]
+        assert [call["size"] for call in clients[0].calls[0][1::2]] == [1, 3]
+        assert [call["size"] for call in clients[1].calls[0][1::2]] == [2, 4]
+        assert [r.key for r in results] == [0, 1, 2, 3]
+        assert [r.response.hits.total.value for r in results] == [1, 2, 3, 4]
+
+    def test_partial_failure(self):
+        """测试单个查询失败不影响其他查询."""
+        client = FakeMsearchClient()
+        batch = MultiSearchBatch(using=client)
+        batch.add(make_panel(), key="ok")
+        batch.add(make_panel(index="broken"), key="broken")
+        ok, broken = batch.execute()
+        assert ok.ok and ok.response.hits[0].a == 1
+        assert not broken.ok
+        assert broken.response is None
+        assert broken.error["type"] == "index_not_found_exception"
+
+    def test_request_failure(self):
+        """测试 _msearch 请求失败时只影响该批次."""
+        client = FakeMsearchClient(fail_batches=1)
+        batch = MultiSearchBatch(
+            max_batch_size=2, max_concurrent_batches=1, using=client
+        )
+        for _ in range(4):
+            batch.add(make_panel())
+        results = batch.execute()
+        assert [r.ok for r in results] == [False, False, True, True]
+        assert isinstance(results[0].error, ConnectionError)
+
+    def test_aggregations_and_raw_body(self):
+        """测试聚合结果的解析与直接添加请求体."""
+        client = FakeMsearchClient()
+        builder = make_panel()
+        builder.add_aggregation("by_status", "terms", field="status")
+        batch = MultiSearchBatch(using=client)
+        batch.add(builder).add_body({"size": 0}, index="logs", key="raw")
+        assert len(batch) == 2
+
+        agg_result, raw_result = batch.execute()
+        assert agg_result.response.aggregations.by_status.buckets[0].key == "error"
+        assert raw_result.key == "raw"
+        assert raw_result.response.hits.total.value == 0
+        assert client.calls[0][2:] == [{"index": ["logs"]}, {"size": 0}]
+
+    def test_pit_body_omits_index(self):
+        """测试使用 PIT 的查询请求头不包含索引."""
+        client = FakeMsearchClient()
+        batch = MultiSearchBatch(using=client)
+        pit_body = {"size": 5, "pit": {"id": "pit-1", "keep_alive": "1m"}}
+        batch.add_body(pit_body, index="logs").add_body({"size": 1}, index="logs")
+        batch.execute()
+        assert client.calls[0] == [{}, pit_body, {"index": ["logs"]}, {"size": 1}]
+
+    def test_empty_and_invalid(self):
+        """测试空批次与无效参数."""
+        assert MultiSearchBatch().execute() == []
+        with pytest.raises(ValueError):
+            MultiSearchBatch(max_batch_size=0)
+        with pytest.raises(ValueError):
+            MultiSearchBatch(max_concurrent_batches=0)
@@ -0,0 +1,484 @@
+"""ConditionCompiler 单元测试."""
+
+import json
+import random
+from typing import Any
+
+import pytest
+from elasticsearch.dsl import Q, Search
+
+from elasticsearch_toolkit import (
+    ConditionCompiler,
+    ConditionItem,
+    ConditionParseError,
+    DefaultConditionParser,
+    DslQueryBuilder,
+)
+
+
+def legacy_combine(conditions: list[dict]) -> Any:
+    """优化前的实现：依次使用 & / | 组合，作为对照."""
+    parser = DefaultConditionParser()
+    combined = None
+    for cond in conditions:
+        q = parser.parse(
+            ConditionItem(
+                key=cond["key"],
+                method=cond.get("method", "eq"),
+                value=cond["value"],
+            )
+        )
+        if q is None:
+            continue
+        if combined is None:
+            combined = q
+        elif cond.get("condition") == "or":
+            combined = combined | q
+        else:
+            combined = combined & q
+    return combined
+
+
+def matches(query: dict[str, Any], doc: dict[str, Any]) -> bool:
+    """在内存中对文档求值 DefaultConditionParser 生成的 DSL."""
+    (query_type, params), *_ = query.items()
+    if query_type == "bool":
+        must = params.get("filter", []) + params.get("must", [])
+        if not all(matches(q, doc) for q in must):
+            return False
+        if any(matches(q, doc) for q in params.get("must_not", [])):
+            return False
+        should = params.get("should", [])
+        if not should:
+            return True
+        default = 0 if must else 1
+        required = params.get("minimum_should_match", default)
+        return sum(matches(q, doc) for q in should) >= required
+    if query_type == "exists":
+        return params["field"] in doc
+    (field, value), *_ = params.items()
+    if field not in doc:
+        return False
+    if query_type == "terms":
+        return doc[field] in value
+    if query_type == "wildcard":
+        return value.strip("*") in str(doc[field])
+    (op, bound), *_ = value.items()
+    return {
+        "gt": doc[field] > bound,
+        "gte": doc[field] >= bound,
+        "lt": doc[field] < bound,
+        "lte": doc[field] <= bound,
+    }[op]
+
+
+def compiler_encoding(query: Any) -> Any:
+    """将逐个组合的结果改写为 ConditionCompiler 的写法: and 子句放入 filter，should 显式给出 minimum_should_match."""
+    if isinstance(query, list):
+        return [compiler_encoding(q) for q in query]
+    if not isinstance(query, dict):
+        return query
+    result = {key: compiler_encoding(value) for key, value in query.items()}
+    if "bool" in result:
+        params = result["bool"]
+        if "must" in params:
+            params["filter"] = params.pop("must")
+        if "should" in params:
+            params.setdefault("minimum_should_match", 1)
+    return result
+
+
+def bool_depth(query: Any) -> int:
+    """返回 bool 查询的最大嵌套层数."""
+    if isinstance(query, list):
+        return max(map(bool_depth, query), default=0)
+    if not isinstance(query, dict):
+        return 0
+    depth = max(map(bool_depth, query.values()), default=0)
+    return depth + 1 if "bool" in query else depth
+
+
+METHODS = ("eq", "neq", "include", "exclude", "gte", "lt", "exists", "nexists")
+FIELDS = ("a", "b", "c")
+
+
+def random_condition(rng: random.Random) -> dict[str, Any]:
+    method = rng.choice(METHODS)
+    if method in ("gte", "lt"):
+        value = [rng.randint(0, 3)]
+    elif method in ("exists", "nexists"):
+        value = None
+    else:
+        value = rng.sample(range(4), rng.randint(1, 2))
+        if method in ("include", "exclude"):
+            value = [str(v) for v in value]
+    return {
+        "key": rng.choice(FIELDS),
+        "method": method,
+        "value": value,
+        "condition": rng.choice(("and", "or")),
+    }
+
+
+DOCS = [
+    {field: v for field, v in zip(FIELDS, values) if v is not None}
+    for values in (
+        (a, b, c)
+        for a in (0, 1, 2, 3, None)
+        for b in (0, 2, None)
+        for c in (1, 3, None)
+    )
+]
+
+
+class TestConditionCompiler:
+    """ConditionCompiler 测试类."""
+
+    def compile(self, conditions: list[dict]) -> dict[str, Any] | None:
+        q = ConditionCompiler().compile(conditions)
+        return None if q is None else q.to_dict()
+
+    def test_empty(self):
+        """测试没有有效条件."""
+        assert self.compile([]) is None
+
+    def test_single_condition_unchanged(self):
+        """测试单个条件保持解析器的输出."""
+        assert self.compile([{"key": "a", "method": "neq", "value": ["x"]}]) == {
+            "bool": {"must_not": [{"terms": {"a": ["x"]}}]}
+        }
+
+    def test_and_flat(self):
+        """测试连续 and 条件合并到同一个 bool，取反条件直接放入 must_not."""
+        conditions = [
+            {"key": "status", "method": "eq", "value": ["error"]},
+            {"key": "level", "method": "gte", "value": [3]},
+            {"key": "host", "method": "neq", "value": ["a"]},
+            {"key": "msg", "method": "exclude", "value": ["debug", "trace"]},
+            {"key": "host", "method": "neq", "value": ["b", "a"]},
+            {"key": "ip", "method": "nexists", "value": None},
+        ]
+        assert self.compile(conditions) == {
+            "bool": {
+                "filter": [
+                    {"terms": {"status": ["error"]}},
+                    {"range": {"level": {"gte": 3}}},
+                ],
+                "must_not": [
+                    {"terms": {"host": ["a", "b"]}},
+                    {"wildcard": {"msg": "*debug*"}},
+                    {"wildcard": {"msg": "*trace*"}},
+                    {"exists": {"field": "ip"}},
+                ],
+            }
+        }
+
+    def test_or_merges_terms(self):
+        """测试 or 条件中同字段的 eq 合并为一个 terms 并去重."""
+        conditions = [
+            {"key": "status", "method": "eq", "value": ["error"]},
+            {"key": "host", "method": "include", "value": ["web", "db"]},
+            {"key": "status", "method": "eq", "value": ["fatal", "error"]},
+        ]
+        for cond in conditions:
+            cond["condition"] = "or"
+        assert self.compile(conditions) == {
+            "bool": {
+                "should": [
+                    {"terms": {"status": ["error", "fatal"]}},
+                    {"wildcard": {"host": "*web*"}},
+                    {"wildcard": {"host": "*db*"}},
+                ],
+                "minimum_should_match": 1,
+            }
+        }
+
+    def test_or_single_field_collapses(self):
+        """测试合并后只剩一个子句时不包装 bool."""
+        conditions = [
+            {"key": "status", "method": "eq", "value": ["a"]},
+            {"key": "status", "method": "eq", "value": ["b"], "condition": "or"},
+        ]
+        assert self.compile(conditions) == {"terms": {"status": ["a", "b"]}}
+
+    def test_or_merge_keeps_values_of_different_types(self):
+        """测试合并去重时 1、True、1.0 不视为重复值."""
+        conditions = [
+            {"key": "flag", "method": "eq", "value": [1]},
+            {"key": "flag", "method": "eq", "value": [True, 1], "condition": "or"},
+            {"key": "flag", "method": "eq", "value": [1.0], "condition": "or"},
+        ]
+        terms = self.compile(conditions)["terms"]["flag"]
+        assert [(type(v), v) for v in terms] == [(int, 1), (bool, True), (float, 1.0)]
+
+    def test_and_does_not_merge_terms(self):
+        """测试 and 条件中同字段的 eq 不合并（多值字段的语义不同）."""
+        conditions = [
+            {"key": "tag", "method": "eq", "value": ["a"]},
+            {"key": "tag", "method": "eq", "value": ["b"]},
+        ]
+        assert self.compile(conditions)["bool"]["filter"] == [
+            {"terms": {"tag": ["a"]}},
+            {"terms": {"tag": ["b"]}},
+        ]
+
+    def test_left_to_right_grouping(self):
+        """测试连接符变化时前面的条件整体作为一组，与后续 and 条件放在同一个 bool."""
+        conditions = [
+            {"key": "a", "method": "eq", "value": [1]},
+            {"key": "b", "method": "eq", "value": [2], "condition": "or"},
+            {"key": "c", "method": "eq", "value": [3], "condition": "and"},
+            {"key": "d", "method": "neq", "value": [4], "condition": "and"},
+            {"key": "e", "method": "eq", "value": [5], "condition": "or"},
+        ]
+        assert self.compile(conditions) == {
+            "bool": {
+                "should": [
+                    {
+                        "bool": {
+                            "filter": [{"terms": {"c": [3]}}],
+                            "must_not": [{"terms": {"d": [4]}}],
+                            "should": [{"terms": {"a": [1]}}, {"terms": {"b": [2]}}],
+                            "minimum_should_match": 1,
+                        }
+                    },
+                    {"terms": {"e": [5]}},
+                ],
+                "minimum_should_match": 1,
+            }
+        }
+
+    def test_custom_parser(self):
+        """测试使用自定义解析器，忽略返回 None 的条件."""
+
+        class Parser(DefaultConditionParser):
+            def parse(self, condition):
+                if condition.key == "skip":
+                    return None
+                return super().parse(condition)
+
+        compiler = ConditionCompiler(Parser())
+        q = compiler.compile(
+            [
+                {"key": "skip", "value": [1], "condition": "or"},
+                {"key": "a", "value": [1], "condition": "or"},
+                {"key": "b", "value": [2]},
+            ]
+        )
+        assert q.to_dict() == {
+            "bool": {"filter": [{"terms": {"a": [1]}}, {"terms": {"b": [2]}}]}
+        }
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_equivalent_to_legacy(self, seed):
+        """测试随机条件列表与依次使用 & / | 组合的结果语义一致."""
+        rng = random.Random(seed)
+        for _ in range(20):
+            conditions = [random_condition(rng) for _ in range(rng.randint(1, 8))]
+            expected = legacy_combine(conditions).to_dict()
+            actual = self.compile(conditions)
+            for doc in DOCS:
+                assert matches(actual, doc) == matches(expected, doc), (
+                    conditions,
+                    doc,
+                )
+
+    def test_smaller_output(self):
+        """测试 30 个条件的输出比逐个组合更小."""
+        conditions = [
+            {
+                "key": f"field_{i % 6}",
+                "method": ("eq", "neq", "exclude")[i % 3],
+                "value": [f"v{i}"],
+            }
+            for i in range(30)
+        ]
+        expected = legacy_combine(conditions).to_dict()
+        actual = self.compile(conditions)
+        assert len(str(actual)) < len(str(expected))
+        assert len(actual["bool"]["must_not"]) == 12
+
+    def test_mixed_chain_size(self):
+        """测试 and/or 交替的 30 个条件的嵌套层数与逐个组合相同，按相同写法比较输出不更大."""
+        conditions = [
+            {
+                "key": f"field_{i % 6}",
+                "method": ("eq", "neq", "exclude", "gte")[i % 4],
+                "value": [f"v{i}"],
+                "condition": ("and", "or")[i % 2],
+            }
+            for i in range(30)
+        ]
+        expected = compiler_encoding(legacy_combine(conditions).to_dict())
+        actual = self.compile(conditions)
+        assert bool_depth(actual) == bool_depth(expected)
+        assert len(json.dumps(actual)) <= len(json.dumps(expected))
+
+
+class TestDslQueryBuilderConditions:
+    """DslQueryBuilder 条件编译测试类."""
+
+    def test_build_uses_flat_bool(self):
+        """测试 build() 与 build_body() 都使用扁平的条件查询."""
+        builder = DslQueryBuilder(search_factory=lambda: Search(index="alerts"))
+        builder.conditions(
+            [
+                {"key": "status", "method": "eq", "value": ["error"]},
+                {"key": "host", "method": "neq", "value": ["a"]},
+                {"key": "msg", "method": "exclude", "value": ["debug"]},
+            ]
+        )
+        expected = {
+            "bool": {
+                "filter": [
+                    {
+                        "bool": {
+                            "filter": [{"terms": {"status": ["error"]}}],
+                            "must_not": [
+                                {"terms": {"host": ["a"]}},
+                                {"wildcard": {"msg": "*debug*"}},
+                            ],
+                        }
+                    }
+                ]
+            }
+        }
+        assert builder.to_dict()["query"] == expected
+        assert builder.build_body()["query"] == expected
+
+
+class TestConditionParserRegistry:
+    """DefaultConditionParser 处理函数注册表测试类."""
+
+    def parse(self, method: str, value: Any, parser=None) -> dict[str, Any]:
+        parser = parser or DefaultConditionParser()
+        return parser.parse(
+            ConditionItem(key="f", method=method, value=value)
+        ).to_dict()
+
+    def test_scalar_and_list_values(self):
+        """测试标量值与列表值的处理一致."""
+        for method in ("eq", "neq", "include", "exclude", "gte", "prefix"):
+            assert self.parse(method, "x") == self.parse(method, ["x"])
+
+    def test_unknown_method_as_eq(self):
+        """测试未注册的方法按 eq 处理."""
+        assert self.parse("unknown", ["x"]) == {"terms": {"f": ["x"]}}
+
+    def test_prefix(self):
+        """测试前缀匹配."""
+        assert self.parse("prefix", ["a", "b"]) == {
+            "bool": {"should": [{"prefix": {"f": "a"}}, {"prefix": {"f": "b"}}]}
+        }
+
+    def test_between(self):
+        """测试闭区间范围，None 表示不限."""
+        assert self.parse("between", [1, 5]) == {"range": {"f": {"gte": 1, "lte": 5}}}
+        assert self.parse("between", [None, 5]) == {"range": {"f": {"lte": 5}}}
+        with pytest.raises(ConditionParseError):
+            self.parse("between", [1])
+        with pytest.raises(ConditionParseError):
+            self.parse("between", [None, None])
+
+    def test_in_range_list(self):
+        """测试多个闭区间之间为 OR."""
+        assert self.parse("in_range_list", [[1, 2], (5, None)]) == {
+            "bool": {
+                "should": [
+                    {"range": {"f": {"gte": 1, "lte": 2}}},
+                    {"range": {"f": {"gte": 5}}},
+                ]
+            }
+        }
+        with pytest.raises(ConditionParseError):
+            self.parse("in_range_list", [1, 2])
+
+    def test_terms_lookup(self):
+        """测试 terms lookup."""
+        lookup = {"index": "users", "id": "1", "path": "followers"}
+        assert self.parse("terms_lookup", lookup) == {"terms": {"f": lookup}}
+        with pytest.raises(ConditionParseError):
+            self.parse("terms_lookup", {"index": "users"})
+
+    def test_register(self):
+        """测试注册自定义方法，不影响其他解析器实例."""
+        parser = DefaultConditionParser().register(
+            "ip", lambda key, values: Q("terms", **{f"{key}.ip": values})
+        )
+        assert self.parse("ip", "1.1.1.1", parser) == {"terms": {"f.ip": ["1.1.1.1"]}}
+        assert self.parse("ip", "1.1.1.1") == {"terms": {"f": ["1.1.1.1"]}}
+        with pytest.raises(ValueError):
+            parser.register("bad", None)
+
+    def test_handlers_argument(self):
+        """测试通过构造参数覆盖内置方法."""
+        parser = DefaultConditionParser(handlers={"eq": lambda key, values: None})
+        assert parser.parse(ConditionItem(key="f", method="eq", value=[1])) is None
+        assert ConditionCompiler(parser).compile([{"key": "f", "value": [1]}]) is None
+
+
+class TestConditionPlan:
+    """ConditionPlan 测试类."""
+
+    conditions = [
+        {"key": "status", "method": "eq", "value": ["error"]},
+        {"key": "status", "method": "eq", "value": ["fatal"], "condition": "or"},
+        {"key": "level", "method": "between", "value": [1, 3]},
+    ]
+
+    def test_compile_default_values(self):
+        """测试使用准备时的值编译，与 compile() 一致."""
+        compiler = ConditionCompiler()
+        plan = compiler.prepare(self.conditions)
+        assert len(plan) == 3
+        assert plan.fields == ["status", "status", "level"]
+        assert plan.compile().to_dict() == compiler.compile(self.conditions).to_dict()
+
+    def test_compile_many(self):
+        """测试对多组值重复编译."""
+        plan = ConditionCompiler().prepare(self.conditions)
+        first, second = plan.compile_many(
+            [[["a"], ["b"], [0, 1]], ["c", "c", [None, 9]]]
+        )
+        assert first.to_dict() == {
+            "bool": {
+                "filter": [
+                    {"terms": {"status": ["a", "b"]}},
+                    {"range": {"level": {"gte": 0, "lte": 1}}},
+                ]
+            }
+        }
+        assert second.to_dict()["bool"]["filter"] == [
+            {"terms": {"status": ["c"]}},
+            {"range": {"level": {"lte": 9}}},
+        ]
+
+    def test_value_count_mismatch(self):
+        """测试值的数量与条件数量不一致."""
+        with pytest.raises(ValueError):
+            ConditionCompiler().prepare(self.conditions).compile([["a"]])
+
+    def test_custom_parse_override(self):
+        """测试覆盖 parse() 的解析器仍通过 parse() 解析."""
+        calls = []
+
+        class Parser(DefaultConditionParser):
+            def parse(self, condition):
+                calls.append(condition)
+                return super().parse(condition)
+
+        plan = ConditionCompiler(Parser()).prepare(self.conditions)
+        plan.compile()
+        plan.compile([["x"], ["y"], [1, 2]])
+        assert [c.value for c in calls[3:]] == [["x"], ["y"], [1, 2]]
+        assert calls[1].condition == "or"
+
+    def test_builder_reuses_plan(self):
+        """测试 DslQueryBuilder 设置条件时只准备一次."""
+        builder = DslQueryBuilder(search_factory=lambda: Search(index="alerts"))
+        builder.conditions(self.conditions)
+        plan = builder._condition_plan
+        assert builder.to_dict() == builder.build_body()
+        assert builder._condition_plan is plan
+        builder.clear()
+        assert "query" not in builder.build_body()
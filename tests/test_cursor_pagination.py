@@ -0,0 +1,214 @@
+"""DslQueryBuilder 游标分页（PIT + search_after）单元测试."""
+
+import json
+from typing import Any
+
+import pytest
+from elasticsearch.dsl import Search
+
+from elasticsearch_toolkit import DslQueryBuilder
+from elasticsearch_toolkit.builders.cursor import decode_cursor, encode_cursor
+from tests.conftest import PitClient, api_response, make_builder
+
+DOCS = [{"id": i, "level": i % 4, "host": f"h{i % 3}"} for i in range(23)]
+
+
+class FakePitClient(PitClient):
+    """模拟 PIT 与 search_after 的客户端，_shard_doc 为文档在索引中的位置."""
+
+    def __init__(self):
+        super().__init__()
+        self.search_calls: list[dict[str, Any]] = []
+
+    def _sort_values(self, position: int, sort: list[Any]) -> list[Any]:
+        values = []
+        for item in sort:
+            field = item if isinstance(item, str) else next(iter(item))
+            values.append(position if field == "_shard_doc" else DOCS[position][field])
+        return values
+
+    def search(self, index=None, body=None, **kwargs):
+        self.search_calls.append(body)
+        pit = body.get("pit")
+        assert pit is None or index is None
+        assert "from" not in body
+
+        sort = body["sort"]
+        descending = [isinstance(item, dict) for item in sort]
+
+        def key(position: int) -> list[Any]:
+            return [
+                -v if desc else v
+                for v, desc in zip(
+                    self._sort_values(position, sort), descending, strict=True
+                )
+            ]
+
+        positions = sorted(range(len(DOCS)), key=key)
+        if "search_after" in body:
+            after = [
+                -v if desc else v
+                for v, desc in zip(body["search_after"], descending, strict=True)
+            ]
+            positions = [p for p in positions if key(p) > after]
+
+        hits = [
+            {
+                "_index": "logs",
+                "_id": str(DOCS[p]["id"]),
+                "_source": DOCS[p],
+                "sort": self._sort_values(p, sort),
+            }
+            for p in positions[: body["size"]]
+        ]
+        result = {"hits": {"total": {"value": len(DOCS)}, "hits": hits}}
+        if pit is not None:
+            result["pit_id"] = pit["id"] + "+"
+        return api_response(result)
+
+
+class TestCursorPagination:
+    """游标分页测试类."""
+
+    def test_walk_all_pages(self):
+        """测试逐页翻页直到最后一页，最后关闭 PIT."""
+        client = FakePitClient()
+        builder = make_builder().ordering(["-level"])
+        ids = []
+        cursor = None
+        pages = 0
+        while True:
+            page = builder.cursor_pagination(cursor, page_size=5).execute_page(client)
+            pages += 1
+            ids.extend(hit.id for hit in page.hits)
+            assert page.total == len(DOCS)
+            cursor = page.cursor
+            if cursor is None:
+                break
+
+        assert pages == 5
+        expected = sorted(DOCS, key=lambda doc: (-doc["level"], doc["id"]))
+        assert ids == [doc["id"] for doc in expected]
+        assert client.opened == ["pit-1"]
+        # 每次响应返回的新 PIT id 都会用于下一页
+        assert client.closed == ["pit-1+++++"]
+
+    def test_request_body(self):
+        """测试请求体包含 tiebreaker 排序、pit、search_after，不包含索引与 from."""
+        client = FakePitClient()
+        builder = make_builder().ordering(["-level"])
+        builder.conditions([{"key": "host", "method": "eq", "value": ["h1"]}])
+        page = builder.cursor_pagination(page_size=3).execute_page(client)
+        first = client.search_calls[0]
+        assert first["sort"] == [{"level": {"order": "desc"}}, "_shard_doc"]
+        assert first["pit"] == {"id": "pit-1", "keep_alive": "1m"}
+        assert first["size"] == 3
+        assert "search_after" not in first
+
+        builder.cursor_pagination(page.cursor, page_size=3, keep_alive="5m")
+        builder.execute_page(client)
+        second = client.search_calls[1]
+        assert second["pit"] == {"id": "pit-1+", "keep_alive": "5m"}
+        assert second["search_after"] == list(page.hits[-1].meta.sort)
+        assert second["query"] == first["query"]
+
+    def test_resume_keeps_keep_alive(self):
+        """测试恢复游标时沿用游标中的 PIT 保持时间，显式传入时覆盖."""
+        client = FakePitClient()
+        builder = make_builder().cursor_pagination(page_size=3, keep_alive="5m")
+        page = builder.execute_page(client)
+        assert client.search_calls[0]["pit"]["keep_alive"] == "5m"
+
+        resumed = make_builder().cursor_pagination(page.cursor, page_size=3)
+        page = resumed.execute_page(client)
+        assert client.search_calls[1]["pit"] == {"id": "pit-1+", "keep_alive": "5m"}
+
+        resumed.cursor_pagination(page.cursor, page_size=3, keep_alive="2m")
+        resumed.execute_page(client)
+        assert client.search_calls[2]["pit"]["keep_alive"] == "2m"
+
+    def test_execute_page_advances(self):
+        """测试不传游标重复调用 execute_page() 会继续翻页."""
+        client = FakePitClient()
+        builder = make_builder().cursor_pagination(page_size=10)
+        sizes = [len(builder.execute_page(client).hits) for _ in range(3)]
+        assert sizes == [10, 10, 3]
+        assert client.closed == ["pit-1+++"]
+
+    def test_custom_tiebreaker(self):
+        """测试自定义 tiebreaker，排序中已包含时不重复添加."""
+        client = FakePitClient()
+        builder = make_builder().ordering(["level", "-id"])
+        builder.cursor_pagination(page_size=30, tiebreaker="id").execute_page(client)
+        assert client.search_calls[0]["sort"] == ["level", {"id": {"order": "desc"}}]
+
+    def test_build_body_matches_build(self):
+        """测试游标分页下 build_body() 与 build().to_dict() 一致."""
+        builder = make_builder().ordering(["-level"]).query_string("a: b")
+        builder.add_aggregation("by_host", "terms", field="host")
+        builder.cursor_pagination(page_size=5)
+        assert json.dumps(builder.build_body()) == json.dumps(builder.build().to_dict())
+        assert builder.build()._index == ["logs"]
+
+        cursor = encode_cursor("p1", [3, 7], "1m", builder._cursor_fingerprint())
+        builder.cursor_pagination(cursor, page_size=5)
+        body = builder.build_body()
+        assert json.dumps(body) == json.dumps(builder.build().to_dict())
+        assert body["pit"] == {"id": "p1", "keep_alive": "1m"}
+        assert body["search_after"] == [3, 7]
+        assert builder.build()._index is None
+
+    def test_cursor_mismatch(self):
+        """测试游标不能用于其他查询."""
+        client = FakePitClient()
+        page = make_builder().cursor_pagination(page_size=5).execute_page(client)
+        builder = make_builder().query_string("host: h1")
+        builder.cursor_pagination(page.cursor, page_size=5)
+        with pytest.raises(ValueError):
+            builder.execute_page(client)
+        with pytest.raises(ValueError):
+            builder.build_body()
+
+    def test_cursor_mismatch_preset_filter(self):
+        """测试游标不能用于 search_factory 预设过滤条件不同的查询."""
+        builder = DslQueryBuilder(
+            search_factory=lambda: Search(index="logs").filter("term", tenant="a")
+        )
+        builder.cursor_pagination(page_size=5)
+        cursor = encode_cursor("p1", [3], "1m", builder._cursor_fingerprint())
+
+        other = DslQueryBuilder(
+            search_factory=lambda: Search(index="logs").filter("term", tenant="b")
+        )
+        other.cursor_pagination(cursor, page_size=5)
+        with pytest.raises(ValueError):
+            other.build_body()
+        builder.cursor_pagination(cursor, page_size=5)
+        assert builder.build_body()["query"] == {
+            "bool": {"filter": [{"term": {"tenant": "a"}}]}
+        }
+
+    def test_invalid_cursor(self):
+        """测试无效的游标."""
+        for cursor in ("not-a-cursor", "e30", encode_cursor("p", [], "1m", "x")[:-3]):
+            with pytest.raises(ValueError):
+                decode_cursor(cursor)
+        with pytest.raises(ValueError):
+            make_builder().cursor_pagination("%%%")
+
+    def test_not_enabled_and_pagination_resets(self):
+        """测试未设置游标分页时不能执行，pagination() 会关闭游标分页."""
+        builder = make_builder().cursor_pagination(page_size=5)
+        builder.pagination(page=2, page_size=5)
+        assert builder.build_body()["from"] == 5
+        with pytest.raises(ValueError):
+            builder.execute_page(FakePitClient())
+
+    def test_close_cursor(self):
+        """测试提前关闭 PIT."""
+        client = FakePitClient()
+        builder = make_builder().cursor_pagination(page_size=5)
+        builder.execute_page(client)
+        builder.close_cursor(client)
+        assert client.closed == ["pit-1+"]
+        assert "pit" not in builder.build_body()
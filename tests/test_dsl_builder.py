@@ -1,7 +1,9 @@
 """DslQueryBuilder 单元测试."""
 
+import json
 from unittest.mock import MagicMock
 
+import pytest
 from elasticsearch.dsl import Q, Search
 
 from elasticsearch_toolkit import (
@@ -178,6 +180,86 @@ class TestDslQueryBuilder:
         search_mock.to_dict.assert_called_once()
 
 
+def _body_builders() -> list[DslQueryBuilder]:
+    """构造覆盖条件、Query String、额外过滤、排序、分页、聚合各种组合的构建器."""
+
+    def make(**kwargs) -> DslQueryBuilder:
+        return DslQueryBuilder(
+            search_factory=lambda: Search(index="alerts"),
+            field_mapper=FieldMapper(
+                [QueryField(field="name", es_field="name.raw", es_field_for_agg="name")]
+            ),
+            **kwargs,
+        )
+
+    conditions = [
+        {"key": "status", "method": "eq", "value": ["error", "warning"]},
+        {"key": "level", "method": "gte", "value": [3], "condition": "and"},
+        {"key": "host", "method": "include", "value": ["web"], "condition": "or"},
+        {"key": "msg", "method": "exclude", "value": ["debug"]},
+    ]
+    builders = [
+        make(),
+        make().conditions(conditions[:1]),
+        make().conditions(conditions),
+        make().query_string("message: timeout"),
+        make().query_string("   "),
+        make(query_string_transformer=lambda qs: "").query_string("x"),
+        make().add_filter(Q("term", env="prod")),
+        make().conditions(conditions).query_string("a: b"),
+        make().query_string("a: b").add_filter(Q("term", env="prod")),
+        make()
+        .conditions(conditions)
+        .query_string("a: b")
+        .add_filter(Q("bool", should=[Q("term", a=1), Q("term", b=2)]))
+        .add_filter({"term": {"c": 3}}),
+        make().ordering(["-name", "create_time"]).pagination(page=3, page_size=25),
+        make().add_aggregation("by_name", "terms", field="name", size=5),
+    ]
+    agg_builder = make().conditions(conditions)
+    agg_builder.add_aggregation("total", "value_count", field="id")
+    agg_builder.add_aggregation(
+        "daily",
+        "date_histogram",
+        field="create_time",
+        calendar_interval="1d",
+        aggs={"avg_level": {"avg": {"field": "level"}}},
+    )
+    agg_builder.add_aggregation("errors", "filter", filter=Q("term", status="error"))
+    builders.append(agg_builder.ordering(["-create_time"]).pagination(2, 50))
+    return builders
+
+
+class TestDslQueryBuilderBody:
+    """DslQueryBuilder.build_body() 测试类."""
+
+    @pytest.mark.parametrize("builder", _body_builders())
+    def test_identical_to_build(self, builder):
+        """测试 build_body() 与 build().to_dict() 完全一致（包括键的顺序）."""
+        body = builder.build_body()
+        assert json.dumps(body) == json.dumps(builder.build().to_dict())
+
+    def test_preconfigured_search_fallback(self):
+        """测试 search_factory 已包含请求体参数时回退到 build()."""
+        builder = DslQueryBuilder(
+            search_factory=lambda: (
+                Search(index="alerts")
+                .query("match", title="x")
+                .extra(track_total_hits=True)
+            )
+        )
+        builder.conditions([{"key": "status", "method": "eq", "value": ["error"]}])
+        assert json.dumps(builder.build_body()) == json.dumps(builder.build().to_dict())
+
+    def test_body_is_fresh(self):
+        """测试每次生成新的字典，修改结果不影响后续调用."""
+        builder = DslQueryBuilder(search_factory=lambda: Search(index="alerts"))
+        builder.conditions([{"key": "status", "method": "eq", "value": ["error"]}])
+        body = builder.build_body()
+        body["query"]["bool"]["filter"].clear()
+        assert builder.build_body() == builder.build().to_dict()
+
+
 class TestDefaultConditionParser:
     """DefaultConditionParser 测试类."""
 
@@ -0,0 +1,211 @@
+"""QDslCompiler 单元测试及与 Query String 的一致性测试."""
+
+import re
+from typing import Any
+
+import pytest
+from elasticsearch.dsl import Search
+from luqum.parser import parser
+from luqum.tree import (
+    AndOperation,
+    FieldGroup,
+    From,
+    Group,
+    Not,
+    OrOperation,
+    Phrase,
+    Regex,
+    SearchField,
+    To,
+    Word,
+)
+
+from elasticsearch_toolkit import DslQueryBuilder, Q, QDslCompiler, QueryStringOperator
+from elasticsearch_toolkit.core.query import Condition
+from elasticsearch_toolkit.exceptions import UnsupportedOperatorError
+from tests.dsl_eval import compare, doc_values, eval_dsl, unescape, wildcard_regex
+
+DOCS = [
+    {"id": 1, "status": "error", "level": 5, "host": "web-01", "msg": "db timeout"},
+    {"id": 2, "status": "warning", "level": 3, "host": "web-02", "msg": "slow: query"},
+    {"id": 3, "status": "ok", "level": 1, "host": "db-01", "msg": 'say "hi"'},
+    {"id": 4, "status": "error", "level": 2, "host": "db-02"},
+    {"id": 5, "status": "fatal", "level": 9, "msg": "timeout*x", "email": "a@x.com"},
+    {"id": 6, "level": 4, "host": "web-01", "email": "b@y.org"},
+    {"id": 7, "status": "warning", "level": 7, "host": "cache", "msg": "a+b=c"},
+]
+
+
+def eval_query_string(node: Any, doc: dict[str, Any], field: str | None = None) -> bool:
+    """基于 luqum 语法树的内存 Query String 求值器（仅覆盖 Q.build() 的输出）."""
+    if isinstance(node, AndOperation):
+        return all(eval_query_string(c, doc, field) for c in node.children)
+    if isinstance(node, OrOperation):
+        return any(eval_query_string(c, doc, field) for c in node.children)
+    if isinstance(node, Not):
+        return not eval_query_string(node.a, doc, field)
+    if isinstance(node, Group | FieldGroup):
+        return eval_query_string(node.expr, doc, field)
+    if isinstance(node, SearchField):
+        return eval_query_string(node.expr, doc, node.name)
+
+    values = doc_values(doc, field)
+    if isinstance(node, Phrase):
+        expected = node.value[1:-1].replace('\\"', '"')
+        return any(str(v) == expected for v in values)
+    if isinstance(node, Regex):
+        pattern = re.compile(node.value[1:-1])
+        return any(pattern.fullmatch(str(v)) for v in values)
+    if isinstance(node, From):
+        op = "gte" if node.include else "gt"
+        return any(compare(v, op, unescape(node.a.value)) for v in values)
+    if isinstance(node, To):
+        op = "lte" if node.include else "lt"
+        return any(compare(v, op, unescape(node.a.value)) for v in values)
+    if isinstance(node, Word):
+        if node.value == "*":
+            return bool(values)
+        pattern = wildcard_regex(node.value)
+        return any(pattern.fullmatch(str(v)) for v in values)
+    raise AssertionError(f"unexpected node: {node!r}")
+
+
+PARITY_CASES = [
+    Q(status="error"),
+    Q(status__neq="error"),
+    Q(status="error") & Q(level__gte=3),
+    Q(status="error") | Q(status="warning") | Q(status="fatal"),
+    (Q(status="error") | Q(status="warning")) & Q(level__gt=3),
+    ~(Q(status="error") | Q(host="cache")),
+    Q(msg__contains="timeout"),
+    Q(msg__contains="out*x"),
+    Q(msg__contains="slow: q"),
+    Q(msg__not_contains="timeout") & Q(level__lt=5),
+    Q(msg='say "hi"'),
+    Q(msg="a+b=c") | Q(level__lte=1),
+    Q(email__exists=True),
+    Q(email__not_exists=True) & Q(host__contains="web"),
+    Q(email__regex=".*@x\\.com"),
+    Q(email__not_regex=".*@x\\.com") & Q(email__exists=True),
+    ~~(Q(level__gte=4) & ~Q(status="warning")),
+    (Q(host="web-01") & Q(level__gte=5)) | (Q(host="web-01") & Q(level__lt=5)),
+    Q(status="error") & Q(level=None),
+    Q(status="ok") | ~(Q(level__gte=2) & Q(level__lte=7)),
+]
+
+
+def _matched_ids_by_query_string(q: Q) -> set[int]:
+    tree = parser.parse(q.build())
+    return {doc["id"] for doc in DOCS if eval_query_string(tree, doc)}
+
+
+def _matched_ids_by_dsl(q: Q) -> set[int]:
+    dsl_q = q.to_dsl()
+    return {doc["id"] for doc in DOCS if eval_dsl(dsl_q.to_dict(), doc)}
+
+
+class TestQDslParity:
+    """Q.to_dsl() 与 Q.build() 匹配结果一致性测试类."""
+
+    @pytest.mark.parametrize("q", PARITY_CASES, ids=lambda q: q.build())
+    def test_parity(self, q):
+        """测试 DSL 与 Query String 匹配相同的文档."""
+        expected = _matched_ids_by_query_string(q)
+        assert _matched_ids_by_dsl(q) == expected
+        assert expected, "测试用例应至少匹配一个文档"
+
+    @pytest.mark.parametrize("q", PARITY_CASES, ids=lambda q: q.build())
+    def test_parity_optimized(self, q):
+        """测试优化后的 Q 对象仍然保持一致."""
+        optimized = q.optimize()
+        assert _matched_ids_by_dsl(optimized) == _matched_ids_by_query_string(q)
+        assert _matched_ids_by_query_string(optimized) == _matched_ids_by_query_string(
+            q
+        )
+
+
+class TestQDslCompiler:
+    """QDslCompiler 测试类."""
+
+    def test_term(self):
+        """测试 EQUAL 编译为 term."""
+        assert Q(status="error").to_dsl().to_dict() == {"term": {"status": "error"}}
+
+    def test_and_uses_filter_context(self):
+        """测试 AND 编译为 bool.filter，取反条件合并到 must_not."""
+        q = Q(status="error") & Q(level__gte=3) & ~Q(host="a")
+        assert q.to_dsl().to_dict() == {
+            "bool": {
+                "filter": [
+                    {"term": {"status": "error"}},
+                    {"range": {"level": {"gte": "3"}}},
+                ],
+                "must_not": [{"term": {"host": "a"}}],
+            }
+        }
+
+    def test_or_uses_should(self):
+        """测试 OR 编译为 bool.should."""
+        q = Q(status="error") | Q(level__gte=3)
+        assert q.to_dsl().to_dict() == {
+            "bool": {
+                "should": [
+                    {"term": {"status": "error"}},
+                    {"range": {"level": {"gte": "3"}}},
+                ],
+                "minimum_should_match": 1,
+            }
+        }
+
+    def test_value_group_to_terms(self):
+        """测试 optimize() 合并的多值条件编译为 terms."""
+        q = (Q(status="a") | Q(status="b")).optimize()
+        assert q.to_dsl().to_dict() == {"terms": {"status": ["a", "b"]}}
+
+    def test_wildcard_escaped(self):
+        """测试 INCLUDE 值中的通配符按字面匹配."""
+        q = Q(msg__contains="a*b?")
+        assert q.to_dsl().to_dict() == {"wildcard": {"msg": {"value": "*a\\*b\\?*"}}}
+
+    def test_double_negation(self):
+        """测试双重否定被还原."""
+        q = ~Q(status__neq="error")
+        assert q.to_dsl().to_dict() == {"term": {"status": "error"}}
+
+    def test_empty(self):
+        """测试空 Q 对象编译为 None."""
+        assert Q().to_dsl() is None
+        assert Q(status=None).to_dsl() is None
+
+    def test_unsupported_operator(self):
+        """测试不支持的操作符."""
+        with pytest.raises(UnsupportedOperatorError):
+            QDslCompiler().compile_condition(
+                Condition("a", QueryStringOperator.BETWEEN, 1)
+            )
+
+    def test_dsl_builder_add_filter_accepts_q(self):
+        """测试 DslQueryBuilder.add_filter 直接接受 Q 对象."""
+        builder = DslQueryBuilder(search_factory=lambda: Search(index="alerts"))
+        builder.add_filter(Q(status="error") & Q(level__gte=3))
+        body = builder.to_dict()
+        assert body["query"] == {
+            "bool": {
+                "filter": [
+                    {
+                        "bool": {
+                            "filter": [
+                                {"term": {"status": "error"}},
+                                {"range": {"level": {"gte": "3"}}},
+                            ]
+                        }
+                    }
+                ]
+            }
+        }
+
+    def test_dsl_builder_add_filter_ignores_empty_q(self):
+        """测试 DslQueryBuilder.add_filter 忽略空 Q 对象."""
+        builder = DslQueryBuilder(search_factory=lambda: Search(index="alerts"))
+        builder.add_filter(Q())
+        assert "query" not in builder.to_dict()
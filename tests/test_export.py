@@ -0,0 +1,216 @@
+"""SlicedExporter 单元测试."""
+
+import threading
+from typing import Any
+
+import pytest
+from elasticsearch.dsl import Search
+
+from elasticsearch_toolkit import DslQueryBuilder
+from elasticsearch_toolkit.builders.export import ExportMode, SlicedExporter
+
+N_DOCS = 1000
+
+
+class FakeSliceClient:
+    """模拟 sliced scroll 与 PIT 切片的线程安全客户端，按 id % max 划分切片."""
+
+    def __init__(self, fail_on_request: int | None = None):
+        self.lock = threading.Lock()
+        self.requests: list[dict[str, Any]] = []
+        self.scrolls: dict[str, list[dict[str, Any]]] = {}
+        self.cleared: list[str] = []
+        self.opened_pits: list[str] = []
+        self.closed_pits: list[str] = []
+        self.fail_on_request = fail_on_request
+
+    def _slice_hits(self, body: dict[str, Any]) -> list[dict[str, Any]]:
+        slice_ = body.get("slice", {"id": 0, "max": 1})
+        return [
+            {"_index": "logs", "_id": str(i), "_source": {"n": i}, "sort": [i]}
+            for i in range(N_DOCS)
+            if i % slice_["max"] == slice_["id"]
+        ]
+
+    def _record(self, body: dict[str, Any]) -> None:
+        with self.lock:
+            self.requests.append(body)
+            if self.fail_on_request == len(self.requests):
+                raise RuntimeError("node disconnected")
+
+    def search(self, index=None, body=None, scroll=None, **kwargs):
+        self._record(body)
+        hits = self._slice_hits(body)
+        size = body["size"]
+        if scroll is not None:
+            assert index == ["logs"]
+            assert body["sort"] == ["_doc"]
+            with self.lock:
+                scroll_id = f"scroll-{len(self.scrolls)}"
+                self.scrolls[scroll_id] = hits[size:]
+            return {"_scroll_id": scroll_id, "hits": {"hits": hits[:size]}}
+
+        assert index is None
+        assert body["sort"] == ["_shard_doc"]
+        if "search_after" in body:
+            after = body["search_after"][0]
+            hits = [hit for hit in hits if hit["sort"][0] > after]
+        return {"hits": {"hits": hits[:size]}}
+
+    def scroll(self, scroll_id=None, scroll=None, **kwargs):
+        self._record({"scroll_id": scroll_id})
+        with self.lock:
+            remaining = self.scrolls[scroll_id]
+            size = 50
+            self.scrolls[scroll_id] = remaining[size:]
+        return {"_scroll_id": scroll_id, "hits": {"hits": remaining[:size]}}
+
+    def clear_scroll(self, scroll_id=None, **kwargs):
+        with self.lock:
+            self.cleared.append(scroll_id)
+
+    def open_point_in_time(self, index=None, keep_alive=None, **kwargs):
+        self.opened_pits.append("pit-1")
+        return {"id": "pit-1"}
+
+    def close_point_in_time(self, id=None, **kwargs):
+        self.closed_pits.append(id)
+
+
+def make_builder() -> DslQueryBuilder:
+    builder = DslQueryBuilder(search_factory=lambda: Search(index="logs"))
+    builder.conditions([{"key": "level", "method": "gte", "value": [3]}])
+    builder.ordering(["-create_time"]).pagination(page=3, page_size=20)
+    return builder
+
+
+class TestSlicedExporter:
+    """SlicedExporter 测试类."""
+
+    @pytest.mark.parametrize("mode", list(ExportMode))
+    def test_export_all(self, mode):
+        """测试所有切片的命中都被导出且不重复，结束后清理上下文."""
+        client = FakeSliceClient()
+        exporter = make_builder().export(
+            slices=4, batch_size=50, mode=mode, using=client
+        )
+        ids = [hit["_id"] for hit in exporter]
+
+        assert sorted(ids, key=int) == [str(i) for i in range(N_DOCS)]
+        assert exporter.stats.hits == N_DOCS
+        assert exporter.stats.slice_hits == [250] * 4
+        assert exporter.stats.hits_per_second > 0
+        assert not exporter.stats.cancelled
+        if mode is ExportMode.SCROLL:
+            assert sorted(client.cleared) == sorted(client.scrolls)
+        else:
+            assert client.closed_pits == ["pit-1"]
+
+    def test_request_body(self):
+        """测试请求体只包含查询条件和切片参数，不包含排序、分页."""
+        client = FakeSliceClient()
+        builder = make_builder()
+        list(builder.export(slices=2, batch_size=100, mode="pit", using=client))
+        first = client.requests[0]
+        assert first["query"] == builder.build_body()["query"]
+        assert first["pit"] == {"id": "pit-1", "keep_alive": "1m"}
+        assert first["slice"]["max"] == 2
+        assert "from" not in first
+
+    def test_pit_id_carried_forward(self):
+        """测试 PIT 切片使用响应中返回的最新 PIT id，并用它关闭 PIT."""
+
+        class RefreshingPitClient(FakeSliceClient):
+            def search(self, index=None, body=None, scroll=None, **kwargs):
+                response = super().search(index, body, scroll, **kwargs)
+                return {**response, "pit_id": body["pit"]["id"] + "+"}
+
+        client = RefreshingPitClient()
+        hits = list(
+            make_builder().export(slices=1, batch_size=300, mode="pit", using=client)
+        )
+        assert len(hits) == N_DOCS
+        assert [body["pit"]["id"] for body in client.requests] == [
+            "pit-1",
+            "pit-1+",
+            "pit-1++",
+            "pit-1+++",
+        ]
+        assert client.closed_pits == ["pit-1++++"]
+
+    @pytest.mark.parametrize("mode", list(ExportMode))
+    def test_preset_filter_and_params(self, mode):
+        """测试导出使用 search_factory 中预设的过滤条件和请求参数."""
+
+        class RecordingClient(FakeSliceClient):
+            def __init__(self):
+                super().__init__()
+                self.search_kwargs: list[dict[str, Any]] = []
+                self.pit_kwargs: dict[str, Any] = {}
+
+            def search(self, index=None, body=None, scroll=None, **kwargs):
+                self.search_kwargs.append(kwargs)
+                return super().search(index, body, scroll)
+
+            def open_point_in_time(self, index=None, keep_alive=None, **kwargs):
+                self.pit_kwargs = kwargs
+                return super().open_point_in_time(index, keep_alive)
+
+        def factory() -> Search:
+            search = Search(index="logs").filter("term", tenant="acme")
+            return search.params(routing="acme")
+
+        client = RecordingClient()
+        builder = DslQueryBuilder(search_factory=factory)
+        builder.conditions([{"key": "a", "method": "eq", "value": ["x"]}])
+        list(builder.export(slices=2, batch_size=500, mode=mode, using=client))
+
+        assert client.requests[0]["query"] == builder.build_body()["query"]
+        filters = client.requests[0]["query"]["bool"]["filter"]
+        assert {"term": {"tenant": "acme"}} in filters
+        if mode is ExportMode.SCROLL:
+            assert all(kw == {"routing": "acme"} for kw in client.search_kwargs)
+        else:
+            # 使用 PIT 时 routing 只能在打开 PIT 时指定
+            assert client.pit_kwargs == {"routing": "acme"}
+            assert all(kw == {} for kw in client.search_kwargs)
+
+    def test_single_slice(self):
+        """测试只有一个切片时不发送 slice 参数."""
+        client = FakeSliceClient()
+        hits = list(make_builder().export(slices=1, batch_size=300, using=client))
+        assert len(hits) == N_DOCS
+        assert all("slice" not in body for body in client.requests)
+
+    def test_cancel_cleans_up(self):
+        """测试提前结束时停止所有线程并清理 scroll 上下文，已拉取的批次数受队列限制."""
+        client = FakeSliceClient()
+        exporter = SlicedExporter(
+            make_builder(), slices=4, batch_size=50, max_queue_size=1, using=client
+        )
+        hits = iter(exporter)
+        next(hits)
+        hits.close()
+
+        assert exporter.stats.cancelled
+        assert sorted(client.cleared) == sorted(client.scrolls)
+        assert len(client.requests) < N_DOCS // 50
+        assert not any(t.name.startswith("es-export") for t in threading.enumerate())
+
+    def test_slice_error(self):
+        """测试切片线程中的异常会在生成器中抛出，并关闭 PIT."""
+        client = FakeSliceClient(fail_on_request=3)
+        exporter = make_builder().export(
+            slices=2, batch_size=50, mode="pit", using=client
+        )
+        with pytest.raises(RuntimeError, match="node disconnected"):
+            list(exporter)
+        assert client.closed_pits == ["pit-1"]
+
+    def test_invalid_arguments(self):
+        """测试无效参数."""
+        for kwargs in ({"slices": 0}, {"batch_size": 0}, {"max_queue_size": 0}):
+            with pytest.raises(ValueError):
+                SlicedExporter(make_builder(), **kwargs)
+        with pytest.raises(ValueError):
+            SlicedExporter(make_builder(), mode="unknown")
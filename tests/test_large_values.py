@@ -0,0 +1,248 @@
+"""LargeValueQueryPlanner 单元测试."""
+
+from typing import Any
+
+import pytest
+
+from elasticsearch_toolkit import (
+    DslQueryBuilder,
+    GroupRelation,
+    LogicOperator,
+    QueryStringBuilder,
+    QueryStringOperator,
+)
+from elasticsearch_toolkit.builders.large_values import (
+    LargeValueQueryPlanner,
+    LargeValueStrategy,
+)
+from tests.conftest import api_response, make_builder
+
+DOCS = [{"_id": str(i), "host": f"h{i}", "level": i % 5} for i in range(50)]
+
+
+class FakeClient:
+    """按 query_string 过滤中的 host 值模拟 search/msearch 的客户端."""
+
+    def __init__(self):
+        self.search_calls: list[dict] = []
+        self.msearch_calls: list[list] = []
+
+    def _search_body(self, body: dict[str, Any]) -> dict[str, Any]:
+        filters = body["query"]["bool"]["filter"]
+        query_string = filters[0]["query_string"]["query"]
+        matched = [doc for doc in DOCS if f'"{doc["host"]}"' in query_string]
+        if "sort" in body:
+            matched.sort(key=lambda doc: doc["level"], reverse=True)
+        size = body.get("size", 10)
+        hits = [
+            {
+                "_index": "logs",
+                "_id": doc["_id"],
+                "_source": doc,
+                **({"sort": [doc["level"]]} if "sort" in body else {}),
+            }
+            for doc in matched[:size]
+        ]
+        return {"hits": {"total": {"value": len(matched)}, "hits": hits}}
+
+    def search(self, index=None, body=None, **kwargs):
+        self.search_calls.append(body)
+        return api_response(self._search_body(body))
+
+    def msearch(self, index=None, body=None, **kwargs):
+        self.msearch_calls.append(body)
+        searches = body[1::2]
+        return api_response({"responses": [self._search_body(b) for b in searches]})
+
+
+def _host_builder(n: int, **kwargs: Any) -> QueryStringBuilder:
+    builder = QueryStringBuilder(**kwargs)
+    builder.add_filter("host", QueryStringOperator.EQUAL, [f"h{i}" for i in range(n)])
+    return builder
+
+
+class TestLargeValuePlan:
+    """LargeValueQueryPlanner.plan() 测试类."""
+
+    def test_within_budget(self):
+        """测试未超出预算时直接使用 Query String."""
+        builder = _host_builder(3)
+        plan = LargeValueQueryPlanner(max_clause_count=10).plan(builder)
+        assert plan.report.strategy is LargeValueStrategy.QUERY_STRING
+        assert plan.report.clause_count == 3
+        assert plan.query_strings == [builder.build()]
+        assert plan.terms_filters == []
+
+    def test_terms(self):
+        """测试超出预算的精确匹配转为 terms 过滤."""
+        builder = _host_builder(20)
+        builder.add_filter("level", QueryStringOperator.GTE, [3])
+        plan = LargeValueQueryPlanner(max_clause_count=10).plan(builder)
+
+        assert plan.report.strategy is LargeValueStrategy.TERMS
+        assert plan.report.terms_fields == ["host"]
+        assert plan.report.within_budget
+        assert plan.query_strings == ["level: >=3"]
+        assert plan.terms_filters[0].to_dict() == {
+            "terms": {"host": [f"h{i}" for i in range(20)]}
+        }
+
+    def test_terms_negated_and_split(self):
+        """测试 NOT_EQUAL 转为取反的 terms，超出 max_terms_count 时拆分."""
+        builder = QueryStringBuilder()
+        builder.add_filter("host", QueryStringOperator.NOT_EQUAL, ["a", "b", "c"])
+        planner = LargeValueQueryPlanner(max_clause_count=2, max_terms_count=2)
+        plan = planner.plan(builder)
+        assert plan.query_strings == [""]
+        assert plan.terms_filters[0].to_dict() == {
+            "bool": {
+                "must_not": [
+                    {"terms": {"host": ["a", "b"]}},
+                    {"terms": {"host": ["c"]}},
+                ]
+            }
+        }
+
+    def test_msearch_chunks(self):
+        """测试无法转为 terms 时按子句预算拆分."""
+        builder = QueryStringBuilder()
+        builder.add_filter(
+            "msg", QueryStringOperator.INCLUDE, [f"m{i}" for i in range(10)]
+        )
+        builder.add_filter("level", QueryStringOperator.GTE, [3])
+        plan = LargeValueQueryPlanner(max_clause_count=5).plan(builder)
+
+        assert plan.report.strategy is LargeValueStrategy.MSEARCH
+        assert plan.report.chunked_field == "msg"
+        assert plan.report.chunk_count == 3
+        assert plan.query_strings[0] == (
+            "level: >=3 AND msg: (*m0* OR *m1* OR *m2* OR *m3*)"
+        )
+        assert plan.query_strings[-1] == "level: >=3 AND msg: (*m8* OR *m9*)"
+
+    def test_use_terms_disabled(self):
+        """测试禁用 terms 时直接拆分."""
+        planner = LargeValueQueryPlanner(max_clause_count=8, use_terms=False)
+        plan = planner.plan(_host_builder(20))
+        assert plan.report.strategy is LargeValueStrategy.MSEARCH
+        assert plan.report.chunk_count == 3
+
+    def test_group_and_not_splittable(self):
+        """测试多值 AND 关系无法拆分时在报告中标记."""
+        builder = QueryStringBuilder()
+        builder.add_filter(
+            "tag",
+            QueryStringOperator.EQUAL,
+            [f"t{i}" for i in range(10)],
+            group_relation=GroupRelation.AND,
+        )
+        plan = LargeValueQueryPlanner(max_clause_count=5).plan(builder)
+        assert plan.report.strategy is LargeValueStrategy.QUERY_STRING
+        assert not plan.report.within_budget
+        assert plan.query_strings == [builder.build()]
+
+    @pytest.mark.parametrize(
+        "operator",
+        [
+            QueryStringOperator.NOT_INCLUDE,
+            QueryStringOperator.NREG,
+            QueryStringOperator.NOT_EQUAL,
+        ],
+    )
+    def test_negated_not_chunked(self, operator):
+        """测试取反的多值条件不会被拆分（拆分后取并集会包含应排除的文档）."""
+        builder = QueryStringBuilder()
+        builder.add_filter("msg", operator, ["a", "b", "c", "d"])
+        planner = LargeValueQueryPlanner(max_clause_count=2, use_terms=False)
+        plan = planner.plan(builder)
+        assert plan.report.strategy is LargeValueStrategy.QUERY_STRING
+        assert not plan.report.within_budget
+        assert plan.query_strings == [builder.build()]
+
+    def test_negated_chunks_other_filter(self):
+        """测试存在取反条件时拆分未取反的条件."""
+        builder = QueryStringBuilder()
+        builder.add_filter("msg", QueryStringOperator.NOT_INCLUDE, ["x", "y", "z"])
+        builder.add_filter("host", QueryStringOperator.INCLUDE, ["a", "b"])
+        plan = LargeValueQueryPlanner(max_clause_count=4).plan(builder)
+        assert plan.report.chunked_field == "host"
+        assert plan.report.chunk_count == 2
+
+    def test_plan_does_not_modify_builder(self):
+        """测试规划不修改原构建器."""
+        builder = _host_builder(20)
+        expected = builder.build()
+        LargeValueQueryPlanner(max_clause_count=8, use_terms=False).plan(builder)
+        builder.add_filter("level", QueryStringOperator.GTE, [3])
+        assert builder.build() == expected + " AND level: >=3"
+
+    def test_apply_or_logic(self):
+        """测试条件之间为 OR 关系时合并为 bool.should."""
+        builder = _host_builder(20, logic_operator=LogicOperator.OR)
+        builder.add_filter("level", QueryStringOperator.GTE, [3])
+        plan = LargeValueQueryPlanner(max_clause_count=10).plan(builder)
+        dsl_builder = plan.apply(make_builder())
+        assert dsl_builder.to_dict()["query"]["bool"]["filter"] == [
+            {
+                "bool": {
+                    "should": [
+                        {"query_string": {"query": "level: >=3"}},
+                        {"terms": {"host": [f"h{i}" for i in range(20)]}},
+                    ],
+                    "minimum_should_match": 1,
+                }
+            }
+        ]
+
+    def test_invalid_budget(self):
+        """测试无效的预算."""
+        with pytest.raises(ValueError):
+            LargeValueQueryPlanner(max_clause_count=0)
+
+
+class TestLargeValueExecute:
+    """LargeValueQueryPlanner.execute() 测试类."""
+
+    def _factory(self, ordering: list[str] | None = None, page_size: int = 10):
+        def factory() -> DslQueryBuilder:
+            builder = make_builder()
+            builder.pagination(page=1, page_size=page_size)
+            if ordering:
+                builder.ordering(ordering)
+            return builder
+
+        return factory
+
+    def test_single_search(self):
+        """测试只有一个子查询时直接执行 search."""
+        client = FakeClient()
+        planner = LargeValueQueryPlanner(max_clause_count=100)
+        result = planner.execute(_host_builder(5), self._factory(), using=client)
+        assert result.report.strategy is LargeValueStrategy.QUERY_STRING
+        assert result.total == 5
+        assert len(client.search_calls) == 1
+        assert not client.msearch_calls
+
+    def test_msearch_merged(self):
+        """测试拆分后通过一次 msearch 执行并合并结果."""
+        client = FakeClient()
+        planner = LargeValueQueryPlanner(max_clause_count=8, use_terms=False)
+        result = planner.execute(
+            _host_builder(20), self._factory(page_size=30), using=client
+        )
+        assert result.report.strategy is LargeValueStrategy.MSEARCH
+        assert len(client.msearch_calls) == 1
+        assert not client.search_calls
+        assert result.total == 20
+        assert sorted(hit.meta.id for hit in result.hits) == sorted(
+            str(i) for i in range(20)
+        )
+
+    def test_msearch_sorted_page(self):
+        """测试合并结果按排序字段排序后再分页."""
+        client = FakeClient()
+        planner = LargeValueQueryPlanner(max_clause_count=8, use_terms=False)
+        result = planner.execute(
+            _host_builder(20), self._factory(["-level"], page_size=5), using=client
+        )
+        assert [hit.level for hit in result.hits] == [4, 4, 4, 4, 3]
@@ -0,0 +1,84 @@
+"""PreparedQ 预编译模板单元测试."""
+
+import pytest
+
+from elasticsearch_toolkit import Param, PreparedQ, Q
+
+
+def _substitute(values: dict) -> Q:
+    """用实际值构造与模板结构相同的 Q 对象，作为对照."""
+    return (
+        (Q(service=values["service"]) | Q(app__contains=values["app"]))
+        & Q(level__gte=values["level"])
+        & ~Q(message__regex=values["pattern"])
+        & Q(env="prod")
+    )
+
+
+TEMPLATE = (
+    (Q(service=Param("service")) | Q(app__contains=Param("app")))
+    & Q(level__gte=Param("level"))
+    & ~Q(message__regex=Param("pattern"))
+    & Q(env="prod")
+)
+
+
+class TestPreparedQ:
+    """PreparedQ 测试类."""
+
+    def test_bind_simple(self):
+        """测试绑定简单模板."""
+        template = (
+            Q(service=Param("service"))
+            & Q(level__gte=Param("level"))
+            & Q(message__contains=Param("message"))
+        ).prepare()
+        assert isinstance(template, PreparedQ)
+        result = template.bind(service="api", level=3, message="timeout")
+        assert result == 'service: "api" AND level: >=3 AND message: *timeout*'
+
+    def test_params(self):
+        """测试获取参数名."""
+        assert TEMPLATE.prepare().params == {"service", "app", "level", "pattern"}
+
+    @pytest.mark.parametrize(
+        "values",
+        [
+            {"service": "api", "app": "web", "level": 3, "pattern": ".*debug.*"},
+            {"service": 'say "x"', "app": "a:b c", "level": "2", "pattern": "x"},
+            {"service": None, "app": "web", "level": 3, "pattern": None},
+            {"service": "", "app": "***", "level": None, "pattern": " "},
+            {"service": None, "app": None, "level": None, "pattern": None},
+        ],
+    )
+    def test_bind_matches_build(self, values):
+        """测试绑定结果与代入值后 build() 结果一致."""
+        assert TEMPLATE.prepare().bind(**values) == _substitute(values).build()
+
+    def test_reuse_template(self):
+        """测试模板可以多次绑定."""
+        template = Q(host=Param("host")).prepare()
+        assert template.bind(host="a") == 'host: "a"'
+        assert template.bind(host="b") == 'host: "b"'
+
+    def test_missing_param(self):
+        """测试缺少参数值."""
+        template = Q(host=Param("host")).prepare()
+        with pytest.raises(ValueError, match="host"):
+            template.bind()
+
+    def test_constant_template(self):
+        """测试不含参数的模板."""
+        template = (Q(a=1) | Q(b=2)).prepare()
+        assert template.params == frozenset()
+        assert template.bind() == (Q(a=1) | Q(b=2)).build()
+
+    def test_exists_with_param(self):
+        """测试 EXISTS 条件忽略参数值."""
+        template = (Q(field__exists=Param("unused")) & Q(a=Param("a"))).prepare()
+        assert template.bind(a=1) == 'field: * AND a: "1"'
+
+    def test_shared_param(self):
+        """测试同一参数在多处使用."""
+        template = (Q(src=Param("ip")) | Q(dst=Param("ip"))).prepare()
+        assert template.bind(ip="10.0.0.1") == 'src: "10.0.0.1" OR dst: "10.0.0.1"'
@@ -1,11 +1,27 @@
 """Q 对象和 escape_query_string 函数单元测试."""
 
+import functools
+import operator
+
 import pytest
 
-from elasticsearch_toolkit import Q, QueryStringOperator, escape_query_string
+from elasticsearch_toolkit import (
+    Q,
+    QueryStringOperator,
+    escape_query_string,
+    escape_query_strings,
+)
 from elasticsearch_toolkit.exceptions import UnsupportedOperatorError
 
 
+def alternating_tree(depth: int) -> Q:
+    """构造 & 与 | 交替嵌套 depth 层的 Q 对象，同连接符展平不会减少深度."""
+    q = Q(a=0)
+    for i in range(1, depth):
+        q = q & Q(a=i) if i % 2 else q | Q(a=i)
+    return q
+
+
 class TestEscapeQueryString:
     """escape_query_string 函数测试类."""
 
@@ -89,6 +105,26 @@ class TestEscapeQueryString:
         result = escape_query_string(None)
         assert result is None
 
+    def test_escape_backslash_before_plain_char(self):
+        """测试反斜杠后跟普通字符时只转义反斜杠."""
+        result = escape_query_string("a\\b:c")
+        assert result == "a\\\\b\\:c"
+
+    def test_escape_batch(self):
+        """测试批量转义函数."""
+        result = escape_query_strings(["a+b", "plain", "x\\:y", None, 3])
+        assert result == ["a\\+b", "plain", "x\\:y", None, 3]
+
+    def test_escape_batch_accepts_iterable(self):
+        """测试批量转义接受任意可迭代对象."""
+        result = escape_query_strings(v for v in ("a b", "c"))
+        assert result == ["a\\ b", "c"]
+
+    def test_escape_batch_matches_single(self):
+        """测试批量转义与逐个转义结果一致."""
+        values = ["web-01", "a\\\\b", 'say "hi"', "k:v/1", "clean"]
+        assert escape_query_strings(values) == [escape_query_string(v) for v in values]
+
 
 class TestQ:
     """Q 对象测试类."""
@@ -198,8 +234,7 @@ class TestQ:
 
     def test_unsupported_operator(self):
         """测试不支持的操作符."""
-        q = Q()
-        q._children.append({"field": "test", "operator": "invalid", "value": "value"})
+        q = Q(field="test", operator="invalid", value="value")
         with pytest.raises(UnsupportedOperatorError):
             q.build()
 
@@ -237,3 +272,237 @@ class TestQ:
         q = Q(message='say "hello"')
         result = q.build()
         assert 'message: "say \\"hello\\""' == result
+
+
+class TestQFreeze:
+    """冻结 Q 对象测试类."""
+
+    def test_freeze_build_same_result(self):
+        """测试冻结前后构建结果一致."""
+        q = (Q(status="error") | Q(status="warning")) & ~Q(level__gte=3)
+        assert q.freeze().build() == q.build()
+
+    def test_freeze_does_not_modify_original(self):
+        """测试冻结返回新对象，原对象不变."""
+        q = Q(status="error")
+        frozen = q.freeze()
+        assert frozen.is_frozen()
+        assert not q.is_frozen()
+
+    def test_freeze_idempotent(self):
+        """测试重复冻结返回同一对象."""
+        frozen = Q(status="error").freeze()
+        assert frozen.freeze() is frozen
+
+    def test_frozen_build_cached(self):
+        """测试冻结对象缓存构建结果."""
+        frozen = (Q(a=1) | Q(b=2)).freeze()
+        first = frozen.build()
+        assert frozen.build() is first
+        assert str(frozen) is first
+
+    def test_frozen_immutable(self):
+        """测试冻结对象不可修改."""
+        frozen = Q(status="error").freeze()
+        with pytest.raises(AttributeError):
+            frozen._negated = True
+        with pytest.raises(AttributeError):
+            frozen._children = ()
+
+    def test_frozen_identical_subtrees_interned(self):
+        """测试结构相同的子树共享同一个实例."""
+        left = ((Q(a=1) | Q(b=2)) & Q(c=3)).freeze()
+        right = ((Q(a=1) | Q(b=2)) & Q(d=4)).freeze()
+        assert left._children[0] is right._children[0]
+
+    def test_parent_reuses_frozen_child(self):
+        """测试父节点构建时复用冻结子节点的缓存."""
+        child = (Q(a=1) | Q(b=2)).freeze()
+        child_str = child.build()
+        parent = child & Q(c=3)
+        assert parent.build() == f'({child_str}) AND c: "3"'
+
+    def test_operators_on_frozen(self):
+        """测试冻结对象支持逻辑运算，结果为非冻结对象."""
+        frozen = Q(a=1).freeze()
+        combined = frozen | Q(b=2)
+        assert not combined.is_frozen()
+        assert (~frozen).build() == 'NOT (a: "1")'
+
+    def test_structural_equality_and_hash(self):
+        """测试结构化相等与哈希."""
+        q1 = Q(status="error") & Q(tags=["a", "b"])
+        q2 = Q(status="error") & Q(tags=["a", "b"])
+        assert q1 == q2
+        assert hash(q1) == hash(q2)
+        assert q1.freeze() == q2
+        assert q1 != Q(status="error") | Q(tags=["a", "b"])
+        assert q1 != ~q2
+        assert len({q1.freeze(), q2.freeze()}) == 1
+
+    def test_deep_structural_hash_and_equality(self):
+        """测试深度嵌套的 Q 对象的结构化哈希与相等比较不会超出递归深度."""
+        q1, q2 = alternating_tree(5000), alternating_tree(5000)
+        assert hash(q1) == hash(q2)
+        assert q1 == q2
+        assert q1 != alternating_tree(4999)
+        assert len({q1, q2}) == 1
+
+    def test_freeze_deeply_nested(self):
+        """测试冻结深度嵌套的 Q 对象不会超出递归深度."""
+        q = alternating_tree(5000)
+        frozen = q.freeze()
+        assert frozen.is_frozen()
+        assert frozen == q
+        assert alternating_tree(5000).freeze() is frozen
+        assert frozen.build() == q.build()
+
+    @pytest.mark.parametrize("values", [(1, True, 1.0), (True, 1, 1.0), (1.0, True, 1)])
+    def test_equal_values_of_different_types_not_interned(self, values):
+        """测试 1、True、1.0 不会被视为相同的条件（按任意顺序驻留）."""
+        expected = [Q(a=value).build() for value in values]
+        frozen = [Q(a=value).freeze() for value in values]
+        assert [q.build() for q in frozen] == expected
+        assert len(set(expected)) == 3
+        assert frozen[0] is not frozen[1]
+        assert Q(a=1) != Q(a=True)
+        assert Q(a=[1]) != Q(a=[True])
+        assert Q(a=1.0) != Q(a=1)
+
+
+class TestQFlatten:
+    """Q 对象展平组合测试类."""
+
+    def test_or_chain_flattened(self):
+        """测试同连接符的 OR 组合被展平."""
+        q = Q(status="a") | Q(status="b") | Q(status="c")
+        assert len(q._children) == 3
+        assert q.build() == 'status: "a" OR status: "b" OR status: "c"'
+
+    def test_and_chain_flattened(self):
+        """测试同连接符的 AND 组合被展平."""
+        q = (Q(a=1) & Q(b=2)) & (Q(c=3) & Q(d=4))
+        assert len(q._children) == 4
+        assert q.build() == 'a: "1" AND b: "2" AND c: "3" AND d: "4"'
+
+    def test_mixed_connector_not_flattened(self):
+        """测试不同连接符的组合保留嵌套."""
+        q = (Q(a=1) | Q(b=2)) & Q(c=3)
+        assert q.build() == '(a: "1" OR b: "2") AND c: "3"'
+
+    def test_negated_operand_not_flattened(self):
+        """测试取反的操作数不会被展平."""
+        q = ~(Q(a=1) | Q(b=2)) | Q(c=3)
+        assert q.build() == '(NOT (a: "1" OR b: "2")) OR c: "3"'
+
+    def test_shared_prefix_not_affected(self):
+        """测试从同一前缀派生的组合互不影响."""
+        base = Q(a=1) | Q(b=2)
+        left = base | Q(c=3)
+        right = base | Q(d=4)
+        assert right.build() == 'a: "1" OR b: "2" OR d: "4"'
+        assert left.build() == 'a: "1" OR b: "2" OR c: "3"'
+        assert base.build() == 'a: "1" OR b: "2"'
+
+    def test_reduce_large_chain(self):
+        """测试 reduce 组合大量条件不会超出递归深度."""
+        qs = [Q(host=f"h{i}") for i in range(5000)]
+        q = functools.reduce(operator.or_, qs)
+        assert len(q._children) == 5000
+        result = q.build()
+        assert result.startswith('host: "h0" OR host: "h1"')
+        assert result.endswith('host: "h4999"')
+
+    def test_deeply_nested_build_iterative(self):
+        """测试深度嵌套的 Q 对象迭代构建."""
+        q = Q(a=0)
+        for i in range(1, 2000):
+            q = ~q & Q(a=i)
+        result = q.build()
+        assert result.count("NOT (") == 1999
+        assert result.endswith('AND a: "1999"')
+
+
+class TestQOptimize:
+    """Q 对象优化测试类."""
+
+    def test_merge_same_field_equal(self):
+        """测试合并 OR 关系中同字段的 EQUAL 条件."""
+        q = Q(status="a") | Q(status="b") | Q(status="c")
+        assert q.optimize().build() == 'status: ("a" OR "b" OR "c")'
+
+    def test_merge_same_field_include(self):
+        """测试合并 OR 关系中同字段的 INCLUDE 条件."""
+        q = Q(msg__contains="x") | Q(status="z") | Q(msg__contains="y")
+        assert q.optimize().build() == 'msg: (*x* OR *y*) OR status: "z"'
+
+    def test_no_merge_in_and(self):
+        """测试 AND 关系中不合并同字段条件."""
+        q = Q(tag="a") & Q(tag="b")
+        assert q.optimize().build() == 'tag: "a" AND tag: "b"'
+
+    def test_merge_escapes_values(self):
+        """测试合并后的值仍然正确转义."""
+        q = Q(msg='say "hi"') | Q(msg="ok")
+        assert q.optimize().build() == 'msg: ("say \\"hi\\"" OR "ok")'
+
+    def test_remove_duplicates(self):
+        """测试移除重复的子节点."""
+        q = (Q(a=1) & Q(b=2)) & (Q(a=1) & Q(c=3))
+        assert q.optimize().build() == 'a: "1" AND b: "2" AND c: "3"'
+
+    def test_fold_double_negation(self):
+        """测试折叠双重否定."""
+        q = ~(~(Q(a=1) | Q(b=2)) & Q(c=None))
+        assert q.build() == 'NOT ((NOT (a: "1" OR b: "2")))'
+        assert q.optimize().build() == 'a: "1" OR b: "2"'
+
+    def test_drop_empty_children(self):
+        """测试移除空的子节点."""
+        q = Q(a=None) & Q(b="") & Q(c=1)
+        optimized = q.optimize()
+        assert len(optimized._children) == 1
+        assert optimized.build() == 'c: "1"'
+
+    def test_optimize_empty(self):
+        """测试优化空 Q 对象."""
+        assert Q().optimize().is_empty()
+        assert Q(a=None).optimize().is_empty()
+
+    def test_factor_common_or(self):
+        """测试提取 OR 子节点的公因子."""
+        q = (Q(a=1) & Q(b=2)) | (Q(a=1) & Q(c=3))
+        assert q.optimize().build() == 'a: "1" AND (b: "2" OR c: "3")'
+
+    def test_factor_then_merge(self):
+        """测试提取公因子后继续合并同字段条件."""
+        q = (Q(a=1) & Q(b=2)) | (Q(a=1) & Q(b=3))
+        assert q.optimize().build() == 'a: "1" AND b: ("2" OR "3")'
+
+    def test_factor_common_and(self):
+        """测试提取 AND 子节点的公因子."""
+        q = (Q(a=1) | Q(b=2)) & (Q(a=1) | Q(c=3))
+        assert q.optimize().build() == 'a: "1" OR (b: "2" AND c: "3")'
+
+    def test_absorption(self):
+        """测试吸收律."""
+        q = Q(a=1) | (Q(a=1) & Q(c=3))
+        assert q.optimize().build() == 'a: "1"'
+
+    def test_keep_negation(self):
+        """测试保留取反节点."""
+        q = ~(Q(a=1) & Q(b=2)) | Q(c=3)
+        assert q.optimize().build() == '(NOT (a: "1" AND b: "2")) OR c: "3"'
+
+    def test_optimize_does_not_modify_original(self):
+        """测试优化不修改原对象."""
+        q = Q(status="a") | Q(status="b")
+        before = q.build()
+        q.optimize()
+        assert q.build() == before
+
+    def test_optimize_deeply_nested(self):
+        """测试优化深度嵌套的 Q 对象不会超出递归深度（去重依赖结构化键）."""
+        q = alternating_tree(5000)
+        assert q.optimize() == q
+        assert (q | q).optimize() == q
@@ -0,0 +1,133 @@
+"""Q 对象序列化单元测试."""
+
+import functools
+import json
+import operator
+
+import pytest
+
+from elasticsearch_toolkit import Param, Q, QueryStringOperator
+from elasticsearch_toolkit.core import serialization
+from elasticsearch_toolkit.core.query import Condition, _ValueGroup
+
+CASES = [
+    Q(),
+    Q(status="error"),
+    Q(status="error") & Q(level__gte=3),
+    (Q(status="error") | Q(status="warning")) & ~Q(host__contains="web*"),
+    ~~(Q(level__gte=4) & ~Q(status="warning")),
+    Q(email__exists=True) | Q(msg__not_regex=".*x") | Q(level=None),
+    Q(a=1.5) & Q(b=True) & Q(c='say "hi"') & Q(d="中文"),
+    (Q(status="a") | Q(status="b") | Q(host="c")).optimize(),
+    Q(service=Param("service")) & Q(level__gte=Param("level")),
+]
+
+
+class TestQSerialization:
+    """Q.dumps()/Q.loads()/Q.to_json()/Q.from_json() 测试类."""
+
+    @pytest.mark.parametrize("q", CASES, ids=repr)
+    def test_binary_round_trip(self, q):
+        """测试二进制格式往返后结构不变."""
+        restored = Q.loads(q.dumps())
+        assert restored == q
+        assert restored._structural_key() == q._structural_key()
+
+    @pytest.mark.parametrize("q", CASES, ids=repr)
+    def test_json_round_trip(self, q):
+        """测试 JSON 格式往返后结构不变."""
+        data = q.to_json()
+        assert isinstance(json.loads(data), list)
+        assert Q.from_json(data) == q
+
+    def test_round_trip_build(self):
+        """测试还原后的 Q 对象生成相同的 Query String."""
+        q = (Q(status="error") | Q(status="warning")) & Q(level__gte=3)
+        assert Q.loads(q.dumps()).build() == q.build()
+        assert Q.from_json(q.to_json()).build() == q.build()
+
+    def test_value_types_preserved(self):
+        """测试值类型、多值和 Param 被还原."""
+        q = (Q(a=1) & Q(b=Param("x")) & (Q(c="1") | Q(c="2")).optimize()).optimize()
+        for restored in (Q.loads(q.dumps()), Q.from_json(q.to_json())):
+            conditions = restored._children
+            assert all(isinstance(c, Condition) for c in conditions)
+            assert conditions[0].value == 1
+            assert isinstance(conditions[1].value, Param)
+            assert isinstance(conditions[2].value, _ValueGroup)
+            assert conditions[2].operator is QueryStringOperator.EQUAL
+
+    def test_json_is_flat(self):
+        """测试 JSON 格式为扁平结构，字段名只出现一次."""
+        q = Q(status="a") | Q(status="b") | Q(status="c")
+        version, fields, nodes, roots = json.loads(q.to_json())
+        assert version == serialization.FORMAT_VERSION
+        assert fields == ["status"]
+        assert roots == 1
+        assert not any(isinstance(node, list | dict) for node in nodes)
+
+    def test_many_share_field_table(self):
+        """测试批量编码共享字段名表."""
+        qs = [Q(service=f"svc-{i}") & Q(level__gte=i) for i in range(100)]
+        data = serialization.dumps_many(qs)
+        restored = serialization.loads_many(data)
+        assert restored == qs
+        assert restored[0]._children[0].field is restored[99]._children[0].field
+        assert len(data) < sum(len(q.dumps()) for q in qs)
+
+    def test_deep_nesting(self):
+        """测试深层嵌套不受递归深度限制."""
+        q = Q(a=0)
+        for i in range(1, 3000):
+            q = ~(q & Q(a=i))
+        assert Q.loads(q.dumps()).build() == q.build()
+
+    def test_large_reduce(self):
+        """测试大规模 reduce 组合."""
+        q = functools.reduce(operator.or_, (Q(host=f"h{i}") for i in range(5000)))
+        restored = Q.loads(q.dumps())
+        assert restored.build() == q.build()
+
+    def test_frozen_input(self):
+        """测试冻结对象可以序列化，还原后为普通对象."""
+        q = (Q(a=1) & Q(b=2)).freeze()
+        restored = Q.loads(q.dumps())
+        assert restored == q
+        assert not restored.is_frozen()
+
+    def test_unsupported_value(self):
+        """测试无法编码的值."""
+        with pytest.raises(ValueError):
+            Q(a=object()).dumps()
+        with pytest.raises(ValueError):
+            Q(a=[1, 2]).to_json()
+
+    def test_unsupported_operator(self):
+        """测试无法编码的操作符."""
+        q = Q(field="a", operator="invalid", value=1)
+        with pytest.raises(ValueError):
+            q.dumps()
+
+    @pytest.mark.parametrize(
+        "data",
+        [b"", b"XXX\x01", b"ESQ\x01garbage", b"ESQ\x02" + b"\x00" * 8],
+    )
+    def test_invalid_binary(self, data):
+        """测试损坏或版本不匹配的二进制数据."""
+        with pytest.raises(ValueError):
+            Q.loads(data)
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            "{}",
+            "[2, [], [128, 0], 1]",
+            '[1, ["a"], [2, 5, "x"], 1]',
+            '[1, ["a"], [128, 3], 1]',
+            '[1, ["a"], [2, 0, "x"], 1]',
+        ],
+    )
+    def test_invalid_json(self, data):
+        """测试格式错误的 JSON 数据."""
+        with pytest.raises(ValueError):
+            Q.from_json(data)
@@ -287,6 +287,27 @@ class TestQueryStringBuilder:
         result = builder.build()
         assert result == "(status: error) OR (level: >=3)"
 
+    def test_range_uses_first_value(self):
+        """测试范围操作符只使用第一个值."""
+        builder = QueryStringBuilder()
+        builder.add_filter("level", QueryStringOperator.GTE, [3, 5])
+        assert builder.build() == "level: >=3"
+
+    def test_custom_operator_templates(self):
+        """测试子类覆盖的操作符模板在添加条件时生效."""
+
+        class CustomBuilder(QueryStringBuilder):
+            OPERATOR_TEMPLATES = {
+                **QueryStringBuilder.OPERATOR_TEMPLATES,
+                QueryStringOperator.EQUAL: "{field}:{value}",
+                QueryStringOperator.BETWEEN: "{field}: {{{start_value} TO {end_value}}}",
+            }
+
+        builder = CustomBuilder()
+        builder.add_filter("status", QueryStringOperator.EQUAL, ["a", "b"])
+        builder.add_filter("age", QueryStringOperator.BETWEEN, [18, 30])
+        assert builder.build() == 'status:("a" OR "b") AND age: {18 TO 30}'
+
 
 class TestQueryStringBuilderWithQ:
     """QueryStringBuilder 与 Q 对象集成测试."""
@@ -348,3 +369,104 @@ class TestQueryStringBuilderWithQ:
         assert '(status: "error")' in result
         assert "(level: >=3)" in result
         assert "AND" in result
+
+
+class TestQueryStringBuilderCache:
+    """QueryStringBuilder 增量构建与 fork 测试类."""
+
+    def test_build_cached(self):
+        """测试未修改时重复构建直接返回缓存结果."""
+        builder = QueryStringBuilder()
+        builder.add_filter("status", QueryStringOperator.EQUAL, ["error"])
+        assert builder.build() is builder.build()
+
+    def test_incremental_build(self):
+        """测试添加条件后只渲染新增的条件."""
+        builder = QueryStringBuilder()
+        builder.add_filter("status", QueryStringOperator.EQUAL, ["error"])
+        builder.build()
+
+        def fail(values):
+            raise AssertionError("filter rendered twice")
+
+        builder._filters[0]["renderer"] = fail
+        builder.add_filter("level", QueryStringOperator.GTE, [3])
+        builder.add_raw("host: a")
+        assert builder.build() == 'status: "error" AND level: >=3 AND (host: a)'
+
+    def test_values_copied(self):
+        """测试添加后修改值列表不影响结果."""
+        values = ["a"]
+        builder = QueryStringBuilder()
+        builder.add_filter("status", QueryStringOperator.EQUAL, values)
+        values.append("b")
+        assert builder.build() == 'status: "a"'
+
+    def test_clear_resets_cache(self):
+        """测试清空后缓存失效."""
+        builder = QueryStringBuilder()
+        builder.add_filter("status", QueryStringOperator.EQUAL, ["a"])
+        builder.build()
+        builder.clear()
+        assert builder.build() == ""
+        builder.add_filter("status", QueryStringOperator.EQUAL, ["b"])
+        assert builder.build() == 'status: "b"'
+
+    def test_fork_independent(self):
+        """测试 fork 出的构建器与原构建器互不影响."""
+        base = QueryStringBuilder()
+        base.add_filter("env", QueryStringOperator.EQUAL, ["prod"])
+        base.build()
+
+        first = base.fork().add_filter("host", QueryStringOperator.EQUAL, ["a"])
+        second = base.fork().add_raw("level: >=3")
+        base.add_filter("app", QueryStringOperator.EQUAL, ["x"])
+
+        assert first.build() == 'env: "prod" AND host: "a"'
+        assert second.build() == 'env: "prod" AND (level: >=3)'
+        assert base.build() == 'env: "prod" AND app: "x"'
+
+    def test_fork_shares_fragments(self):
+        """测试 fork 出的构建器共享已渲染的片段."""
+        base = QueryStringBuilder()
+        base.add_filter("env", QueryStringOperator.EQUAL, ["prod"])
+        base.build()
+
+        forked = base.fork()
+        assert forked._filter_parts is base._filter_parts
+        forked.add_filter("host", QueryStringOperator.EQUAL, ["a"])
+        assert forked._filter_parts is not base._filter_parts
+        assert forked.build() == 'env: "prod" AND host: "a"'
+        assert base._filter_parts == ['env: "prod"']
+
+    def test_build_does_not_mutate_shared_fragments(self):
+        """测试 fork 后构建不修改共享的片段列表."""
+        base = QueryStringBuilder()
+        base.add_filter("env", QueryStringOperator.EQUAL, ["prod"])
+        forked = base.fork()
+        shared = base._filter_parts
+
+        assert forked.build() == 'env: "prod"'
+        assert base.build() == 'env: "prod"'
+        assert shared == []
+        assert forked._filter_parts is not base._filter_parts
+
+    def test_fork_clear(self):
+        """测试清空 fork 出的构建器不影响原构建器."""
+        base = QueryStringBuilder()
+        base.add_filter("env", QueryStringOperator.EQUAL, ["prod"])
+        forked = base.fork().clear()
+        assert forked.build() == ""
+        assert base.build() == 'env: "prod"'
+
+    def test_fork_keeps_settings(self):
+        """测试 fork 保留逻辑关系和子类."""
+
+        class CustomBuilder(QueryStringBuilder):
+            pass
+
+        base = CustomBuilder(logic_operator=LogicOperator.OR)
+        base.add_filter("a", QueryStringOperator.EQUAL, ["1"])
+        forked = base.fork().add_filter("b", QueryStringOperator.EQUAL, ["2"])
+        assert isinstance(forked, CustomBuilder)
+        assert forked.build() == 'a: "1" OR b: "2"'
@@ -0,0 +1,366 @@
+"""QueryStringDslCompiler 单元测试及与 query_string 的一致性测试."""
+
+import random
+import re
+from typing import Any
+
+import pytest
+from elasticsearch.dsl import Search
+from luqum.parser import parser
+from luqum.tree import (
+    AndOperation,
+    FieldGroup,
+    From,
+    Group,
+    Not,
+    OrOperation,
+    Phrase,
+    Plus,
+    Prohibit,
+    Range,
+    Regex,
+    SearchField,
+    To,
+    Word,
+)
+
+from elasticsearch_toolkit import (
+    DslQueryBuilder,
+    Q,
+    QueryStringDslCompiler,
+    QueryStringTransformer,
+)
+from tests.dsl_eval import compare, doc_values, eval_dsl, unescape, wildcard_regex
+
+DOCS = [
+    {"id": 1, "status": "error", "level": 5, "host": "web-01"},
+    {"id": 2, "status": "warning", "level": 3, "host": "web-02"},
+    {"id": 3, "status": "ok", "level": 1, "host": "db-01"},
+    {"id": 4, "status": "error", "level": 2, "host": "db-02"},
+    {"id": 5, "status": "fatal", "level": 9, "host": "a*b"},
+    {"id": 6, "level": 4, "host": "web-01"},
+    {"id": 7, "status": "warning", "level": 7, "host": "cache"},
+]
+
+
+def _bool_match(must: list[bool], should: list[bool], must_not: list[bool]) -> bool:
+    """Lucene BooleanQuery 语义，纯否定查询由 ES 补充 match_all."""
+    if not all(must) or any(must_not):
+        return False
+    if must or not should:
+        return True
+    return any(should)
+
+
+def eval_lucene(node: Any, doc: dict[str, Any], field: str | None = None) -> bool:
+    """按 Lucene classic 解析器的子句语义对 luqum 语法树求值（不支持不带括号混用 AND/OR）."""
+    if isinstance(node, Group | FieldGroup):
+        return eval_lucene(node.expr, doc, field)
+    if isinstance(node, SearchField):
+        return eval_lucene(node.expr, doc, node.name)
+    if isinstance(node, AndOperation | OrOperation | Not | Prohibit | Plus):
+        operands = (
+            node.children if isinstance(node, AndOperation | OrOperation) else [node]
+        )
+        default = "should" if isinstance(node, OrOperation) else "must"
+        clauses: dict[str, list[bool]] = {"must": [], "should": [], "must_not": []}
+        for operand in operands:
+            occur = default
+            if isinstance(operand, Not | Prohibit):
+                occur, operand = "must_not", operand.a
+            elif isinstance(operand, Plus):
+                occur, operand = "must", operand.a
+            if isinstance(operand, AndOperation | OrOperation):
+                raise NotImplementedError
+            clauses[occur].append(eval_lucene(operand, doc, field))
+        return _bool_match(clauses["must"], clauses["should"], clauses["must_not"])
+
+    if field is None:
+        # 未指定字段时搜索所有字段
+        return any(eval_lucene(node, doc, name) for name in ("status", "host", "level"))
+
+    values = doc_values(doc, field)
+    if isinstance(node, Phrase):
+        return any(str(v) == unescape(node.value[1:-1]) for v in values)
+    if isinstance(node, Regex):
+        return any(re.fullmatch(node.value[1:-1], str(v)) for v in values)
+    if isinstance(node, Range):
+        ops = []
+        if node.low.value != "*":
+            ops.append(("gte" if node.include_low else "gt", node.low.value))
+        if node.high.value != "*":
+            ops.append(("lte" if node.include_high else "lt", node.high.value))
+        return any(all(compare(v, op, b) for op, b in ops) for v in values)
+    if isinstance(node, From | To):
+        if isinstance(node, From):
+            op = "gte" if node.include else "gt"
+        else:
+            op = "lte" if node.include else "lt"
+        return any(compare(v, op, node.a.value) for v in values)
+    if isinstance(node, Word):
+        if node.value == "*":
+            return bool(values)
+        pattern = wildcard_regex(node.value)
+        return any(pattern.fullmatch(str(v)) for v in values)
+    raise NotImplementedError(repr(node))
+
+
+def eval_query_string(query: str, doc: dict[str, Any]) -> bool:
+    """对 DSL 中回退的 query_string 查询求值."""
+    return eval_lucene(parser.parse(query), doc)
+
+
+class TestQueryStringDslCompiler:
+    """QueryStringDslCompiler 测试类."""
+
+    def compile(self, query_string: str, **kwargs) -> dict[str, Any]:
+        compiler = QueryStringDslCompiler(text_fields={"message"})
+        return compiler.compile(query_string, **kwargs).to_dict()
+
+    def test_term(self):
+        """测试指定字段的词编译为 term，转义字符按字面匹配."""
+        assert self.compile("status: error") == {"term": {"status": "error"}}
+        assert self.compile("host: a\\:b") == {"term": {"host": "a:b"}}
+
+    def test_and_uses_filter_context(self):
+        """测试 AND 编译为 bool.filter，NOT 编译为 must_not."""
+        assert self.compile("status: error AND level: [3 TO *] AND NOT host: a") == {
+            "bool": {
+                "filter": [
+                    {"term": {"status": "error"}},
+                    {"range": {"level": {"gte": "3"}}},
+                ],
+                "must_not": [{"term": {"host": "a"}}],
+            }
+        }
+
+    def test_or_merges_terms(self):
+        """测试 OR 编译为 should，同字段的 term 合并为 terms."""
+        assert self.compile("status: a OR status: b OR host: c") == {
+            "bool": {
+                "should": [
+                    {"terms": {"status": ["a", "b"]}},
+                    {"term": {"host": "c"}},
+                ],
+                "minimum_should_match": 1,
+            }
+        }
+        assert self.compile("status: (a OR b)") == {"terms": {"status": ["a", "b"]}}
+
+    def test_wildcards(self):
+        """测试 exists/prefix/wildcard/regexp."""
+        assert self.compile("host: *") == {"exists": {"field": "host"}}
+        assert self.compile("_exists_: host") == {"exists": {"field": "host"}}
+        assert self.compile("host: web*") == {"prefix": {"host": "web"}}
+        assert self.compile("host: w?b*") == {"wildcard": {"host": {"value": "w?b*"}}}
+        assert self.compile("host: a\\*b") == {"term": {"host": "a*b"}}
+        assert self.compile("host: /web-0[12]/") == {"regexp": {"host": "web-0[12]"}}
+
+    def test_phrase_and_ranges(self):
+        """测试短语编译为 match_phrase，范围与比较编译为 range."""
+        assert self.compile('message: "disk \\"full\\""') == {
+            "match_phrase": {"message": 'disk "full"'}
+        }
+        assert self.compile("level: {1 TO 5]") == {
+            "range": {"level": {"gt": "1", "lte": "5"}}
+        }
+        assert self.compile("level: >=3") == {"range": {"level": {"gte": "3"}}}
+        assert self.compile("level: <3") == {"range": {"level": {"lt": "3"}}}
+
+    def test_lucene_or_not_semantics(self):
+        """测试 `a OR NOT b` 按 Lucene 语义编译为 should + must_not."""
+        assert self.compile("status: a OR NOT host: b") == {
+            "bool": {
+                "should": [{"term": {"status": "a"}}],
+                "must_not": [{"term": {"host": "b"}}],
+                "minimum_should_match": 1,
+            }
+        }
+        assert self.compile("+status: a OR host: b") == {
+            "bool": {
+                "filter": [{"term": {"status": "a"}}],
+                "should": [{"term": {"host": "b"}}],
+            }
+        }
+
+    def test_fallback_terms(self):
+        """测试无法翻译的词保留为 query_string."""
+        assert self.compile("status: a AND 致命 AND host: b~1 AND message: x") == {
+            "bool": {
+                "filter": [
+                    {"term": {"status": "a"}},
+                    {"query_string": {"query": "致命"}},
+                    {"query_string": {"query": "host:b~1"}},
+                    {"query_string": {"query": "message:x"}},
+                ]
+            }
+        }
+
+    def test_fallback_levels(self):
+        """测试混用 AND/OR 或隐式操作符时整层括号保留为 query_string."""
+        assert self.compile("status: a OR host: b AND level: 1") == {
+            "query_string": {"query": "status: a OR host: b AND level: 1"}
+        }
+        assert self.compile("status: a AND (host: b c) AND host: (d e)") == {
+            "bool": {
+                "filter": [
+                    {"term": {"status": "a"}},
+                    {"query_string": {"query": "(host: b c)"}},
+                    {"query_string": {"query": "host: (d e)"}},
+                ]
+            }
+        }
+
+    def test_parse_error_falls_back(self):
+        """测试无法解析的 Query String 原样交给 ES."""
+        assert self.compile("(status: a") == {"query_string": {"query": "(status: a"}}
+
+    def test_scoring(self):
+        """测试需要评分时使用 must，保留权重."""
+        assert self.compile("status: a AND host: b^2", scoring=True) == {
+            "bool": {
+                "must": [
+                    {"term": {"status": "a"}},
+                    {"query_string": {"query": "host:b^2"}},
+                ]
+            }
+        }
+        assert self.compile("status: a AND host: b^2") == {
+            "bool": {"filter": [{"term": {"status": "a"}}, {"term": {"host": "b"}}]}
+        }
+
+    def test_cache(self):
+        """测试编译结果缓存，每次返回新的查询对象."""
+        compiler = QueryStringDslCompiler()
+        first = compiler.compile("status: a AND host: b")
+        second = compiler.compile("status: a AND host: b")
+        assert first is not second
+        assert first == second
+        assert compiler.cache_stats.hits == 1
+        body = compiler.compile_body("status: a AND host: b")
+        body["bool"]["filter"].clear()
+        assert compiler.compile_body("status: a AND host: b") == first.to_dict()
+        assert QueryStringDslCompiler(cache_size=0).cache_stats is None
+        with pytest.raises(ValueError):
+            QueryStringDslCompiler(cache_size=-1)
+
+
+class TestQueryStringDslParity:
+    """编译结果与 query_string 匹配结果一致性测试类."""
+
+    FIELDS = ["status", "host", "level"]
+    VALUES = ["error", "warning", "web-01", "web*", "w?b-0*", "a\\*b", "3", "*", "致命"]
+
+    def random_query(self, rng: random.Random, depth: int = 0) -> str:
+        roll = rng.random()
+        if depth > 2 or roll < 0.4:
+            choice = rng.random()
+            if choice < 0.55:
+                value = rng.choice(self.VALUES)
+            elif choice < 0.7:
+                value = f'"{rng.choice(self.VALUES[:3])}"'
+            elif choice < 0.8:
+                low, high = rng.choice("[{"), rng.choice("]}")
+                value = (
+                    f"{low}{rng.randint(0, 5)} TO {rng.choice(['*', '6', '9'])}{high}"
+                )
+            elif choice < 0.85:
+                value = f"{rng.choice(['>', '>=', '<', '<='])}{rng.randint(1, 8)}"
+            else:
+                value = f"({self.random_query(rng, depth + 1)})"
+            if rng.random() < 0.8 and not value.startswith("("):
+                value = f"{rng.choice(self.FIELDS)}: {value}"
+            return value
+        if roll < 0.5:
+            return f"{rng.choice(['NOT ', '-', '+'])}{self.random_query(rng, 3)}"
+        op = rng.choice(["AND", "OR"])
+        operands = [self.random_query(rng, depth + 1) for _ in range(rng.randint(2, 4))]
+        query = f" {op} ".join(
+            f"({operand})" if " AND " in operand or " OR " in operand else operand
+            for operand in operands
+        )
+        return query
+
+    def test_random_parity(self):
+        """测试随机查询的编译结果与 query_string 匹配相同的文档."""
+        compiler = QueryStringDslCompiler(cache_size=0)
+        rng = random.Random(20261017)
+        compiled_natively = 0
+        for _ in range(1500):
+            query = self.random_query(rng)
+            tree = parser.parse(query)
+            expected = {doc["id"] for doc in DOCS if eval_lucene(tree, doc)}
+            body = compiler.compile(query).to_dict()
+            assert {
+                doc["id"] for doc in DOCS if eval_dsl(body, doc, eval_query_string)
+            } == expected, query
+            if "query_string" not in str(body):
+                compiled_natively += 1
+        assert compiled_natively > 500
+
+
+class TestDslBuilderCompiler:
+    """DslQueryBuilder 使用 Query String 编译器测试类."""
+
+    def make_builder(self) -> DslQueryBuilder:
+        transformer = QueryStringTransformer(
+            field_mapping={"级别": "severity"},
+            value_translations={"severity": [("1", "致命"), ("2", "预警")]},
+        )
+        return DslQueryBuilder(
+            search_factory=lambda: Search(index="alerts"),
+            query_string_transformer=transformer.transform,
+            query_string_compiler=QueryStringDslCompiler(),
+        )
+
+    def test_filter_context(self):
+        """测试按字段排序时编译结果放入 filter."""
+        builder = self.make_builder()
+        builder.conditions([{"key": "host", "method": "eq", "value": ["h"]}])
+        builder.query_string("级别: 致命 AND status: a").ordering(["-create_time"])
+        assert builder.build_body()["query"] == {
+            "bool": {
+                "filter": [
+                    {"terms": {"host": ["h"]}},
+                    {
+                        "bool": {
+                            "filter": [
+                                {"term": {"severity": "1"}},
+                                {"term": {"status": "a"}},
+                            ]
+                        }
+                    },
+                ]
+            }
+        }
+
+    def test_scoring_context(self):
+        """测试按 _score 排序（包括未指定排序）时编译结果参与评分."""
+        builder = self.make_builder().query_string("级别: 致命 AND status: a")
+        assert builder.build_body()["query"] == {
+            "bool": {
+                "must": [
+                    {"term": {"severity": "1"}},
+                    {"term": {"status": "a"}},
+                ]
+            }
+        }
+
+    @pytest.mark.parametrize(
+        "query_string",
+        [
+            "级别: 致命 AND (status: a OR status: b)",
+            "status: a OR 预警",
+            "NOT status: a",
+            "a b",
+        ],
+    )
+    @pytest.mark.parametrize("ordering", [[], ["-create_time"], ["_score"]])
+    def test_build_body_matches_build(self, query_string, ordering):
+        """测试 build_body() 与 build().to_dict() 一致."""
+        builder = self.make_builder()
+        builder.conditions([{"key": "host", "method": "eq", "value": ["h"]}])
+        builder.query_string(query_string).ordering(ordering)
+        assert builder.build_body() == builder.build().to_dict()
+        builder.add_filter(Q(level__gte=3))
+        assert builder.build_body() == builder.build().to_dict()
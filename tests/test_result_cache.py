@@ -0,0 +1,393 @@
+"""SearchResultCache 单元测试."""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from elasticsearch_toolkit.builders.cache import (
+    InMemoryCacheBackend,
+    RedisCacheBackend,
+    SearchResultCache,
+    canonical_key,
+    uses_relative_time,
+)
+from tests.conftest import api_response, make_async_builder, make_builder
+
+CONDITIONS = [
+    {"key": "status", "method": "eq", "value": ["a", "b"]},
+    {"key": "level", "method": "gte", "value": [3]},
+]
+
+
+def _result(n: int) -> dict[str, Any]:
+    return {
+        "hits": {
+            "total": {"value": n, "relation": "eq"},
+            "hits": [{"_index": "logs", "_id": str(n), "_source": {"n": n}}],
+        },
+        "aggregations": {"by_status": {"buckets": [{"key": "ok", "doc_count": n}]}},
+    }
+
+
+class CountingClient:
+    """记录请求次数的 ES 客户端，每次返回不同的结果."""
+
+    def __init__(self):
+        self.calls: list[dict[str, Any]] = []
+
+    def search(self, index=None, body=None, **kwargs):
+        self.calls.append(body)
+        return api_response(_result(len(self.calls)))
+
+
+class AsyncCountingClient(CountingClient):
+    """异步版本."""
+
+    async def search(self, index=None, body=None, **kwargs):
+        return CountingClient.search(self, index=index, body=body, **kwargs)
+
+
+class FakeRedis:
+    """本地的 Redis 替身，实现 get/set(px)/delete/scan_iter."""
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.px: dict[str, int] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, px=None):
+        self.data[key] = value
+        self.px[key] = px
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match=None):
+        prefix = match.rstrip("*")
+        return [key for key in self.data if key.startswith(prefix)]
+
+
+class FakeClock:
+    """可以手动推进的时钟."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCanonicalKey:
+    """规范化缓存键测试类."""
+
+    def test_order_insensitive(self):
+        """测试键顺序、bool 子句顺序、terms 值顺序不影响缓存键."""
+        a = {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"terms": {"status": ["a", "b"]}},
+                        {"range": {"level": {"gte": 3}}},
+                    ]
+                }
+            },
+            "size": 10,
+        }
+        b = {
+            "size": 10,
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"range": {"level": {"gte": 3}}},
+                        {"terms": {"status": ["b", "a"]}},
+                    ]
+                }
+            },
+        }
+        assert canonical_key(["logs"], a) == canonical_key(["logs"], b)
+
+    def test_order_sensitive_parts(self):
+        """测试排序、索引、search_after 的顺序会影响缓存键."""
+        a = {"sort": [{"a": "asc"}, {"b": "asc"}]}
+        b = {"sort": [{"b": "asc"}, {"a": "asc"}]}
+        assert canonical_key(None, a) != canonical_key(None, b)
+        assert canonical_key(["x"], {}) != canonical_key(["y"], {})
+
+    def test_aggregation_order_sensitive(self):
+        """测试聚合中的列表（如 terms 聚合的 order）保持原有顺序."""
+
+        def body(order: list[dict[str, str]]) -> dict[str, Any]:
+            return {"aggs": {"g": {"terms": {"field": "a", "order": order}}}}
+
+        count_first = body([{"_count": "desc"}, {"_key": "asc"}])
+        key_first = body([{"_key": "asc"}, {"_count": "desc"}])
+        assert canonical_key(["logs"], count_first) != canonical_key(
+            ["logs"], key_first
+        )
+
+    def test_relative_time_detection(self):
+        """测试识别 range 与 query_string 中的 now."""
+        assert uses_relative_time(
+            {"query": {"range": {"ts": {"gte": "now-15m", "lt": "now"}}}}
+        )
+        assert uses_relative_time(
+            {"query": {"bool": {"filter": [{"range": {"ts": {"gte": "now/d"}}}]}}}
+        )
+        assert uses_relative_time(
+            {"query": {"query_string": {"query": "ts:[now-1h TO *]"}}}
+        )
+        assert not uses_relative_time(
+            {"query": {"range": {"ts": {"gte": "2024-01-01"}}}}
+        )
+        assert not uses_relative_time({"query": {"term": {"message": "nowhere"}}})
+
+    def test_relative_time_in_aggs(self):
+        """测试识别聚合、运行时字段与脚本参数中的 now."""
+        assert uses_relative_time(
+            {
+                "aggs": {
+                    "recent": {
+                        "date_range": {
+                            "field": "ts",
+                            "ranges": [{"from": "now-1h"}, {"to": "now-1h"}],
+                        }
+                    }
+                }
+            }
+        )
+        assert uses_relative_time(
+            {
+                "aggregations": {
+                    "last_day": {
+                        "filter": {"range": {"ts": {"gte": "now-1d"}}},
+                        "aggs": {"hosts": {"terms": {"field": "host"}}},
+                    }
+                }
+            }
+        )
+        assert uses_relative_time(
+            {
+                "aggs": {
+                    "timeline": {
+                        "date_histogram": {
+                            "field": "ts",
+                            "fixed_interval": "1h",
+                            "extended_bounds": {"min": "now-1d", "max": "now"},
+                        }
+                    }
+                }
+            }
+        )
+        assert uses_relative_time(
+            {
+                "runtime_mappings": {
+                    "age": {
+                        "type": "long",
+                        "script": {
+                            "source": "emit(params.since)",
+                            "params": {"since": "now-7d"},
+                        },
+                    }
+                }
+            }
+        )
+        assert not uses_relative_time(
+            {
+                "aggs": {
+                    "range": {
+                        "date_range": {
+                            "field": "ts",
+                            "ranges": [{"from": "2024-01-01", "to": "2024-02-01"}],
+                        },
+                        "aggs": {"now": {"terms": {"field": "nowhere"}}},
+                    }
+                }
+            }
+        )
+
+    def test_relative_time_aggs_not_cached(self):
+        """测试聚合使用相对时间时不缓存."""
+        cache = SearchResultCache()
+        body = {
+            "aggs": {
+                "recent": {"filter": {"range": {"ts": {"gte": "now-15m"}}}},
+            }
+        }
+        assert cache.cache_key("logs", body) is None
+
+
+class TestInMemoryCacheBackend:
+    """进程内缓存后端测试类."""
+
+    def test_lru_eviction(self):
+        """测试超过条数上限时淘汰最久未使用的缓存项."""
+        backend = InMemoryCacheBackend(max_entries=2)
+        backend.set("a", b"1", 60)
+        backend.set("b", b"2", 60)
+        backend.get("a")
+        backend.set("c", b"3", 60)
+        assert backend.get("b") is None
+        assert backend.get("a") == b"1"
+        assert backend.evictions == 1
+
+    def test_byte_cap(self):
+        """测试总字节数上限，超过上限的单个缓存项不缓存."""
+        backend = InMemoryCacheBackend(max_bytes=10)
+        backend.set("a", b"12345", 60)
+        backend.set("b", b"12345", 60)
+        backend.set("c", b"123", 60)
+        assert backend.get("a") is None
+        assert backend.size_bytes == 8
+        backend.set("big", b"x" * 11, 60)
+        assert backend.get("big") is None
+
+    def test_ttl(self):
+        """测试缓存项过期."""
+        clock = FakeClock()
+        backend = InMemoryCacheBackend(clock=clock)
+        backend.set("a", b"1", 5)
+        clock.now += 4
+        assert backend.get("a") == b"1"
+        clock.now += 1
+        assert backend.get("a") is None
+        assert backend.size_bytes == 0
+
+    def test_invalid_arguments(self):
+        """测试无效参数."""
+        with pytest.raises(ValueError):
+            InMemoryCacheBackend(max_entries=0)
+        with pytest.raises(ValueError):
+            InMemoryCacheBackend(max_bytes=0)
+
+
+class TestSearchResultCache:
+    """SearchResultCache 测试类."""
+
+    def test_hit_and_miss(self):
+        """测试第二次执行相同的查询命中缓存，聚合结果可以正常解析."""
+        client = CountingClient()
+        cache = SearchResultCache()
+        builder = make_builder(CONDITIONS)
+        builder.add_aggregation("by_status", "terms", field="status")
+
+        first = builder.execute(using=client, cache=cache)
+        second = builder.execute(using=client, cache=cache)
+
+        assert len(client.calls) == 1
+        assert first.hits.total.value == second.hits.total.value == 1
+        assert second.aggregations.by_status.buckets[0].key == "ok"
+        assert (cache.stats.hits, cache.stats.misses, cache.stats.stores) == (1, 1, 1)
+        assert cache.stats.hit_ratio == 0.5
+
+    def test_equivalent_queries_share_entry(self):
+        """测试条件顺序不同但语义相同的查询共用缓存项."""
+        client = CountingClient()
+        cache = SearchResultCache()
+        make_builder(CONDITIONS).execute(using=client, cache=cache)
+        make_builder(
+            [
+                {"key": "level", "method": "gte", "value": [3]},
+                {"key": "status", "method": "eq", "value": ["b", "a"]},
+            ]
+        ).execute(using=client, cache=cache)
+        assert len(client.calls) == 1
+
+    def test_connections_do_not_share_entries(self):
+        """测试不同连接（集群）的相同请求使用不同的缓存项."""
+        cache = SearchResultCache()
+        first, second = CountingClient(), CountingClient()
+        builder = make_builder(CONDITIONS)
+        builder.execute(using=first, cache=cache)
+        builder.execute(using=second, cache=cache)
+        builder.execute(using=first, cache=cache)
+        assert (len(first.calls), len(second.calls)) == (1, 1)
+
+        body = builder.build_body()
+        assert (
+            cache.cache_key(["logs"], body, using="eu")[0]
+            != cache.cache_key(["logs"], body, using="us")[0]
+        )
+        assert (
+            cache.cache_key(["logs"], body)[0]
+            == (cache.cache_key(["logs"], body, using="default")[0])
+        )
+
+    def test_without_cache(self):
+        """测试不传 cache 时每次都发送请求."""
+        client = CountingClient()
+        builder = make_builder(CONDITIONS)
+        builder.execute(using=client)
+        builder.execute(using=client)
+        assert len(client.calls) == 2
+
+    def test_relative_time_skipped(self):
+        """测试默认不缓存使用相对时间的查询."""
+        client = CountingClient()
+        cache = SearchResultCache()
+        builder = make_builder([{"key": "ts", "method": "gte", "value": ["now-15m"]}])
+        builder.execute(using=client, cache=cache)
+        builder.execute(using=client, cache=cache)
+        assert len(client.calls) == 2
+        assert cache.stats.skipped == 2
+        assert cache.stats.hits == cache.stats.misses == 0
+
+    def test_relative_time_quantized(self):
+        """测试量化相对时间: 同一时间段内命中缓存，进入下一时间段后重新查询."""
+        clock = FakeClock(now=1000.0)
+        cache = SearchResultCache(
+            ttl=300, relative_time="quantize", now_granularity=60, clock=clock
+        )
+        body = {"query": {"range": {"ts": {"gte": "now-15m"}}}}
+        key, ttl = cache.cache_key(["logs"], body)
+        assert ttl == 20.0  # 1000 位于 [960, 1020) 时间段
+
+        clock.now = 1019.0
+        assert cache.cache_key(["logs"], body)[0] == key
+        clock.now = 1020.0
+        assert cache.cache_key(["logs"], body)[0] != key
+
+    def test_redis_backend(self):
+        """测试 Redis 兼容后端."""
+        redis = FakeRedis()
+        client = CountingClient()
+        cache = SearchResultCache(backend=RedisCacheBackend(redis, prefix="t:"), ttl=30)
+        builder = make_builder(CONDITIONS)
+        builder.execute(using=client, cache=cache)
+        builder.execute(using=client, cache=cache)
+
+        assert len(client.calls) == 1
+        assert list(redis.px.values()) == [30000]
+        assert all(key.startswith("t:") for key in redis.data)
+        cache.clear()
+        assert redis.data == {}
+
+    def test_async_execute(self):
+        """测试异步构建器使用缓存."""
+        client = AsyncCountingClient()
+        cache = SearchResultCache()
+        builder = make_async_builder(
+            [{"key": "status", "method": "eq", "value": ["a"]}], semaphore=2
+        )
+
+        async def run():
+            first = await builder.execute(using=client, cache=cache)
+            second = await builder.execute(using=client, cache=cache)
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert len(client.calls) == 1
+        assert first.hits.total.value == second.hits.total.value == 1
+        assert cache.stats.hits == 1
+
+    def test_invalid_arguments(self):
+        """测试无效参数."""
+        with pytest.raises(ValueError):
+            SearchResultCache(ttl=0)
+        with pytest.raises(ValueError):
+            SearchResultCache(now_granularity=0)
+        with pytest.raises(ValueError):
+            SearchResultCache(relative_time="always")
@@ -0,0 +1,272 @@
+"""SingleFlight 请求合并单元测试."""
+
+import asyncio
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from elasticsearch_toolkit import (
+    AsyncSingleFlight,
+    SearchResultCache,
+    SingleFlight,
+)
+from tests.conftest import (
+    ERROR_CONDITIONS,
+    api_response,
+    make_async_builder,
+    make_builder,
+)
+
+N_CALLERS = 20
+
+
+def _result(n: int) -> dict[str, Any]:
+    return {"hits": {"total": {"value": n, "relation": "eq"}, "hits": []}}
+
+
+class BlockingClient:
+    """请求在 release 之前阻塞的 ES 客户端."""
+
+    def __init__(self, fail: bool = False):
+        self.lock = threading.Lock()
+        self.release = threading.Event()
+        self.calls: list[dict[str, Any]] = []
+        self.fail = fail
+
+    def search(self, index=None, body=None, **kwargs):
+        with self.lock:
+            self.calls.append(body)
+            n = len(self.calls)
+        assert self.release.wait(5)
+        if self.fail:
+            raise ConnectionError("connection reset")
+        return api_response(_result(n))
+
+
+class AsyncDelayClient:
+    """每个请求等待一小段时间的异步 ES 客户端."""
+
+    def __init__(self, delay: float = 0.02, fail: bool = False):
+        self.delay = delay
+        self.calls: list[dict[str, Any]] = []
+        self.fail = fail
+
+    async def search(self, index=None, body=None, **kwargs):
+        self.calls.append(body)
+        n = len(self.calls)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("connection reset")
+        return api_response(_result(n))
+
+
+def run_threads(target, n: int = N_CALLERS) -> tuple[list, list[Any]]:
+    """在 n 个线程中调用 target，返回线程列表和结果（或异常）列表."""
+    results: list[Any] = [None] * n
+
+    def worker(i: int) -> None:
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+class TestSingleFlight:
+    """线程请求合并测试类."""
+
+    def _wait_callers(self, flight: SingleFlight, n: int) -> None:
+        deadline = time.monotonic() + 5
+        while flight.stats.requests < n and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def test_coalesce_identical_requests(self):
+        """测试相同的并发请求只发送一次，所有调用者得到相同的结果."""
+        client = BlockingClient()
+        flight = SingleFlight()
+        builder = make_builder(ERROR_CONDITIONS)
+        threads, results = run_threads(
+            lambda: builder.execute(using=client, single_flight=flight)
+        )
+        self._wait_callers(flight, N_CALLERS)
+        client.release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(client.calls) == 1
+        assert {r.hits.total.value for r in results} == {1}
+        assert flight.stats.executions == 1
+        assert flight.stats.coalesced == N_CALLERS - 1
+        assert flight.stats.max_fan_in == N_CALLERS
+        assert flight.stats.fan_in_ratio == N_CALLERS
+        assert len(flight) == 0
+
+    def test_different_requests_not_coalesced(self):
+        """测试不同的请求、不同客户端的相同请求分别发送."""
+        client = BlockingClient()
+        client.release.set()
+        flight = SingleFlight()
+        make_builder(ERROR_CONDITIONS).pagination(page_size=10).execute(
+            using=client, single_flight=flight
+        )
+        make_builder(ERROR_CONDITIONS).pagination(page_size=20).execute(
+            using=client, single_flight=flight
+        )
+        other = BlockingClient()
+        other.release.set()
+        make_builder(ERROR_CONDITIONS).pagination(page_size=10).execute(
+            using=other, single_flight=flight
+        )
+        assert len(client.calls) == 2
+        assert len(other.calls) == 1
+        assert flight.stats.fan_in_ratio == 1.0
+
+    def test_aggregation_order_not_coalesced(self):
+        """测试只有聚合桶顺序不同的并发请求不合并."""
+        client = BlockingClient()
+        flight = SingleFlight()
+        orders = [{"_count": "desc"}, {"_key": "asc"}]
+        builders = []
+        for order in (orders, orders[::-1]):
+            builder = make_builder(ERROR_CONDITIONS)
+            builder.add_aggregation("g", "terms", field="host", order=order)
+            builders.append(builder)
+
+        pending = iter(builders)
+        threads, _ = run_threads(
+            lambda: next(pending).execute(using=client, single_flight=flight), n=2
+        )
+        self._wait_callers(flight, 2)
+        client.release.set()
+        for thread in threads:
+            thread.join()
+        assert len(client.calls) == 2
+        assert flight.stats.coalesced == 0
+
+    def test_callers_get_own_response(self):
+        """测试合并的调用者各自得到响应副本，修改不会影响其他调用者."""
+        client = BlockingClient()
+        flight = SingleFlight()
+        builder = make_builder(ERROR_CONDITIONS)
+        threads, results = run_threads(
+            lambda: builder.execute(using=client, single_flight=flight), n=3
+        )
+        self._wait_callers(flight, 3)
+        client.release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(client.calls) == 1
+        results[0].to_dict()["hits"]["total"]["value"] = 99
+        assert [r.hits.total.value for r in results[1:]] == [1, 1]
+
+    def test_error_propagates(self):
+        """测试 leader 的异常传递给所有等待者，之后的请求重新发送."""
+        client = BlockingClient(fail=True)
+        flight = SingleFlight()
+        builder = make_builder(ERROR_CONDITIONS)
+        threads, results = run_threads(
+            lambda: builder.execute(using=client, single_flight=flight), n=5
+        )
+        self._wait_callers(flight, 5)
+        client.release.set()
+        for thread in threads:
+            thread.join()
+
+        assert len(client.calls) == 1
+        assert all(isinstance(r, ConnectionError) for r in results)
+        with pytest.raises(ConnectionError):
+            builder.execute(using=client, single_flight=flight)
+        assert len(client.calls) == 2
+
+    def test_with_cache(self):
+        """测试与结果缓存组合: 合并的请求只写入一次缓存，之后命中缓存."""
+        client = BlockingClient()
+        flight = SingleFlight()
+        cache = SearchResultCache()
+        builder = make_builder(ERROR_CONDITIONS)
+        threads, _ = run_threads(
+            lambda: builder.execute(using=client, cache=cache, single_flight=flight),
+            n=5,
+        )
+        self._wait_callers(flight, 5)
+        client.release.set()
+        for thread in threads:
+            thread.join()
+        builder.execute(using=client, cache=cache, single_flight=flight)
+
+        assert len(client.calls) == 1
+        assert cache.stats.stores == 1
+        assert cache.stats.hits == 1
+
+
+class TestAsyncSingleFlight:
+    """asyncio 请求合并测试类."""
+
+    def test_coalesce_identical_requests(self):
+        """测试相同的并发请求只发送一次."""
+        client = AsyncDelayClient()
+        flight = AsyncSingleFlight()
+        builder = make_async_builder(ERROR_CONDITIONS)
+
+        async def run():
+            return await asyncio.gather(
+                *(
+                    builder.execute(using=client, single_flight=flight)
+                    for _ in range(N_CALLERS)
+                )
+            )
+
+        results = asyncio.run(run())
+        assert len(client.calls) == 1
+        assert {r.hits.total.value for r in results} == {1}
+        assert flight.stats.fan_in_ratio == N_CALLERS
+        assert flight.stats.max_fan_in == N_CALLERS
+        assert len(flight) == 0
+
+    def test_error_propagates(self):
+        """测试异常传递给所有等待者."""
+        client = AsyncDelayClient(fail=True)
+        flight = AsyncSingleFlight()
+        builder = make_async_builder(ERROR_CONDITIONS)
+
+        async def run():
+            return await asyncio.gather(
+                *(
+                    builder.execute(using=client, single_flight=flight)
+                    for _ in range(5)
+                ),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+        assert len(client.calls) == 1
+        assert all(isinstance(r, ConnectionError) for r in results)
+
+    def test_cancelled_caller(self):
+        """测试取消 leader 不影响等待同一请求的其他调用者."""
+        client = AsyncDelayClient()
+        flight = AsyncSingleFlight()
+        builder = make_async_builder(ERROR_CONDITIONS)
+
+        async def run():
+            leader = asyncio.ensure_future(
+                builder.execute(using=client, single_flight=flight)
+            )
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(
+                builder.execute(using=client, single_flight=flight)
+            )
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        response = asyncio.run(run())
+        assert response.hits.total.value == 1
+        assert len(client.calls) == 1
@@ -1,9 +1,14 @@
 """QueryStringTransformer 单元测试."""
 
+import random
+import sys
+import threading
+
 import pytest
 
 from elasticsearch_toolkit import QueryStringTransformer
 from elasticsearch_toolkit.exceptions import QueryStringParseError
+from elasticsearch_toolkit.transformers import LRUCache, ParseCache, QueryStringParser
 
 
 class TestQueryStringTransformer:
@@ -131,3 +136,331 @@ class TestQueryStringTransformer:
 
         result = transformer.transform("事件.类型: error")
         assert "event.type:" in result
+
+
+class FakeClock:
+    """可以手动推进的时钟."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestTransformCache:
+    """转换结果缓存与语法树缓存测试类."""
+
+    def make_transformer(self, **kwargs) -> QueryStringTransformer:
+        return QueryStringTransformer(
+            field_mapping={"级别": "severity"},
+            value_translations={"severity": [("1", "致命"), ("2", "预警")]},
+            **kwargs,
+        )
+
+    def test_result_cache(self):
+        """测试相同输入命中缓存，结果与不缓存时一致."""
+        transformer = self.make_transformer()
+        uncached = self.make_transformer(cache_size=0)
+        queries = ["级别: 致命 AND x", "致命 OR y", "级别: 致命 AND x"]
+
+        assert [transformer.transform(q) for q in queries] == [
+            uncached.transform(q) for q in queries
+        ]
+        assert transformer.cache_stats.hits == 1
+        assert transformer.cache_stats.misses == 2
+        assert uncached.cache_stats is None
+
+    def test_invalidate_on_mapping_change(self):
+        """测试替换字段映射或值翻译时清空缓存."""
+        transformer = self.make_transformer()
+        assert transformer.transform("级别: 致命") == "severity: 1"
+
+        transformer.field_mapping = {"级别": "level"}
+        assert transformer.transform("级别: 致命") == "level: 致命"
+
+        transformer.value_translations = {"level": [("9", "致命")]}
+        assert transformer.transform("级别: 致命") == "level: 9"
+        assert transformer.cache_stats.hits == 0
+
+    def test_mappings_are_copied(self):
+        """测试修改传入的字典不会影响已缓存的转换器."""
+        mapping = {"级别": "severity"}
+        transformer = QueryStringTransformer(field_mapping=mapping)
+        mapping["级别"] = "level"
+        assert transformer.transform("级别: 1") == "severity: 1"
+
+    def test_properties_read_only(self):
+        """测试属性返回只读视图，原地修改无法使缓存结果过期."""
+        transformer = self.make_transformer()
+        assert transformer.transform("级别: 致命") == "severity: 1"
+
+        with pytest.raises(TypeError):
+            transformer.field_mapping["级别"] = "level"
+        with pytest.raises(TypeError):
+            transformer.value_translations["severity"] = [("9", "致命")]
+        with pytest.raises(AttributeError):
+            transformer.value_translations["severity"].append(("9", "致命"))
+
+        assert transformer.field_mapping == {"级别": "severity"}
+        assert transformer.transform("级别: 致命") == "severity: 1"
+
+    def test_parse_error_not_cached(self):
+        """测试解析失败不缓存."""
+        transformer = self.make_transformer()
+        for _ in range(2):
+            with pytest.raises(QueryStringParseError):
+                transformer.transform("status: (error")
+        assert len(transformer._cache) == 0
+
+    def test_shared_parse_cache(self):
+        """测试不同映射的转换器共享语法树缓存，共享的语法树不会被修改."""
+        parse_cache = ParseCache()
+        zh = self.make_transformer(parse_cache=parse_cache)
+        plain = QueryStringTransformer(parse_cache=parse_cache)
+
+        # 模糊查询不在快速转换的范围内，经过 luqum 解析
+        query = "级别: 致命 AND 预警 AND 未知~2"
+        expected_zh = self.make_transformer(cache_size=0).transform(query)
+        expected_plain = QueryStringTransformer(cache_size=0).transform(query)
+
+        assert zh.transform(query) == expected_zh
+        assert plain.transform(query) == expected_plain
+        assert zh.transform(query) == expected_zh
+        assert '"预警"' in expected_plain
+        assert parse_cache.stats.hits == 1
+        assert parse_cache.stats.misses == 1
+
+    def test_lru_eviction_and_ttl(self):
+        """测试 LRU 淘汰与过期."""
+        clock = FakeClock()
+        cache = LRUCache(maxsize=2, ttl=10, clock=clock)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.stats.evictions == 1
+
+        clock.now = 10
+        assert cache.get("a") is None
+
+    def test_invalid_arguments(self):
+        """测试无效参数."""
+        with pytest.raises(ValueError):
+            QueryStringTransformer(cache_size=-1)
+        with pytest.raises(ValueError):
+            LRUCache(maxsize=0)
+        with pytest.raises(ValueError):
+            LRUCache(ttl=0)
+
+
+class TestValueTranslationIndex:
+    """值翻译索引测试类."""
+
+    def test_first_match_wins(self):
+        """测试重复的显示值与按顺序查找一致，使用第一个匹配."""
+        transformer = QueryStringTransformer(
+            value_translations={
+                "severity": [("1", "致命"), ("9", "致命")],
+                "level": [("0", "致命")],
+            },
+            cache_size=0,
+        )
+        assert transformer.transform("severity: 致命") == "severity: 1"
+        assert transformer.transform("致命") == "(致命 OR severity:1)"
+
+    def test_large_enum(self):
+        """测试大规模翻译表."""
+        translations = [(str(i), f"值{i}") for i in range(20000)]
+        transformer = QueryStringTransformer(
+            value_translations={"code": translations, "other": translations[:10]},
+            cache_size=0,
+        )
+        assert transformer.transform("code: 值19999") == "code: 19999"
+        assert transformer.transform("值5") == "(值5 OR code:5)"
+        assert transformer.transform("code: 未知") == "code: 未知"
+
+
+class TestFastPath:
+    """快速转换测试类."""
+
+    FIELD_MAPPING = {"级别": "severity", "状态": "status", "主机": "host"}
+    VALUE_TRANSLATIONS = {
+        "severity": [("1", "致命"), ("2", "预警"), ("3", "提醒")],
+        "status": [("0", "正常"), ("1", "异常")],
+    }
+    FIELDS = ["级别", "状态", "主机", "message", "severity"]
+    VALUES = ["致命", "预警", "正常", "异常", "timeout", "web-01", "42", "a*b", "未知"]
+    PHRASES = ['"disk full"', '"致命"', '""']
+    # 快速转换不支持的语法，应回退到 luqum
+    UNSUPPORTED = ["a~2", "b^3", "+c", "-d", "e\\:f", "/re/", "T12:30", ">5", "(", ")"]
+    SPACES = ["", " ", "  ", "\t", "\n "]
+
+    def make_pair(self) -> tuple[QueryStringTransformer, QueryStringTransformer]:
+        fast = QueryStringTransformer(
+            self.FIELD_MAPPING, self.VALUE_TRANSLATIONS, cache_size=0
+        )
+        slow = QueryStringTransformer(
+            self.FIELD_MAPPING, self.VALUE_TRANSLATIONS, cache_size=0, fast_path=False
+        )
+        return fast, slow
+
+    def random_query(self, rng: random.Random, depth: int = 0) -> str:
+        def sp() -> str:
+            return rng.choice(self.SPACES)
+
+        roll = rng.random()
+        if depth > 2 or roll < 0.35:
+            choice = rng.random()
+            if choice < 0.5:
+                value = rng.choice(self.VALUES)
+            elif choice < 0.65:
+                value = rng.choice(self.PHRASES)
+            elif choice < 0.8:
+                low, high = rng.choice("[{"), rng.choice("]}")
+                value = (
+                    f"{low}{sp()}{rng.choice(self.VALUES)} TO{sp() or ' '}"
+                    f"{rng.choice(self.VALUES + ['*'])}{sp()}{high}"
+                )
+            elif choice < 0.9:
+                value = rng.choice(self.UNSUPPORTED)
+            else:
+                value = f"({sp()}{self.random_query(rng, depth + 1)}{sp()})"
+            if rng.random() < 0.5:
+                value = f"{rng.choice(self.FIELDS)}{sp()}:{sp()}{value}"
+            return value
+        if roll < 0.45:
+            return f"NOT {sp()}{self.random_query(rng, depth + 1)}"
+        # 偶尔省略操作符，产生隐式操作
+        op = rng.choice(["AND", "OR", "AND", "OR", ""])
+        left = self.random_query(rng, depth + 1)
+        right = self.random_query(rng, depth + 1)
+        return f"{left}{sp() or ' '}{op}{' ' if op else ''}{sp()}{right}"
+
+    def test_differential_fuzz(self):
+        """测试随机查询的快速转换结果与 luqum 完全一致."""
+        fast, slow = self.make_pair()
+        rng = random.Random(20261017)
+        handled = 0
+        n_queries = 2000
+        for _ in range(n_queries):
+            query = f"{rng.choice(self.SPACES)}{self.random_query(rng)}"
+            query += rng.choice(self.SPACES)
+            try:
+                expected = slow.transform(query)
+            except QueryStringParseError:
+                with pytest.raises(QueryStringParseError):
+                    fast.transform(query)
+                continue
+            assert fast.transform(query) == expected, query
+            if fast._fast_rewriter.rewrite(query) is not None:
+                handled += 1
+        # 大部分查询走快速转换
+        assert handled > n_queries // 3
+
+    def test_fallback(self):
+        """测试不支持的语法回退到 luqum."""
+        fast, slow = self.make_pair()
+        rewriter = fast._fast_rewriter
+        for query in ["a~2", "级别: 致命 预警", "message: a\\:b", "T12:30", "(a"]:
+            assert rewriter.rewrite(query) is None
+        assert fast.transform("级别: 致命 预警") == slow.transform("级别: 致命 预警")
+        with pytest.raises(QueryStringParseError):
+            fast.transform("(a")
+
+    def test_supported(self):
+        """测试常见查询由快速转换处理，结果与 luqum 一致."""
+        fast, slow = self.make_pair()
+        rewriter = fast._fast_rewriter
+        for query in [
+            "级别: 致命 AND (状态: 异常 OR 预警)",
+            'NOT message: "disk full"',
+            "级别: [致命 TO 提醒}",
+        ]:
+            result = rewriter.rewrite(query)
+            assert result is not None
+            assert result == slow.transform(query)
+        assert rewriter.rewrite("级别: [致命 TO 提醒}") == "severity: [1 TO 3}"
+
+    def test_disabled(self):
+        """测试关闭快速转换."""
+        _, slow = self.make_pair()
+        assert slow._fast_rewriter is None
+        assert slow.transform("级别: 致命") == "severity: 1"
+
+
+class TestThreadSafeParsing:
+    """多线程解析测试类."""
+
+    N_THREADS = 8
+    N_ROUNDS = 200
+    # 快速转换不支持模糊查询，全部经过 luqum 解析
+    QUERIES = [
+        f'级别: 致命 AND (host{i}: web~1 OR NOT message: "disk {i}") AND 预警 code: [{i} TO *]'
+        for i in range(20)
+    ]
+
+    def run_threads(self, work) -> list[str]:
+        errors: list[str] = []
+        interval = sys.getswitchinterval()
+        # 频繁切换线程，放大并发问题
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [
+                threading.Thread(target=work, args=(k, errors))
+                for k in range(self.N_THREADS)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        return errors
+
+    def test_concurrent_transform(self):
+        """测试多线程并发转换的结果与单线程一致."""
+        transformer = QueryStringTransformer(
+            field_mapping={"级别": "severity"},
+            value_translations={"severity": [("1", "致命"), ("2", "预警")]},
+            cache_size=0,
+        )
+        expected = {query: transformer.transform(query) for query in self.QUERIES}
+
+        def work(k: int, errors: list[str]) -> None:
+            for n in range(self.N_ROUNDS):
+                query = self.QUERIES[(k + n) % len(self.QUERIES)]
+                try:
+                    if transformer.transform(query) != expected[query]:
+                        errors.append(f"mismatch: {query}")
+                except Exception as e:
+                    errors.append(f"{type(e).__name__}: {e}")
+
+        assert self.run_threads(work) == []
+        # 主线程加上每个工作线程各一份
+        assert transformer._parser.instances == self.N_THREADS + 1
+
+    def test_concurrent_parse_errors(self):
+        """测试并发解析中的语法错误不影响其他线程."""
+        query_parser = QueryStringParser()
+        expected = repr(query_parser.parse(self.QUERIES[0]))
+
+        def work(k: int, errors: list[str]) -> None:
+            for n in range(self.N_ROUNDS):
+                if (k + n) % 2:
+                    try:
+                        query_parser.parse("(a AND")
+                        errors.append("no error")
+                    except QueryStringParseError:
+                        pass
+                elif repr(query_parser.parse(self.QUERIES[0])) != expected:
+                    errors.append("mismatch")
+
+        assert self.run_threads(work) == []
+
+    def test_parse_error(self):
+        """测试解析失败抛出 QueryStringParseError."""
+        with pytest.raises(QueryStringParseError):
+            QueryStringParser().parse("a AND (b")